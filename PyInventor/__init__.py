@@ -12,20 +12,7 @@ __url__ = r'schusterlab.uchicago.edu'
 __status__ = "Dev-Production"
 
 ##############################################################################
-#Checks module compatibility
-try:
-    import glob
-    del glob
-except (ImportError, ModuleNotFoundError):
-    print('Glob module not installed, install glob module using: $ conda  install -c conda-forge glob ')
+from . import  geometry, pyinvent
+from .pyinvent import com_obj, inv_session, structure, iPart, arc_pattern, circle_pattern, set_default_backend
 
-try:
-    import xlwings
-    del xlwings
-except (ImportError, ModuleNotFoundError):
-    print('Xlwings module not installed, install glob module using: $ conda  install -c conda-forge xlwings ')
-
-from . import  pyinvent
-from .pyinvent import com_obj, structure, iPart, arc_pattern, circle_pattern 
-
-__all__=['pyinvent', 'com_obj', 'structure', 'iPart', 'arc_pattern', 'circle_pattern']
+__all__=['geometry', 'pyinvent', 'com_obj', 'inv_session', 'structure', 'iPart', 'arc_pattern', 'circle_pattern', 'set_default_backend']
@@ -0,0 +1,213 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+from contextlib import contextmanager
+from .file_index import acquire_lock, release_lock
+from .journal import build_journal, sim_session
+
+'''
+
+Content-addressed cache of built parts. A build function (as for sweeps) is first run on
+the simulator with a dry build_journal, which records its iPart calls without writing any
+files, and the sha256 of the journal (together with the PyInventor sources) is the cache
+key. On a hit the .ipt/.stp/... files the build produced before are copied to the names
+its save/export calls would have used and Inventor is not driven at all. On a miss the
+build runs on Inventor and the files it wrote are stored under the key.
+
+    def build(session, params):
+        part=session.new_part(path, 'cavity_%d.ipt'%params['n'])
+        ...
+        return part.export(['ipt', 'stp'])
+
+    cache=build_cache()            #~/.pyinventor/build_cache (or PYINVENTOR_CACHE), 2 GB
+    output, hit=cached_build(build, {'n': 4}, cache)
+
+The cache is bounded to max_bytes, least recently used builds are evicted first. The
+index is a JSON file in the cache directory guarded by a lock file, so several processes
+(e.g. sweep workers) can share one cache. Builds that the journal can't key (see the
+journal module) are always run and never stored. The returned paths and export jobs are
+swapped for the written ones when build returns them as it got them from iPart.
+
+'''
+
+INDEX_NAME='index.json'
+LOCK_NAME='.lock'
+INDEX_VERSION=1
+
+_code_digest=None
+
+def default_cache_dir():
+    return os.environ.get('PYINVENTOR_CACHE', os.path.join(os.path.expanduser('~'), '.pyinventor', 'build_cache'))
+
+def code_digest():
+    '''
+    sha256 of the PyInventor sources, cached builds are not reused across versions
+    '''
+    global _code_digest
+    if _code_digest==None:
+        package_dir=os.path.dirname(os.path.abspath(__file__))
+        digest=hashlib.sha256()
+        for name in sorted(os.listdir(package_dir)):
+            if name.endswith('.py'):
+                with open(os.path.join(package_dir, name), 'rb') as f:
+                    digest.update(name.encode('utf-8')+b'\n'+f.read())
+        _code_digest=digest.hexdigest()
+    return _code_digest
+
+
+class build_cache(object):
+    def __init__(self, cache_dir=None, max_bytes=2*1024**3, timeout=60.0, stale=30.0):
+        '''
+        Build artifact cache in cache_dir holding at most max_bytes, see module docs
+        '''
+        self.cache_dir=cache_dir if cache_dir!=None else default_cache_dir()
+        self.max_bytes=max_bytes
+        self.timeout=timeout
+        self.stale=stale
+        self.index_path=os.path.join(self.cache_dir, INDEX_NAME)
+        self.lock_path=os.path.join(self.cache_dir, LOCK_NAME)
+        self.hits=0
+        self.misses=0
+
+    def key(self, journal):
+        '''
+        Cache key of a build_journal, None if it can't be keyed
+        '''
+        journal_key=journal.key()
+        if journal_key==None:
+            return None
+        return hashlib.sha256((code_digest()+journal_key).encode('ascii')).hexdigest()
+
+    @contextmanager
+    def _locked(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        acquire_lock(self.lock_path, self.timeout, self.stale)
+        try:
+            yield
+        finally:
+            release_lock(self.lock_path)
+
+    def _load(self):
+        try:
+            with open(self.index_path) as f:
+                data=json.load(f)
+            if data.get('version')==INDEX_VERSION:
+                return data['entries']
+        except (OSError, ValueError, KeyError):
+            pass
+        return {}
+
+    def _save(self, entries):
+        tmp_path=self.index_path+'.%d.tmp'%os.getpid()
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': INDEX_VERSION, 'entries': entries}, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _files(self, key, entry):
+        return [os.path.join(self.cache_dir, key, name) for name in entry['files']]
+
+    def restore(self, key, journal, output=None):
+        '''
+        Writes the artifacts stored under key where the output calls of the dry journal
+        would have (see build_journal.restore), returns (output, True) on a hit and
+        (None, False) on a miss
+        '''
+        with self._locked():
+            entries=self._load()
+            entry=entries.get(key)
+            if entry==None or not all(os.path.isfile(path) for path in self._files(key, entry)):
+                self.misses+=1
+                return None, False
+            output=journal.restore(self._files(key, entry), output)
+            entry['used']=time.time()
+            self._save(entries)
+        self.hits+=1
+        return output, True
+
+    def put(self, key, paths):
+        '''
+        Stores copies of the files paths under key and evicts the least recently used
+        builds beyond max_bytes. Returns False if the build alone is larger than that.
+        '''
+        n_bytes=sum(os.path.getsize(path) for path in paths)
+        if n_bytes>self.max_bytes:
+            return False
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_dir=os.path.join(self.cache_dir, '%s.%d.tmp'%(key, os.getpid()))
+        os.makedirs(tmp_dir, exist_ok=True)
+        names=[]
+        for ind, path in enumerate(paths):
+            names.append('%03d_%s'%(ind, os.path.basename(path)))
+            shutil.copyfile(path, os.path.join(tmp_dir, names[-1]))
+        with self._locked():
+            entries=self._load()
+            entry_dir=os.path.join(self.cache_dir, key)
+            if os.path.isdir(entry_dir):
+                shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+            entries[key]={'files': names, 'bytes': n_bytes, 'used': time.time()}
+            self._evict(entries, key)
+            self._save(entries)
+        return True
+
+    def _evict(self, entries, keep=None):
+        total=sum(entry['bytes'] for entry in entries.values())
+        for key in sorted(entries, key=lambda key: entries[key]['used']):
+            if total<=self.max_bytes:
+                break
+            if key==keep:
+                continue
+            total-=entries[key]['bytes']
+            shutil.rmtree(os.path.join(self.cache_dir, key), ignore_errors=True)
+            del entries[key]
+
+    def clear(self):
+        with self._locked():
+            for key in self._load():
+                shutil.rmtree(os.path.join(self.cache_dir, key), ignore_errors=True)
+            self._save({})
+
+    def stats(self):
+        '''
+        Stored builds and bytes, and this cache object's hits and misses
+        '''
+        with self._locked():
+            entries=self._load()
+        return {'builds': len(entries),
+                'bytes': sum(entry['bytes'] for entry in entries.values()),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses}
+
+
+def cached_build(build_fn, params=None, cache=None, session=None):
+    '''
+    Runs build_fn(session, params) on session (default a new inv_session) unless the same
+    build is in cache (default build_cache()), returns (output, hit), see module docs
+    '''
+    if cache==None:
+        cache=build_cache()
+    dry_session=sim_session()
+    dry_session.journal=build_journal(dry=True)
+    planned=build_fn(dry_session, params)
+    key=cache.key(dry_session.journal)
+    if key!=None:
+        output, hit=cache.restore(key, dry_session.journal, planned)
+        if hit==True:
+            return output, True
+
+    if session==None:
+        from .pyinvent import inv_session
+        session=inv_session()
+    journal=build_journal()
+    previous, session.journal=session.journal, journal
+    try:
+        output=build_fn(session, params)
+    finally:
+        session.journal=previous
+    #stored only if the real build went as the dry run did
+    if key!=None and cache.key(journal)==key:
+        cache.put(key, journal.artifacts())
+    return output, False
@@ -0,0 +1,262 @@
+import os
+import sys
+import json
+import time
+import inspect
+import threading
+import numpy as np
+
+'''
+
+COM round-trip profiler for PyInventor. The profiler wraps a com_obj backend so that
+the Inventor application and every object handed out from it are returned as proxies.
+Each property get, property put, method call and argument marshal that goes through a
+proxy is timed and attributed to the innermost iPart/structure/session method on the call
+stack (the site) and the outermost one (the entry point that the script called).
+
+Usage:
+    from PyInventor.com_profile import com_profiler
+    prof=com_profiler()
+    part=iPart(path, 'demo.ipt', backend=prof.attach())
+    ...
+    prof.dump_json('demo_com.json')
+    prof.dump_chrome_trace('demo_com.trace.json')   #open in chrome://tracing or Perfetto
+
+The profiler is opt-in, nothing is wrapped unless a profiled backend is used.
+
+'''
+
+_package_dir=os.path.dirname(os.path.abspath(__file__))
+_skip_files=(os.path.join(_package_dir, 'com_profile.py'), os.path.join(_package_dir, 'inv_sim.py'))
+_primitive=(int, float, complex, str, bytes, bool, type(None))
+
+def _is_callable_member(val):
+    return inspect.ismethod(val) or inspect.isfunction(val) or inspect.isbuiltin(val) or inspect.isclass(val)
+
+
+class com_proxy(object):
+    '''
+    Proxy around a COM object. Proxy classes are created per wrapped type and carry
+    its name so iPart.API_type keeps working on profiled objects.
+    '''
+    __slots__=('_com_target', '_com_profiler')
+
+    def __init__(self, target, profiler):
+        object.__setattr__(self, '_com_target', target)
+        object.__setattr__(self, '_com_profiler', profiler)
+
+    def __getattr__(self, name):
+        prof=self._com_profiler
+        t_0=prof.clock()
+        val=getattr(self._com_target, name)
+        t_1=prof.clock()
+        member=prof._member(self._com_target, name)
+        if _is_callable_member(val):
+            return _com_method(val, member, prof)
+        prof._record('get', member, t_0, t_1)
+        return prof.wrap(val)
+
+    def __setattr__(self, name, value):
+        prof=self._com_profiler
+        value=prof._marshal(prof._member(self._com_target, name), (value,), {})[0][0]
+        t_0=prof.clock()
+        setattr(self._com_target, name, value)
+        prof._record('put', prof._member(self._com_target, name), t_0, prof.clock())
+
+    def __call__(self, *args, **kwargs):
+        return _com_method(self._com_target, self._com_profiler._member(self._com_target, '__call__'), self._com_profiler)(*args, **kwargs)
+
+    def __iter__(self):
+        for item in self._com_target:
+            yield self._com_profiler.wrap(item)
+
+    def __repr__(self):
+        return repr(self._com_target)
+
+    def __eq__(self, other):
+        return self._com_target==unwrap(other)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self._com_target)
+
+
+class _com_method(object):
+    __slots__=('_method', '_member', '_profiler')
+
+    def __init__(self, method, member, profiler):
+        self._method=method
+        self._member=member
+        self._profiler=profiler
+
+    def __call__(self, *args, **kwargs):
+        prof=self._profiler
+        args, kwargs=prof._marshal(self._member, args, kwargs)
+        t_0=prof.clock()
+        val=self._method(*args, **kwargs)
+        prof._record('call', self._member, t_0, prof.clock())
+        return prof.wrap(val)
+
+
+def unwrap(obj):
+    '''
+    Returns the COM object behind a proxy, containers are unwrapped element-wise
+    '''
+    if isinstance(obj, com_proxy):
+        return object.__getattribute__(obj, '_com_target')
+    elif type(obj)==tuple:
+        return tuple(unwrap(val) for val in obj)
+    elif type(obj)==list:
+        return [unwrap(val) for val in obj]
+    return obj
+
+
+class profiled_backend(object):
+    def __init__(self, backend, profiler):
+        '''
+        com_obj backend that hands out proxied application and typelib objects
+        '''
+        self.backend=backend
+        self.profiler=profiler
+        self.constants=backend.constants
+
+    def connect(self):
+        return self.profiler.wrap(self.backend.connect())
+
+    def typelib(self):
+        return self.profiler.wrap(self.backend.typelib())
+
+    def quit(self):
+        #sweep and export workers close their backend when done
+        self.backend.quit()
+
+
+class com_profiler(object):
+    def __init__(self, clock=time.perf_counter):
+        '''
+        Records COM round trips made through proxied objects, see attach
+        '''
+        self.clock=clock
+        self.t_origin=clock()
+        self.records=[]
+        self._proxy_types={}
+        self._lock=threading.Lock()
+
+    def attach(self, backend=None):
+        '''
+        Returns a profiled version of backend (default backend if None) for com_obj/iPart
+        '''
+        if backend==None:
+            from .pyinvent import get_default_backend
+            backend=get_default_backend()
+        return profiled_backend(backend, self)
+
+    def reset(self):
+        self.records=[]
+        self.t_origin=self.clock()
+
+    def wrap(self, obj):
+        if isinstance(obj, _primitive) or isinstance(obj, com_proxy) or type(obj)==tuple or type(obj)==list:
+            return obj
+        obj_type=type(obj)
+        try:
+            proxy_type=self._proxy_types[obj_type]
+        except KeyError:
+            proxy_type=type(obj_type.__name__, (com_proxy,), {'__slots__': ()})
+            self._proxy_types[obj_type]=proxy_type
+        return proxy_type(obj, self)
+
+    def _member(self, target, name):
+        return type(target).__name__+'.'+name
+
+    def _marshal(self, member, args, kwargs):
+        t_0=self.clock()
+        n_args=len(args)+len(kwargs)
+        args=tuple(unwrap(val) for val in args)
+        kwargs=dict((key, unwrap(val)) for key, val in kwargs.items())
+        if n_args>0:
+            self._record('marshal', member, t_0, self.clock(), n_args)
+        return args, kwargs
+
+    def _sites(self):
+        #innermost and outermost iPart/structure methods on the stack
+        from .pyinvent import com_obj, inv_session, structure
+        site=None
+        entry=None
+        frame=sys._getframe(1)
+        while frame!=None:
+            code=frame.f_code
+            if code.co_filename.startswith(_package_dir) and code.co_filename not in _skip_files:
+                f_self=frame.f_locals.get('self')
+                if isinstance(f_self, (com_obj, inv_session, structure)):
+                    name=type(f_self).__name__+'.'+code.co_name
+                    if site==None:
+                        site=name
+                    entry=name
+            frame=frame.f_back
+        return site, entry
+
+    def _record(self, kind, member, t_0, t_1, n_args=0):
+        site, entry=self._sites()
+        with self._lock:
+            self.records.append((kind, member, site, entry, t_0, t_1-t_0, n_args, threading.get_ident()))
+
+    def _stats(self, key_index):
+        groups={}
+        for rec in self.records:
+            groups.setdefault(rec[key_index], []).append(rec)
+        stats={}
+        for key, recs in groups.items():
+            durs=np.array([rec[5] for rec in recs])
+            stats[str(key)]={'count': len(recs),
+                             'round_trips': sum(1 for rec in recs if rec[0]!='marshal'),
+                             'marshalled_args': sum(rec[6] for rec in recs),
+                             'total': float(durs.sum()),
+                             'p50': float(np.percentile(durs, 50)),
+                             'p99': float(np.percentile(durs, 99)),
+                             'histogram': latency_histogram(durs)}
+        return dict(sorted(stats.items(), key=lambda item: -item[1]['total']))
+
+    def report(self):
+        '''
+        Returns count, total/p50/p99 latency (seconds) and a latency histogram grouped
+        by COM member, by calling site and by entry point, slowest first
+        '''
+        return {'round_trips': sum(1 for rec in self.records if rec[0]!='marshal'),
+                'total_time': float(sum(rec[5] for rec in self.records)),
+                'by_member': self._stats(1),
+                'by_site': self._stats(2),
+                'by_entry': self._stats(3)}
+
+    def dump_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=1)
+        return path
+
+    def dump_chrome_trace(self, path):
+        '''
+        Writes the records in Chrome trace event format, one complete event per round trip
+        '''
+        pid=os.getpid()
+        events=[]
+        for kind, member, site, entry, t_0, dur, n_args, tid in self.records:
+            events.append({'name': member, 'cat': kind, 'ph': 'X', 'pid': pid, 'tid': tid,
+                           'ts': (t_0-self.t_origin)*1e6, 'dur': dur*1e6,
+                           'args': {'site': site, 'entry': entry, 'args': n_args}})
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return path
+
+
+def latency_histogram(durs):
+    '''
+    Counts of durations (seconds) in power of two microsecond buckets
+    '''
+    durs=np.asarray(durs)*1e6
+    bins=np.floor(np.log2(np.maximum(durs, 1.0))).astype(int)
+    hist={}
+    for b, count in zip(*np.unique(bins, return_counts=True)):
+        hist['%d-%dus'%(2**b, 2**(b+1))]=int(count)
+    return hist
@@ -0,0 +1,153 @@
+import os
+import itertools
+import numpy as np
+from .geometry import as_xy
+
+'''
+
+Streaming import of large contour files (.npy or text/csv point lists from simulations)
+into a structure. The file is read a chunk at a time, .npy files memory mapped, and each
+chunk is simplified with Douglas-Peucker to a distance tol before it is added, so peak
+memory is bounded by the chunk size and only the kept vertices become sketch lines:
+
+    start=first_point('flute_contour.npy')
+    s=structure(part, sketch, start=start)
+    add_contour(s, 'flute_contour.npy', tol=1e-4)     #tol in the part units
+    path=s.draw_path(close_path=True)
+
+load_contour returns the simplified points as an array instead (e.g. for
+part.sketch_polyline or sketch_spline). The simplified polyline stays within tol of
+every input point, each chunk boundary is kept as a vertex.
+
+Text files hold one point per line, x and y in the first two columns (usecols picks
+others), comma separated for .csv and whitespace separated otherwise. Lines starting
+with # are skipped, skiprows skips a header.
+
+'''
+
+CHUNK_SIZE=1000000
+
+def douglas_peucker(xy, tol):
+    '''
+    Indices of the points of the polyline xy kept by Douglas-Peucker simplification, no
+    point is further than tol from the simplified polyline. The first and last point are
+    always kept.
+    '''
+    xy=as_xy(xy)
+    n=len(xy)
+    if n<3 or not tol or tol<=0:
+        return np.arange(n)
+    keep=np.zeros(n, dtype=bool)
+    keep[0]=keep[-1]=True
+    stack=[(0, n-1)]
+    while stack:
+        first, last=stack.pop()
+        if last-first<2:
+            continue
+        a=xy[first]
+        seg=xy[last]-a
+        pts=xy[first+1:last]-a
+        #distance to the segment, not the line, so back tracking runs are kept
+        seg_len2=float(np.dot(seg, seg))
+        if seg_len2>0:
+            t=np.clip(np.dot(pts, seg)/seg_len2, 0, 1)
+            pts=pts-np.outer(t, seg)
+        dist2=np.einsum('ij,ij->i', pts, pts)
+        ind=int(np.argmax(dist2))
+        if dist2[ind]>tol*tol:
+            ind+=first+1
+            keep[ind]=True
+            stack.append((first, ind))
+            stack.append((ind, last))
+    return np.flatnonzero(keep)
+
+def simplify(xy, tol):
+    '''
+    Douglas-Peucker simplification of the polyline xy to tol
+    '''
+    xy=as_xy(xy)
+    return xy[douglas_peucker(xy, tol)]
+
+def _text_delimiter(path):
+    return ',' if os.path.splitext(path)[1].lower()=='.csv' else None
+
+def read_chunks(source, chunk_size=CHUNK_SIZE, usecols=(0, 1), delimiter=None, skiprows=0):
+    '''
+    Yields the points of source as (k,2) float arrays of at most chunk_size points. source
+    is a .npy file (memory mapped), a text file (read chunk_size lines at a time) or an
+    array.
+    '''
+    usecols=list(usecols)
+    if type(source)==str and os.path.splitext(source)[1].lower()=='.npy':
+        source=np.load(source, mmap_mode='r')
+    if type(source)!=str:
+        if isinstance(source, np.ndarray) and source.ndim==2 and source.shape[1]>2:
+            data=source
+        else:
+            data=as_xy(source)
+            usecols=[0, 1]
+        if data.ndim!=2:
+            raise Exception('ERROR: Contour points must be an (n,2) array')
+        for start in range(0, len(data), chunk_size):
+            #copies only this chunk out of a memory map
+            yield np.array(data[start:start+chunk_size][:, usecols], dtype=np.float64)
+        return
+    if delimiter==None:
+        delimiter=_text_delimiter(source)
+    with open(source) as f:
+        for _ in range(skiprows):
+            next(f, None)
+        while True:
+            lines=list(itertools.islice(f, chunk_size))
+            if lines==[]:
+                break
+            data=np.loadtxt(lines, delimiter=delimiter, usecols=usecols, ndmin=2)
+            if len(data)>0:
+                yield data.astype(np.float64)
+
+def simplify_chunks(chunks, tol):
+    '''
+    Douglas-Peucker simplification of a polyline given as consecutive chunks, yields the
+    kept points of each chunk. The last point of a chunk starts the next one, so the
+    result is the same polyline with one extra vertex per chunk boundary at most.
+    '''
+    carry=None
+    for xy in chunks:
+        if carry is not None:
+            xy=np.vstack((carry, xy))
+        if len(xy)==0:
+            continue
+        kept=simplify(xy, tol) if tol else xy
+        out=kept if carry is None else kept[1:]
+        carry=kept[-1:]
+        if len(out)>0:
+            yield out
+
+def first_point(source, **kwargs):
+    '''
+    First point of source (see read_chunks), e.g. the start of the structure it is added to
+    '''
+    for xy in read_chunks(source, chunk_size=1, **kwargs):
+        return tuple(xy[0].tolist())
+    raise Exception('ERROR: Contour has no points')
+
+def load_contour(source, tol=None, chunk_size=CHUNK_SIZE, **kwargs):
+    '''
+    Points of source simplified to tol (None keeps every point) as an (n,2) array, read
+    chunk_size points at a time, kwargs as in read_chunks
+    '''
+    parts=list(simplify_chunks(read_chunks(source, chunk_size, **kwargs), tol))
+    if parts==[]:
+        return np.empty((0, 2))
+    return np.concatenate(parts)
+
+def add_contour(struct, source, tol=None, chunk_size=CHUNK_SIZE, **kwargs):
+    '''
+    Adds the points of source to the structure struct as lines (structure.add_polyline),
+    one simplified chunk at a time. Returns the number of points added.
+    '''
+    added=0
+    for xy in simplify_chunks(read_chunks(source, chunk_size, **kwargs), tol):
+        struct.add_polyline(xy)
+        added+=len(xy)
+    return added
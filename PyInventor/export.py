@@ -0,0 +1,273 @@
+import os
+import time
+import queue
+import threading
+import traceback
+from .file_index import release_name
+
+'''
+
+STEP/STL/IGES export for iPart. Exports go through Inventor's translator add-ins so
+translator options can be set (e.g. STL resolution), and can be handed to an
+export_queue: a worker thread with its own Inventor instance that opens the saved .ipt
+and writes the copies while the script goes on building the next part.
+
+    exports=export_queue()
+    for params in variants:
+        part=iPart(path, 'cavity.ipt')
+        ...
+        part.export(['stp', ('stl', {'Resolution': 0})], exports=exports)
+    exports.close()          #waits for the queued exports
+    print(exports.report())  #per format count and timings
+
+Targets are an extension ('stp', 'stl', 'igs', 'ipt' or an alias such as 'step') or an
+(extension, options) tuple, options are translator SaveCopyAs options by name:
+
+    stl     Resolution (0 high, 1 medium, 2 low, 3 custom), OutputFileType (0 binary, 1 ascii),
+            ExportUnits, SurfaceDeviation, NormalDeviation, MaxEdgeLength, AspectRatio
+    stp     ApplicationProtocolType (2 AP203, 3 AP214), Author, Organization, Description
+
+Without an export_queue, part.export runs the translations in the calling thread and
+still returns their timings.
+
+'''
+
+#translator add-in client ids
+TRANSLATORS={'stp': '{90AF7F40-0C01-11D5-8E83-0010B541CD80}',
+             'stl': '{533E9A98-FC3B-11D4-8E7E-0010B541CD80}',
+             'igs': '{90AF7F44-0C01-11D5-8E83-0010B541CD80}'}
+
+FORMAT_ALIASES={'step': 'stp', 'ste': 'stp', 'iges': 'igs', 'ige': 'igs'}
+
+EXPORT_FORMATS=('ipt', 'stp', 'stl', 'igs')
+
+
+def export_targets(formats):
+    '''
+    Normalizes a list of formats to [(extension, options)]
+    '''
+    if type(formats)==str or type(formats)==tuple:
+        formats=[formats]
+    targets=[]
+    for target in formats:
+        if type(target)==tuple:
+            ext, options=target
+        else:
+            ext, options=target, {}
+        ext=FORMAT_ALIASES.get(ext.lower().lstrip('.'), ext.lower().lstrip('.'))
+        if ext not in EXPORT_FORMATS:
+            raise Exception('ERROR: Not a valid export format %s, must be one of %s'%(ext, ', '.join(EXPORT_FORMATS)))
+        targets.append((ext, dict(options or {})))
+    return targets
+
+def _set_option(options, name, val):
+    try:
+        options.SetValue(name, val)
+    except Exception:
+        options.Add(name, val)
+
+def translate(app, constants, doc, path, ext, options=None):
+    '''
+    Writes a copy of doc to path, through the translator add-in for ext when there is one
+    (applying options) and through SaveAs otherwise
+    '''
+    if ext not in TRANSLATORS:
+        if options:
+            raise Exception('ERROR: Export options are not supported for %s'%ext)
+        doc.SaveAs(path, True)
+        return
+    addin=app.ApplicationAddIns.ItemById(TRANSLATORS[ext])
+    trans_obj=app.TransientObjects
+    context=trans_obj.CreateTranslationContext()
+    context.Type=constants.kFileBrowseIOMechanism
+    value_map=trans_obj.CreateNameValueMap()
+    if addin.HasSaveCopyAsOptions(doc, context, value_map):
+        for name, val in (options or {}).items():
+            _set_option(value_map, name, val)
+    data=trans_obj.CreateDataMedium()
+    data.FileName=path
+    addin.SaveCopyAs(doc, context, value_map, data)
+
+
+class export_job(object):
+    def __init__(self, source, path, ext, options):
+        '''
+        One queued export of source (a saved .ipt) to path, done is set when finished
+        '''
+        self.source=source
+        self.path=path
+        self.ext=ext
+        self.options=options
+        self.queued_at=time.perf_counter()
+        self.wait=0.0
+        self.time=0.0
+        self.error=None
+        self.done=threading.Event()
+
+    def __repr__(self):
+        state='done' if self.done.is_set() else 'pending'
+        return 'export_job(%s, %s)'%(self.path, state if self.error==None else 'failed')
+
+    def result(self, timeout=None):
+        '''
+        Waits for the export, returns the output path or raises if it failed
+        '''
+        if not self.done.wait(timeout):
+            raise Exception('ERROR: Export of %s not finished'%self.path)
+        if self.error!=None:
+            raise Exception('ERROR: Export of %s failed\n%s'%(self.path, self.error))
+        return self.path
+
+
+def _inventor_instance():
+    from .sweep import inventor_instance
+    return inventor_instance()
+
+
+class export_queue(object):
+    def __init__(self, backend_factory=None, max_pending=0):
+        '''
+        Export worker thread with its own Inventor instance (backend_factory() is called
+        in the worker, default a new hidden Inventor). max_pending>0 makes export calls
+        block while that many parts are waiting.
+        '''
+        self.backend_factory=backend_factory if backend_factory!=None else _inventor_instance
+        self.jobs=[]
+        self._queue=queue.Queue(max_pending)
+        self._thread=None
+        self._lock=threading.Lock()
+
+    def _start(self):
+        if self._thread==None:
+            self._thread=threading.Thread(target=self._run, name='PyInventor export')
+            self._thread.daemon=True
+            self._thread.start()
+
+    def submit(self, source, outputs):
+        '''
+        Queues the exports of the saved part file source, outputs is [(path, ext, options)].
+        Returns the export_job of each output.
+        '''
+        jobs=[export_job(source, path, ext, options) for path, ext, options in outputs]
+        with self._lock:
+            self.jobs.extend(jobs)
+            self._start()
+        self._queue.put((source, jobs))
+        return jobs
+
+    def record(self, job):
+        '''
+        Adds a job finished outside the queue (e.g. the .ipt save) to the report
+        '''
+        with self._lock:
+            self.jobs.append(job)
+
+    def _run(self):
+        try:
+            import pythoncom
+            pythoncom.CoInitialize()
+        except ImportError:
+            pythoncom=None
+        backend=None
+        try:
+            try:
+                backend=self.backend_factory()
+                app=backend.connect()
+            except Exception:
+                error=traceback.format_exc()
+                while True:
+                    item=self._queue.get()
+                    if item==None:
+                        return
+                    for job in item[1]:
+                        release_name(job.path)
+                        job.error=error
+                        job.done.set()
+            while True:
+                item=self._queue.get()
+                if item==None:
+                    break
+                source, jobs=item
+                self._export(app, backend.constants, source, jobs)
+        finally:
+            if backend!=None and hasattr(backend, 'quit'):
+                try:
+                    backend.quit()
+                except Exception:
+                    pass
+            if pythoncom!=None:
+                pythoncom.CoUninitialize()
+
+    def _export(self, app, constants, source, jobs):
+        doc=None
+        try:
+            doc=app.Documents.Open(source, False)
+        except Exception:
+            error=traceback.format_exc()
+            for job in jobs:
+                release_name(job.path)
+                job.error=error
+                job.done.set()
+            return
+        try:
+            for job in jobs:
+                t_0=time.perf_counter()
+                job.wait=t_0-job.queued_at
+                try:
+                    translate(app, constants, doc, job.path, job.ext, job.options)
+                except Exception:
+                    job.error=traceback.format_exc()
+                finally:
+                    release_name(job.path)
+                job.time=time.perf_counter()-t_0
+                job.done.set()
+        finally:
+            try:
+                doc.Close(True)
+            except Exception:
+                pass
+
+    def join(self, timeout=None):
+        '''
+        Waits for every queued export
+        '''
+        for job in list(self.jobs):
+            job.done.wait(timeout)
+
+    def close(self):
+        '''
+        Waits for the queued exports and shuts the worker and its Inventor instance down
+        '''
+        if self._thread!=None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread=None
+
+    def failures(self):
+        return [job for job in self.jobs if job.done.is_set() and job.error!=None]
+
+    def report(self):
+        return export_report(self.jobs)
+
+
+def export_report(jobs):
+    '''
+    Count, total, mean and max time (seconds) per format of finished exports, and the
+    mean time exports waited in the queue
+    '''
+    formats={}
+    for job in jobs:
+        if not job.done.is_set() or job.error!=None:
+            continue
+        stats=formats.setdefault(job.ext, {'count': 0, 'total': 0.0, 'max': 0.0, 'wait': 0.0})
+        stats['count']+=1
+        stats['total']+=job.time
+        stats['max']=max(stats['max'], job.time)
+        stats['wait']+=job.wait
+    for stats in formats.values():
+        stats['mean']=stats['total']/stats['count']
+        stats['wait']=stats['wait']/stats['count']
+    return {'exports': sum(stats['count'] for stats in formats.values()),
+            'failed': sum(1 for job in jobs if job.done.is_set() and job.error!=None),
+            'pending': sum(1 for job in jobs if not job.done.is_set()),
+            'formats': formats}
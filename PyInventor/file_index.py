@@ -0,0 +1,217 @@
+import os
+import re
+import glob
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+'''
+
+Output filename allocation for iPart.save, save_copy_as and export. Numbered copies are
+named NNNNN_name (zero padded to 5 digits, longer numbers are not truncated). The next
+number for each name is kept in a single sidecar file in the output directory,
+.pyinventor_index.json, which is locked (an OS byte range lock on the file itself, freed
+if the process dies) while it is read and updated, so allocation is O(1) and atomic
+across processes that save into the same directory (e.g. sweep workers). The first
+allocation of a name in a directory seeds its counter with one glob of the existing
+files.
+
+    index=file_index(path)
+    file_name=index.allocate('demo.ipt')     #demo.ipt, then 00000_demo.ipt, 00001_demo.ipt ...
+
+The plain name is handed out whenever that file is missing, so a part saved with
+overwrite=True (its old file removed) keeps its name on every run. It is reserved in the
+sidecar until the save is done and release is called, the target path itself is not
+touched before Inventor writes it. A reservation older than stale seconds is dropped. The sidecar is the only file
+PyInventor adds to an output directory, it can be deleted when no save is running.
+
+'''
+
+INDEX_NAME='.pyinventor_index.json'
+INDEX_VERSION=2
+
+#POSIX record locks belong to the process, threads (mode='thread' sweeps) take this too
+_thread_lock=threading.Lock()
+
+
+class file_index(object):
+    def __init__(self, directory, timeout=60.0, stale=600.0):
+        '''
+        Filename allocator for directory. timeout is how long to wait for the sidecar lock,
+        a reservation older than stale seconds is taken to be left over from a failed save.
+        '''
+        self.directory=directory
+        self.index_path=os.path.join(directory, INDEX_NAME)
+        self.timeout=timeout
+        self.stale=stale
+
+    @contextmanager
+    def _locked(self):
+        #yields the parsed sidecar, written back on exit while still locked
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory, exist_ok=True)
+        with _thread_lock:
+            fd=os.open(self.index_path, os.O_RDWR|os.O_CREAT)
+            try:
+                lock_fd(fd, self.timeout)
+                try:
+                    data=self._read(fd)
+                    yield data
+                    self._write(fd, data)
+                finally:
+                    unlock_fd(fd)
+            finally:
+                os.close(fd)
+
+    def _read(self, fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        chunks=[]
+        while True:
+            chunk=os.read(fd, 65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        try:
+            data=json.loads(b''.join(chunks).decode('utf-8'))
+            if data.get('version')==INDEX_VERSION:
+                return {'counters': dict(data['counters']), 'reserved': dict(data['reserved'])}
+        except (ValueError, KeyError, TypeError, AttributeError):
+            pass
+        return {'counters': {}, 'reserved': {}}
+
+    def _write(self, fd, data):
+        #the reservation of a file that now exists (or of a save that died) is done with
+        now=time.time()
+        data['reserved']=dict((name, t_0) for name, t_0 in data['reserved'].items()
+                              if now-t_0<self.stale and not os.path.exists(os.path.join(self.directory, name)))
+        text=json.dumps({'version': INDEX_VERSION, 'counters': data['counters'], 'reserved': data['reserved']})
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.ftruncate(fd, 0)
+        os.write(fd, text.encode('utf-8'))
+
+    def _seed(self, name):
+        #next number after the highest existing NNNNN_name*, one glob per name
+        pattern=re.compile(r'^(\d+)_'+re.escape(name))
+        ind=0
+        for path in glob.glob(os.path.join(glob.escape(self.directory), '*_'+glob.escape(name)+'*')):
+            match=pattern.match(os.path.basename(path))
+            if match:
+                ind=max(ind, int(match.group(1))+1)
+        return ind
+
+    def _next(self, counters, name, suffix):
+        if name not in counters:
+            counters[name]=self._seed(name)
+        ind=counters[name]
+        #files copied in by hand since the counter was seeded are skipped
+        while os.path.exists(os.path.join(self.directory, numbered_name(ind, name, suffix))):
+            ind+=1
+        counters[name]=ind+1
+        return ind
+
+    def next_index(self, name):
+        '''
+        Allocates and returns the next number for name
+        '''
+        with self._locked() as data:
+            return self._next(data['counters'], name, '')
+
+    def allocate(self, name, suffix=''):
+        '''
+        Returns a file name in the directory that no other allocation will return: name
+        itself if that file is missing and not reserved (reserved in the sidecar until
+        release is called), otherwise the next numbered NNNNN_name
+        '''
+        with self._locked() as data:
+            reserved=data['reserved']
+            t_0=reserved.get(name)
+            free=t_0==None or time.time()-t_0>=self.stale
+            if suffix=='' and free and not os.path.exists(os.path.join(self.directory, name)):
+                reserved[name]=time.time()
+                return name
+            return numbered_name(self._next(data['counters'], name, suffix), name, suffix)
+
+    def release(self, name):
+        '''
+        Drops the reservation of name made by allocate, once the save to it is done or
+        failed
+        '''
+        with self._locked() as data:
+            data['reserved'].pop(name, None)
+
+
+def lock_fd(fd, timeout=60.0):
+    '''
+    Takes an exclusive lock on the open file fd, waiting up to timeout seconds. The OS
+    frees it when the file is closed or the process exits.
+    '''
+    t_0=time.time()
+    delay=1e-3
+    while True:
+        try:
+            if os.name=='nt':
+                import msvcrt
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.lockf(fd, fcntl.LOCK_EX|fcntl.LOCK_NB)
+            return
+        except OSError:
+            if time.time()-t_0>timeout:
+                raise Exception('ERROR: Timed out waiting for the lock on %s'%INDEX_NAME)
+            time.sleep(delay)
+            delay=min(2*delay, 0.05)
+
+def unlock_fd(fd):
+    if os.name=='nt':
+        import msvcrt
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.lockf(fd, fcntl.LOCK_UN)
+
+def acquire_lock(lock_path, timeout=60.0, stale=30.0):
+    '''
+    Takes the lock file lock_path (created with O_EXCL), waiting up to timeout seconds.
+    A lock older than stale seconds is taken to be left over from a crashed process.
+    '''
+    t_0=time.time()
+    delay=1e-3
+    while True:
+        try:
+            fd=os.open(lock_path, os.O_CREAT|os.O_EXCL|os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time()-os.path.getmtime(lock_path)>stale:
+                    os.remove(lock_path)
+                    continue
+            except OSError:
+                continue
+            if time.time()-t_0>timeout:
+                raise Exception('ERROR: Timed out waiting for lock %s'%lock_path)
+            time.sleep(delay)
+            delay=min(2*delay, 0.05)
+            continue
+        os.write(fd, str(os.getpid()).encode('ascii'))
+        os.close(fd)
+        return
+
+def release_lock(lock_path):
+    try:
+        os.remove(lock_path)
+    except OSError:
+        pass
+
+def numbered_name(ind, name, suffix=''):
+    return '%05d_'%ind+name+suffix
+
+def release_name(path):
+    '''
+    Drops the reservation of the file path allocated by file_index.allocate, once the
+    save to it is done or failed
+    '''
+    directory, name=os.path.split(path)
+    file_index(directory).release(name)
@@ -0,0 +1,133 @@
+import numpy as np
+from .geometry import as_xy
+
+'''
+
+Fits runs of dense points to exact lines and circular arcs, so a structure can draw a
+generated point run (a spline through arc or line points, add_point_arc, add_point_line)
+as a few sketch lines and arcs instead of one large spline or hundreds of segments:
+
+    runs=fit_runs(xy, tol=2e-5)
+    for kind, i, j, center, ccw in runs:
+        ...     #kind is line, arc or rest, covering xy[i:j+1]
+
+Runs are found greedily from the start: at each point the longest line run (every point
+within tol of the chord, moving forward along it) and the longest arc run (every point
+within tol of the circle through the first, middle and last point, sweeping one way and
+less than a half turn) are searched by doubling then bisection, the longer one is kept if
+it has min_pts points or more. Points no run covers are returned as rest runs. Consecutive
+runs share their end point.
+
+'''
+
+def circle_3pt(p_0, p_1, p_2):
+    '''
+    Center and radius of the circle through three points, None if they are collinear
+    '''
+    (x_0, y_0), (x_1, y_1), (x_2, y_2)=p_0, p_1, p_2
+    det=2.0*((x_1-x_0)*(y_2-y_0)-(y_1-y_0)*(x_2-x_0))
+    scale=max(abs(x_1-x_0), abs(y_1-y_0), abs(x_2-x_0), abs(y_2-y_0))
+    if scale==0 or abs(det)<=1e-12*scale*scale:
+        return None
+    a=(x_1-x_0)**2+(y_1-y_0)**2
+    b=(x_2-x_0)**2+(y_2-y_0)**2
+    c_x=x_0+((y_2-y_0)*a-(y_1-y_0)*b)/det
+    c_y=y_0+((x_1-x_0)*b-(x_2-x_0)*a)/det
+    return (c_x, c_y), float(np.hypot(x_0-c_x, y_0-c_y))
+
+def line_fit(xy, i, j, tol):
+    '''
+    True if the points xy[i:j+1] lie within tol of the segment from xy[i] to xy[j] and
+    move forward along it
+    '''
+    a=xy[i]
+    seg=xy[j]-a
+    seg_len2=float(np.dot(seg, seg))
+    if seg_len2==0:
+        return False
+    pts=xy[i:j+1]-a
+    t=np.dot(pts, seg)/seg_len2
+    if np.any(np.diff(t)<0):
+        return False
+    off=pts-np.outer(np.clip(t, 0, 1), seg)
+    return bool(np.einsum('ij,ij->i', off, off).max()<=tol*tol)
+
+def arc_fit(xy, i, j, tol):
+    '''
+    (center, ccw) of the arc through xy[i], the middle point and xy[j] if all of
+    xy[i:j+1] lie within tol of it and sweep one way, less than a half turn, else None
+    '''
+    if j-i<2:
+        return None
+    circle=circle_3pt(xy[i], xy[(i+j)//2], xy[j])
+    if circle==None:
+        return None
+    center, radius=circle
+    pts=xy[i:j+1]-center
+    if np.abs(np.hypot(pts[:, 0], pts[:, 1])-radius).max()>tol:
+        return None
+    ang=np.arctan2(pts[:, 1], pts[:, 0])
+    step=(np.diff(ang)+np.pi)%(2*np.pi)-np.pi
+    if np.all(step>0):
+        ccw=True
+    elif np.all(step<0):
+        ccw=False
+    else:
+        return None
+    #the short way between the ends, as structure.get_plt_pts plots arcs
+    if abs(step.sum())>=np.pi:
+        return None
+    return center, ccw
+
+def _longest(fit, xy, i, first, tol):
+    #largest j>=first with fit(xy, i, j, tol), doubling then bisecting, None if first fails
+    n=len(xy)
+    if first>n-1 or not fit(xy, i, first, tol):
+        return None
+    lo=first
+    hi=None
+    step=1
+    while hi==None:
+        j=min(lo+step, n-1)
+        if j==lo:
+            return lo
+        if fit(xy, i, j, tol):
+            lo=j
+            step*=2
+        else:
+            hi=j
+    while hi-lo>1:
+        mid=(lo+hi)//2
+        if fit(xy, i, mid, tol):
+            lo=mid
+        else:
+            hi=mid
+    return lo
+
+def fit_runs(xy, tol=2e-5, min_pts=4):
+    '''
+    Splits the points xy into line, arc and rest runs, a list of (kind, i, j, center, ccw)
+    each covering xy[i:j+1], center and ccw are None except for arcs
+    '''
+    xy=as_xy(xy)
+    n=len(xy)
+    runs=[]
+    rest=0
+    i=0
+    while i<n-1:
+        j_line=_longest(line_fit, xy, i, i+1, tol)
+        j_arc=_longest(arc_fit, xy, i, i+2, tol)
+        if j_arc!=None and (j_line==None or j_arc>j_line) and j_arc-i+1>=min_pts:
+            run=('arc', i, j_arc)+arc_fit(xy, i, j_arc, tol)
+        elif j_line!=None and j_line-i+1>=min_pts:
+            run=('line', i, j_line, None, None)
+        else:
+            i+=1
+            continue
+        if i>rest:
+            runs.append(('rest', rest, i, None, None))
+        runs.append(run)
+        i=rest=run[2]
+    if rest<n-1:
+        runs.append(('rest', rest, n-1, None, None))
+    return runs
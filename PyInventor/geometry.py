@@ -0,0 +1,366 @@
+import numpy as np
+from functools import lru_cache
+from numpy import cos, sin, pi, sqrt
+
+'''
+
+Pure 2D geometry helpers used by structure and the part scripts. This module has no
+Windows, COM, Excel or SciPy import time dependencies so worker processes that only
+generate points can import it without pywin32:
+
+    from PyInventor.geometry import arc_pattern, circle_pattern, b_spline
+
+The *_xy functions are the ndarray kernel, they take and return (N,2) float arrays and
+do each transform as a single NumPy expression. The *_pts functions keep the original
+list-of-tuples API as thin adapters over the kernel (an ndarray input is returned as an
+ndarray), translate and scale stay plain comprehensions for list input since the array
+round trip costs more than the arithmetic. Chains of transforms can be composed into one
+affine matrix and applied in a single pass.
+
+b_spline evaluates a single Bezier curve with a cached Bernstein basis matrix, bspline
+evaluates a clamped uniform B-spline, which stays stable for long control polygons.
+
+'''
+
+def round_pt(pt, digits=5):
+    return (round(pt[0], digits), round(pt[1], digits))
+
+def round_pts(pts, digits=5):
+    if isinstance(pts, np.ndarray):
+        return np.round(pts, digits)
+    return [(round(pt[0], digits), round(pt[1], digits)) for pt in pts]
+
+        
+def remove_duplicate_pts(seq):
+    seen = set()
+    seen_add = seen.add
+    return [x for x in seq if not (x in seen or seen_add(x))]
+
+def distance(tuple1, tuple2):
+    dx = tuple1[0] - tuple2[0]
+    dy = tuple1[1] - tuple2[1]
+    return sqrt(dx ** 2 + dy ** 2)
+
+
+def ang2pt(direction, distance):
+    theta = np.pi * direction / 180
+    dx = distance * cos(theta)
+    dy = distance * sin(theta)
+    return (dx, dy)
+
+
+def vec_rot(vector, angle):
+    rot_matrix=np.array([[np.cos(angle),-np.sin(angle)],[np.sin(angle),np.cos(angle)]])
+    return np.dot(rot_matrix, vector)
+
+##############################################################################
+#ndarray kernel
+
+def as_xy(points):
+    """Returns points as an (N,2) float array, ndarrays are not copied"""
+    xy=np.asarray(points, dtype=float)
+    if xy.ndim!=2 or xy.shape[1]!=2:
+        xy=xy.reshape(-1, 2)
+    return xy
+
+def to_pts(xy):
+    """(N,2) array to a list of (x,y) tuples of Python floats"""
+    return list(map(tuple, np.asarray(xy).tolist()))
+
+def _adapt(points, xy):
+    #ndarray in, ndarray out, otherwise the list of tuples API
+    if isinstance(points, np.ndarray):
+        return xy
+    return to_pts(xy)
+
+def rotate_xy(xy, angle, center=(0, 0)):
+    theta=np.pi*angle/180.
+    c, s=cos(theta), sin(theta)
+    d=xy-center
+    return np.column_stack((center[0]+d[:, 0]*c-d[:, 1]*s, center[1]+d[:, 0]*s+d[:, 1]*c))
+
+def translate_xy(xy, offset):
+    return xy+np.asarray(offset, dtype=float)
+
+def orient_xy(xy, angle, offset):
+    return translate_xy(rotate_xy(xy, angle), offset)
+
+def scale_xy(xy, scale):
+    return xy*np.asarray(scale, dtype=float)
+
+def mirror_xy(xy, axis_angle, axis_pt):
+    theta=axis_angle*np.pi/180.
+    c_2, s_2, c_sq=cos(2*theta), sin(2*theta), cos(theta)**2
+    dx=xy[:, 0]-axis_pt[0]
+    dy=xy[:, 1]-axis_pt[1]
+    return np.column_stack((axis_pt[0]+dx*c_2+dy*s_2, xy[:, 1]+2*(axis_pt[1]-xy[:, 1])*c_sq+dx*s_2))
+
+def arc_xy(start_angle, stop_angle, radius, center_pt=(0, 0), segments=9):
+    ii=np.arange(segments)
+    theta=(start_angle+ii/(segments-1.)*(stop_angle-start_angle))*pi/180.
+    return np.column_stack((center_pt[0]+radius*cos(theta), center_pt[1]+radius*sin(theta)))
+
+def circle_xy(radius, center_pt=(0, 0), segments=3, offset=0):
+    theta=offset*np.pi/180+np.arange(segments)*(360/segments*pi/180.)
+    return np.column_stack((center_pt[0]+radius*cos(theta), center_pt[1]+radius*sin(theta)))
+
+def arc_pts_xy(start, end, center, num_pts, dir=None):
+    """num_pts points on the arc about center from start to end (short way unless collinear)"""
+    D_12=distance(center, start)
+    D_13=distance(center, end)
+    D_23=distance(start, end)
+    ang=np.arccos((D_12**2+D_13**2-D_23**2)/(2*D_12*D_13))
+    start_dir=((start[0]-center[0])/D_12, (start[1]-center[1])/D_12)
+    end_dir=((end[0]-center[0])/D_13, (end[1]-center[1])/D_13)
+    dir_check=np.sign(start_dir[0]*end_dir[1]-start_dir[1]*end_dir[0])
+    if dir_check==0 and type(dir)!=type(None):
+        dir=dir
+    elif dir_check==0 and type(dir)==type(None):
+        dir=1
+    else:
+        dir=dir_check
+    angs=dir*np.arange(num_pts)*(ang/(num_pts-1))
+    c, s=cos(angs), sin(angs)
+    return np.column_stack((center[0]+D_12*(c*start_dir[0]-s*start_dir[1]), center[1]+D_12*(s*start_dir[0]+c*start_dir[1])))
+
+class affine(object):
+    def __init__(self, matrix=None):
+        '''
+        2D affine transform as a 3x3 homogeneous matrix. The rotate, mirror, scale and
+        translate methods return a new transform with the step composed after this one,
+        so a chain is applied to a point buffer in a single multiply:
+
+            xform=affine().rotate(30, p0).mirror(0, p0).translate(offset)
+            xy=xform.apply(xy)
+        '''
+        self.matrix=np.identity(3) if matrix is None else np.array(matrix, dtype=float)
+
+    def __repr__(self):
+        return 'affine(%s)'%np.array2string(self.matrix, separator=', ').replace('\n', '')
+
+    def then(self, other):
+        '''
+        Returns the transform that applies self and then other
+        '''
+        return affine(np.dot(other.matrix, self.matrix))
+
+    def _about(self, linear, center):
+        #linear map about center: x'=A(x-c)+c
+        mat=np.identity(3)
+        mat[:2, :2]=linear
+        mat[:2, 2]=np.asarray(center, dtype=float)-np.dot(linear, center)
+        return self.then(affine(mat))
+
+    def rotate(self, angle, center=(0, 0)):
+        theta=np.pi*angle/180.
+        return self._about([[cos(theta), -sin(theta)], [sin(theta), cos(theta)]], center)
+
+    def mirror(self, axis_angle, axis_pt=(0, 0)):
+        theta=axis_angle*np.pi/180.
+        return self._about([[cos(2*theta), sin(2*theta)], [sin(2*theta), -cos(2*theta)]], axis_pt)
+
+    def scale(self, scale, center=(0, 0)):
+        return self._about([[scale[0], 0], [0, scale[1]]], center)
+
+    def translate(self, offset):
+        mat=np.identity(3)
+        mat[:2, 2]=offset
+        return self.then(affine(mat))
+
+    def is_identity(self):
+        return np.array_equal(self.matrix, np.identity(3))
+
+    def apply(self, xy):
+        '''
+        Applies the transform to an (N,2) array, returns a new array
+        '''
+        xy=as_xy(xy)
+        return np.dot(xy, self.matrix[:2, :2].T)+self.matrix[:2, 2]
+
+    def apply_pt(self, pt):
+        mat=self.matrix
+        return (float(mat[0, 0]*pt[0]+mat[0, 1]*pt[1]+mat[0, 2]), float(mat[1, 0]*pt[0]+mat[1, 1]*pt[1]+mat[1, 2]))
+
+
+##############################################################################
+
+def arc_pts_pattern(start, end, center, num_pts, return_list=True, dir=None):
+    pts=arc_pts_xy(start, end, center, num_pts, dir)
+    if return_list==False:
+        return np.transpose(pts)
+    else:
+        return to_pts(pts)
+
+def mirror_x(pts, xline, concatenate=True):
+    if concatenate==True:
+        pts_x=np.concatenate((pts[0], xline-pts[0][::-1]))
+        pts_y=np.concatenate((pts[1], pts[1][::-1]))
+        return np.array([pts_x, pts_y])
+    else:
+        return np.array([xline-pts[0], pts[1]])
+
+def rotate_pt(p, angle, center=(0, 0)):
+    """rotates point p=(x,y) about point center (defaults to (0,0)) by CCW angle (in degrees)"""
+    dx = p[0] - center[0]
+    dy = p[1] - center[1]
+    theta = np.pi * angle / 180.
+    return (center[0] + dx * cos(theta) - dy * sin(theta), center[1] + dx * sin(theta) + dy * cos(theta))
+
+
+def rotate_pts(points, angle, center=(0, 0)):
+    """Rotates an array of points about center by CCW angle (in degrees)"""
+    return _adapt(points, rotate_xy(as_xy(points), angle, center))
+
+
+def translate_pt(p, offset):
+    """Translates point p=(x,y) by offset=(x,y)"""
+    return (p[0] + offset[0], p[1] + offset[1])
+
+
+def translate_pts(points, offset):
+    """Translates an array of points by offset=(x,y)"""
+    if isinstance(points, np.ndarray):
+        return translate_xy(points, offset)
+    #cheaper than the round trip through an array for list input
+    return [(p[0] + offset[0], p[1] + offset[1]) for p in points]
+
+
+def orient_pt(p, angle, offset):
+    """Orient_pt rotates point p=(x,y) by angle (in degrees) and then translates it to offset=(x,y)"""
+    return translate_pt(rotate_pt(p, angle), offset)
+
+
+def orient_pts(points, angle, offset):
+    """Rotates an array of points by angle (in degrees) about the origin and translates them by offset"""
+    return _adapt(points, orient_xy(as_xy(points), angle, offset))
+
+
+def scale_pt(p, scale):
+    """Scales p=(x,y) by scale"""
+    return (p[0] * scale[0], p[1] * scale[1])
+
+
+def scale_pts(points, scale):
+    """Scales an array of points by scale=(sx,sy)"""
+    if isinstance(points, np.ndarray):
+        return scale_xy(points, scale)
+    return [(p[0] * scale[0], p[1] * scale[1]) for p in points]
+
+
+def mirror_pt(p, axis_angle, axis_pt):
+    """Mirrors point p about a line at angle "axis_angle" intercepting point "axis_pt" """
+    theta = axis_angle * np.pi / 180.
+    return (axis_pt[0] + (-axis_pt[0] + p[0]) * cos(2 * theta) + (-axis_pt[1] + p[1]) * sin(2 * theta),
+            p[1] + 2 * (axis_pt[1] - p[1]) * cos(theta) ** 2 + (-axis_pt[0] + p[0]) * sin(2 * theta) )
+
+
+def mirror_pts(points, axis_angle, axis_pt):
+    """Mirrors an array of points about a line at angle "axis_angle" intercepting point "axis_pt" """
+    return _adapt(points, mirror_xy(as_xy(points), axis_angle, axis_pt))
+
+def _check_center(center_pt):
+    if type(center_pt)==tuple or type(center_pt)==list:
+        if len(center_pt)==2:
+            pass
+        else:
+            raise Exception('ERROR: Center_pt must be list of len=2 of form [x,y]')
+    else:
+        raise Exception('ERROR: Invalid type, centerpoint must be list len=2 of form [x,y]')
+
+def arc_pattern(start_angle, stop_angle, radius, center_pt=(2,1), segments=9):
+    _check_center(center_pt)
+    return to_pts(arc_xy(start_angle, stop_angle, radius, center_pt, segments))
+
+
+def circle_pattern(radius, center_pt=(0,0), segments=3, offset=0):
+    _check_center(center_pt)
+    return to_pts(circle_xy(radius, center_pt, segments, offset))
+
+def bernstein_poly(order, k):
+    """
+    Bernstein polynomial.
+
+    """
+    from scipy.special import binom
+    coeff = binom(order, k)
+    def _bpoly(x):
+        return coeff * x ** k * (1 - x) ** (order - k)
+
+    return _bpoly
+
+
+def _binom_row(order):
+    #binomial coefficients (order choose k), k=0..order
+    row=[1]
+    for k in range(order):
+        row.append(row[-1]*(order-k)//(k+1))
+    return row
+
+@lru_cache(maxsize=128)
+def bernstein_basis(num, degree, n_ctrl):
+    '''
+    (num, n_ctrl) matrix of degree Bernstein polynomials at num points in [0, 1], columns
+    past degree are zero. Cached and read-only, b_spline is basis @ control points.
+    '''
+    t=np.linspace(0, 1, num=num)[:, None]
+    k=np.arange(n_ctrl)
+    coeff=np.zeros(n_ctrl)
+    n_used=min(degree+1, n_ctrl)
+    coeff[:n_used]=_binom_row(degree)[:n_used]
+    basis=coeff*t**k*(1-t)**np.maximum(degree-k, 0)
+    basis.setflags(write=False)
+    return basis
+
+def b_spline_xy(c_points, num=200, degree=3):
+    '''
+    Bezier curve from control points as a (num,2) array. As in b_spline, only the first
+    degree+1 control points contribute when degree<len(c_points)-1.
+    '''
+    c_points=as_xy(c_points)
+    N=len(c_points)
+    degree=int(np.clip(degree, 1, N-1))
+    return np.dot(bernstein_basis(num, degree, N), c_points)
+
+def b_spline(c_points, num=200, degree=3):
+    """
+    Build Bézier curve from control points.
+
+    """
+    return to_pts(b_spline_xy(c_points, num, degree))
+
+
+def clamped_knots(n_ctrl, degree):
+    '''
+    Clamped uniform knot vector on [0, 1] for n_ctrl control points
+    '''
+    n_inner=n_ctrl-degree-1
+    inner=np.arange(1, n_inner+1)/float(n_inner+1)
+    return np.concatenate((np.zeros(degree+1), inner, np.ones(degree+1)))
+
+def bspline_xy(c_points, num=200, degree=3):
+    '''
+    Clamped uniform B-spline through the end control points, as a (num,2) array. All
+    parameter values are evaluated together with de Boor's algorithm, so the cost is
+    O(num*degree**2) however long the control polygon is.
+    '''
+    c_points=as_xy(c_points)
+    N=len(c_points)
+    if N<2:
+        raise Exception('ERROR: B-spline needs at least 2 control points')
+    p=int(np.clip(degree, 1, N-1))
+    knots=clamped_knots(N, p)
+    t=np.linspace(0, 1, num=num)
+    span=np.clip(np.searchsorted(knots, t, side='right')-1, p, N-1)
+    d=c_points[span[:, None]+np.arange(-p, 1)]
+    for r in range(1, p+1):
+        for j in range(p, r-1, -1):
+            i=span-p+j
+            alpha=((t-knots[i])/(knots[i+p-r+1]-knots[i]))[:, None]
+            d[:, j]=(1-alpha)*d[:, j-1]+alpha*d[:, j]
+    return d[:, p]
+
+def bspline(c_points, num=200, degree=3):
+    '''
+    Clamped uniform B-spline from control points as a list of (x,y), see bspline_xy
+    '''
+    return to_pts(bspline_xy(c_points, num, degree))
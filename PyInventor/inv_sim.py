@@ -0,0 +1,1131 @@
+import os
+import time
+import json
+from types import MethodType
+from collections import Counter
+
+'''
+
+Simulated Inventor backend for PyInventor. This is a pure-Python stand-in for the
+Inventor COM object model that com_obj can be built on, so that iPart and structure
+scripts can run, be profiled, and be load tested on machines without Inventor.
+
+Only the parts of the object model that pyinvent drives are modelled: Documents,
+PartDocument, ComponentDefinition, Sketches, SketchPoints/Lines/Arcs/Circles/Splines,
+Profiles, TransientGeometry, TransientObjects/ObjectCollection, work features and the
+feature collections. No solid modelling happens, but entities keep their coordinates
+so end points and sketch point geometry can be read back like in Inventor.
+
+Every property get/put and method invocation on a public (CamelCase) member of a
+simulated object counts as one COM round trip on the backend and optionally sleeps for
+a fixed per-call latency. Model side work is counted in backend.events: a recompute
+per feature created, rebuild/update per document call and a viewport redraw after
+each of those while Application.ScreenUpdating is on (optionally costing redraw_latency),
+and a sketch solve after every sketch edit unless the sketch's DeferUpdates is set (with
+solve_work counting the entities solved, optionally costing solve_latency per entity).
+
+Usage:
+    from PyInventor import inv_sim
+    backend=inv_sim.sim_backend(latency=50e-6)
+    part=iPart(path, 'demo.ipt', backend=backend)
+    ...
+    print(backend.call_count, backend.calls.most_common(10))
+
+'''
+
+class _inv_constants(object):
+    '''
+    Inventor enum values used by pyinvent. The simulator only relies on the values
+    being distinct, they are kept equal to the Inventor type library where known.
+    '''
+    #DocumentTypeEnum
+    kPartDocumentObject=12290
+    #UnitsTypeEnum
+    kRadianAngleUnits=10242
+    kDegreeAngleUnits=10248
+    kMillimeterLengthUnits=11269
+    kInchLengthUnits=11272
+    kUnitlessUnits=11522
+    #SelectionFilterEnum
+    kAllPointEntities=15876
+    kAllLinearEntities=15874
+    kAllCircularEntities=15875
+    kSketchObjectFilter=15881
+    kWorkPlaneFilter=15940
+    kPartFacePlanarFilter=15891
+    #PartFeatureOperationEnum
+    kJoinOperation=20481
+    kCutOperation=20482
+    kIntersectOperation=20483
+    kSurfaceOperation=20484
+    kNewBodyOperation=20485
+    #PartFeatureExtentDirectionEnum
+    kPositiveExtentDirection=20993
+    kNegativeExtentDirection=20994
+    kSymmetricExtentDirection=20995
+    #PatternSpacingTypeEnum
+    kDefault=45569
+    kFitted=45570
+    #PatternComputeTypeEnum
+    kIdenticalCompute=47361
+    kAdjustToModelCompute=47362
+    kOptimizedCompute=47363
+    #IOMechanismEnum
+    kFileBrowseIOMechanism=13059
+    #MediumTypeEnum
+    kFileNameMedium=56577
+
+constants=_inv_constants()
+
+
+class sim_backend(object):
+    def __init__(self, latency=0.0, redraw_latency=0.0, solve_latency=0.0, translate_latency=0.0):
+        '''
+        Simulated Inventor backend for com_obj. All com_obj instances built on the same
+        backend share one application, like GetActiveObject on a real machine.
+
+        latency: seconds to wait on every simulated COM round trip
+        redraw_latency: seconds to wait on every viewport redraw
+        solve_latency: seconds per sketch entity to wait on every sketch solve
+        translate_latency: seconds to wait on every translator add-in export
+        '''
+        self.latency=latency
+        self.redraw_latency=redraw_latency
+        self.solve_latency=solve_latency
+        self.translate_latency=translate_latency
+        self.calls=Counter()
+        self.call_count=0
+        self.events=Counter()
+        self.constants=constants
+        self.app=Application(self)
+        self.typelib_module=_sim_typelib(self)
+
+    def connect(self):
+        return self.app
+
+    def typelib(self):
+        return self.typelib_module
+
+    def quit(self):
+        self.app.Quit()
+
+    def reset_calls(self):
+        self.calls=Counter()
+        self.call_count=0
+        self.events=Counter()
+
+    def _model_event(self, kind):
+        self.events[kind]+=1
+        if object.__getattribute__(self.app, 'ScreenUpdating'):
+            self.events['redraw']+=1
+            if self.redraw_latency>0:
+                self._wait(self.redraw_latency)
+
+    def _com_call(self, obj_type, member):
+        self.calls[obj_type+'.'+member]+=1
+        self.call_count+=1
+        if self.latency>0:
+            self._wait(self.latency)
+
+    def _wait(self, latency):
+        #sleep is too coarse for the sub-millisecond latencies of out of process COM
+        if latency>=1e-3:
+            time.sleep(latency)
+        else:
+            stop=time.perf_counter()+latency
+            while time.perf_counter()<stop:
+                pass
+
+
+class _sim_typelib(object):
+    '''
+    Stand-in for the gencache typelib module, casts are QueryInterface calls
+    '''
+    def __init__(self, backend):
+        self._backend=backend
+
+    def Application(self, obj):
+        self._backend._com_call('Typelib', 'Application')
+        return obj
+
+    def PartDocument(self, obj):
+        self._backend._com_call('Typelib', 'PartDocument')
+        return obj
+
+
+def _com_method(backend, obj_type, name, method):
+    def invoke(*args, **kwargs):
+        backend._com_call(obj_type, name)
+        return method(*args, **kwargs)
+    return invoke
+
+
+class _inv_object(object):
+    '''
+    Base for simulated Inventor objects. Property access and method calls on public
+    members are counted as COM round trips, internal state lives in underscore attributes.
+    '''
+    def __init__(self, backend):
+        object.__setattr__(self, '_backend', backend)
+
+    def __getattribute__(self, name):
+        val=object.__getattribute__(self, name)
+        if name[0]!='_':
+            backend=object.__getattribute__(self, '_backend')
+            if type(val)==MethodType:
+                #methods are a round trip per invocation, like dispatch Invoke
+                return _com_method(backend, type(self).__name__, name, val)
+            backend._com_call(type(self).__name__, name)
+        return val
+
+    def __setattr__(self, name, value):
+        if name[0]!='_':
+            self._backend._com_call(type(self).__name__, name)
+        object.__setattr__(self, name, value)
+
+    def __repr__(self):
+        #matches the repr of gencache wrapped objects so iPart.object_check works
+        return '<PyInventor.inv_sim.Autodesk Inventor Object Library.%s instance at 0x%x>'%(type(self).__name__, id(self))
+
+    def _set(self, **members):
+        for key, val in members.items():
+            object.__setattr__(self, key, val)
+
+
+class _inv_collection(_inv_object):
+    def __init__(self, backend, items=None):
+        super(_inv_collection, self).__init__(backend)
+        self._items=[] if items is None else list(items)
+
+    @property
+    def Count(self):
+        return len(self._items)
+
+    def Item(self, index):
+        if type(index)==str:
+            for item in self._items:
+                if object.__getattribute__(item, '_name')==index:
+                    return item
+            raise Exception('ERROR: No item named %s'%index)
+        try:
+            return self._items[index-1]
+        except IndexError:
+            raise Exception('ERROR: Collection index %s out of range'%str(index))
+
+    def _add(self, item):
+        self._items.append(item)
+        return item
+
+
+class ObjectCollection(_inv_collection):
+    def Add(self, obj):
+        self._items.append(obj)
+
+    def Remove(self, index):
+        del self._items[index-1]
+
+    def Clear(self):
+        self._items=[]
+
+
+class SketchEntitiesEnumerator(_inv_collection):
+    pass
+
+
+#Transient objects and geometry
+
+class Point2d(_inv_object):
+    def __init__(self, backend, x, y):
+        super(Point2d, self).__init__(backend)
+        self._set(X=float(x), Y=float(y))
+
+class Point(_inv_object):
+    def __init__(self, backend, x, y, z):
+        super(Point, self).__init__(backend)
+        self._set(X=float(x), Y=float(y), Z=float(z))
+
+class TransientGeometry(_inv_object):
+    def CreatePoint2d(self, XCoord=0.0, YCoord=0.0):
+        return Point2d(self._backend, XCoord, YCoord)
+
+    def CreatePoint(self, XCoord=0.0, YCoord=0.0, ZCoord=0.0):
+        return Point(self._backend, XCoord, YCoord, ZCoord)
+
+class TransientObjects(_inv_object):
+    def CreateObjectCollection(self, Collection=None):
+        return ObjectCollection(self._backend)
+
+    def CreateNameValueMap(self):
+        return NameValueMap(self._backend)
+
+    def CreateTranslationContext(self):
+        return TranslationContext(self._backend)
+
+    def CreateDataMedium(self):
+        return DataMedium(self._backend)
+
+class NameValueMap(_inv_object):
+    def __init__(self, backend):
+        super(NameValueMap, self).__init__(backend)
+        self._values={}
+
+    @property
+    def Count(self):
+        return len(self._values)
+
+    def Name(self, Index):
+        return list(self._values)[Index-1]
+
+    def Value(self, Name):
+        return self._values[Name]
+
+    def SetValue(self, Name, Value):
+        if Name not in self._values:
+            raise Exception('ERROR: No value named %s'%Name)
+        self._values[Name]=Value
+
+    def Add(self, Name, Value):
+        self._values[Name]=Value
+
+class TranslationContext(_inv_object):
+    def __init__(self, backend):
+        super(TranslationContext, self).__init__(backend)
+        self._set(Type=None)
+
+class DataMedium(_inv_object):
+    def __init__(self, backend):
+        super(DataMedium, self).__init__(backend)
+        self._set(FileName='', MediumType=constants.kFileNameMedium)
+
+
+#Sketch entities
+
+def _xy(pt):
+    #coordinates of a Point2d or SketchPoint without counting round trips
+    if isinstance(pt, SketchPoint):
+        pt=object.__getattribute__(pt, '_geometry')
+    return (object.__getattribute__(pt, 'X'), object.__getattribute__(pt, 'Y'))
+
+class SketchPoint(_inv_object):
+    def __init__(self, backend, sketch, pt, hole_center=False):
+        super(SketchPoint, self).__init__(backend)
+        x, y=_xy(pt)
+        self._geometry=Point2d(backend, x, y)
+        self._sketch=sketch
+        self._merged=[]
+        self._set(HoleCenter=hole_center)
+
+    @property
+    def Geometry(self):
+        return self._geometry
+
+    def Merge(self, SketchPoint):
+        self._merged.append(SketchPoint)
+        self._sketch._changed()
+
+class _sketch_entity(_inv_object):
+    def __init__(self, backend, sketch):
+        super(_sketch_entity, self).__init__(backend)
+        self._sketch=sketch
+        self._set(Construction=False)
+        sketch._add_entity(self)
+
+    def Delete(self):
+        self._sketch._entities.remove(self)
+
+class SketchLine(_sketch_entity):
+    def __init__(self, backend, sketch, start, end):
+        super(SketchLine, self).__init__(backend, sketch)
+        self._start=sketch._sketch_point(start)
+        self._end=sketch._sketch_point(end)
+
+    @property
+    def StartSketchPoint(self):
+        return self._start
+
+    @property
+    def EndSketchPoint(self):
+        return self._end
+
+class SketchArc(_sketch_entity):
+    def __init__(self, backend, sketch, center, start, end):
+        super(SketchArc, self).__init__(backend, sketch)
+        self._center=sketch._sketch_point(center)
+        self._start=sketch._sketch_point(start)
+        self._end=sketch._sketch_point(end)
+
+    @property
+    def CenterSketchPoint(self):
+        return self._center
+
+    @property
+    def StartSketchPoint(self):
+        return self._start
+
+    @property
+    def EndSketchPoint(self):
+        return self._end
+
+class SketchCircle(_sketch_entity):
+    def __init__(self, backend, sketch, center, radius):
+        super(SketchCircle, self).__init__(backend, sketch)
+        self._center=sketch._sketch_point(center)
+        self._set(Radius=radius)
+
+    @property
+    def CenterSketchPoint(self):
+        return self._center
+
+class SketchSpline(_sketch_entity):
+    def __init__(self, backend, sketch, fit_points):
+        super(SketchSpline, self).__init__(backend, sketch)
+        self._fit_points=[sketch._sketch_point(pt) for pt in fit_points]
+
+    @property
+    def StartSketchPoint(self):
+        return self._fit_points[0]
+
+    @property
+    def EndSketchPoint(self):
+        return self._fit_points[-1]
+
+class SketchPoints(_inv_collection):
+    def __init__(self, backend, sketch):
+        super(SketchPoints, self).__init__(backend, None)
+        self._sketch=sketch
+        self._items=sketch._points
+
+    def Add(self, Point, HoleCenter=False):
+        point=self._add(SketchPoint(self._backend, self._sketch, Point, HoleCenter))
+        self._sketch._changed()
+        return point
+
+class SketchLines(_inv_object):
+    def __init__(self, backend, sketch):
+        super(SketchLines, self).__init__(backend)
+        self._sketch=sketch
+
+    def AddByTwoPoints(self, StartPoint, EndPoint):
+        line=SketchLine(self._backend, self._sketch, StartPoint, EndPoint)
+        self._sketch._changed()
+        return line
+
+    def AddAsTwoPointRectangle(self, PointOne, PointTwo):
+        (x0, y0), (x1, y1)=_xy(PointOne), _xy(PointTwo)
+        return self._rectangle(x0, y0, x1, y1)
+
+    def AddAsTwoPointCenteredRectangle(self, CenterPoint, CornerPoint):
+        (xc, yc), (x1, y1)=_xy(CenterPoint), _xy(CornerPoint)
+        return self._rectangle(2*xc-x1, 2*yc-y1, x1, y1)
+
+    def _rectangle(self, x0, y0, x1, y1):
+        backend=self._backend
+        corners=[Point2d(backend, x, y) for x, y in ((x0, y0), (x1, y0), (x1, y1), (x0, y1))]
+        lines=[]
+        start=corners[0]
+        for corner in corners[1:]+corners[:1]:
+            lines.append(SketchLine(backend, self._sketch, start, corner))
+            start=object.__getattribute__(lines[-1], '_end')
+        self._sketch._changed()
+        return SketchEntitiesEnumerator(backend, lines)
+
+class SketchArcs(_inv_object):
+    def __init__(self, backend, sketch):
+        super(SketchArcs, self).__init__(backend)
+        self._sketch=sketch
+
+    def AddByCenterStartEndPoint(self, CenterPoint, StartPoint, EndPoint, CounterClockwise=True):
+        #Inventor stores arcs counter clockwise, a clockwise arc swaps its end points
+        if CounterClockwise:
+            arc=SketchArc(self._backend, self._sketch, CenterPoint, StartPoint, EndPoint)
+        else:
+            arc=SketchArc(self._backend, self._sketch, CenterPoint, EndPoint, StartPoint)
+        self._sketch._changed()
+        return arc
+
+    def AddByCenterStartSweepAngle(self, CenterPoint, Radius, StartAngle, SweepAngle):
+        import math
+        xc, yc=_xy(CenterPoint)
+        start=Point2d(self._backend, xc+Radius*math.cos(StartAngle), yc+Radius*math.sin(StartAngle))
+        stop_ang=StartAngle+SweepAngle
+        end=Point2d(self._backend, xc+Radius*math.cos(stop_ang), yc+Radius*math.sin(stop_ang))
+        return self.AddByCenterStartEndPoint(CenterPoint, start, end, SweepAngle>=0)
+
+class SketchCircles(_inv_object):
+    def __init__(self, backend, sketch):
+        super(SketchCircles, self).__init__(backend)
+        self._sketch=sketch
+
+    def AddByCenterRadius(self, CenterPoint, Radius):
+        circle=SketchCircle(self._backend, self._sketch, CenterPoint, Radius)
+        self._sketch._changed()
+        return circle
+
+class SketchSplines(_inv_object):
+    def __init__(self, backend, sketch):
+        super(SketchSplines, self).__init__(backend)
+        self._sketch=sketch
+
+    def Add(self, FitPoints):
+        spline=SketchSpline(self._backend, self._sketch, object.__getattribute__(FitPoints, '_items'))
+        self._sketch._changed()
+        return spline
+
+class Profile(_inv_object):
+    def __init__(self, backend, sketch, entities):
+        super(Profile, self).__init__(backend)
+        self._sketch=sketch
+        self._entities=entities
+
+class Profiles(_inv_collection):
+    def __init__(self, backend, sketch):
+        super(Profiles, self).__init__(backend)
+        self._sketch=sketch
+
+    def AddForSolid(self, Combine=True, Entities=None):
+        if Entities is None:
+            entities=list(self._sketch._entities)
+        else:
+            entities=list(object.__getattribute__(Entities, '_items'))
+        if entities==[]:
+            raise Exception('ERROR: Sketch has no closed profile')
+        return self._add(Profile(self._backend, self._sketch, entities))
+
+class PlanarSketch(_inv_object):
+    def __init__(self, backend, plane):
+        super(PlanarSketch, self).__init__(backend)
+        self._plane=plane
+        self._entities=[]
+        self._points=[]
+        self._set(Visible=True, Name='Sketch', DeferUpdates=False)
+
+    def _add_entity(self, entity):
+        self._entities.append(entity)
+
+    def _changed(self):
+        #Inventor solves the whole sketch after each API edit unless updates are deferred,
+        #and runs constraint inference on the new geometry when it is enabled
+        backend=self._backend
+        options=object.__getattribute__(backend.app, 'SketchOptions')
+        if object.__getattribute__(options, 'ConstraintInference'):
+            backend.events['inference']+=1
+        if not object.__getattribute__(self, 'DeferUpdates'):
+            self._solve()
+
+    def _solve(self):
+        backend=self._backend
+        work=len(self._entities)+len(self._points)
+        backend.events['sketch_solve']+=1
+        backend.events['solve_work']+=work
+        if backend.solve_latency>0:
+            backend._wait(backend.solve_latency*work)
+
+    def Solve(self):
+        self._solve()
+
+    def _sketch_point(self, pt):
+        if isinstance(pt, SketchPoint):
+            return pt
+        sketch_pt=SketchPoint(self._backend, self, pt)
+        self._points.append(sketch_pt)
+        return sketch_pt
+
+    @property
+    def SketchPoints(self):
+        return SketchPoints(self._backend, self)
+
+    @property
+    def SketchLines(self):
+        return SketchLines(self._backend, self)
+
+    @property
+    def SketchArcs(self):
+        return SketchArcs(self._backend, self)
+
+    @property
+    def SketchCircles(self):
+        return SketchCircles(self._backend, self)
+
+    @property
+    def SketchSplines(self):
+        return SketchSplines(self._backend, self)
+
+    @property
+    def Profiles(self):
+        return Profiles(self._backend, self)
+
+    def Edit(self):
+        pass
+
+    def ExitEdit(self):
+        pass
+
+    def Delete(self):
+        pass
+
+    def _slot(self, start, end, width):
+        backend=self._backend
+        (x0, y0), (x1, y1)=start, end
+        dx, dy=x1-x0, y1-y0
+        norm=(dx**2+dy**2)**.5
+        ox, oy=-dy/norm*width/2., dx/norm*width/2.
+        p=lambda x, y: Point2d(backend, x, y)
+        entities=[SketchLine(backend, self, p(x0+ox, y0+oy), p(x1+ox, y1+oy)),
+                  SketchLine(backend, self, p(x0-ox, y0-oy), p(x1-ox, y1-oy)),
+                  SketchArc(backend, self, p(x0, y0), p(x0+ox, y0+oy), p(x0-ox, y0-oy)),
+                  SketchArc(backend, self, p(x1, y1), p(x1-ox, y1-oy), p(x1+ox, y1+oy))]
+        return SketchEntitiesEnumerator(backend, entities)
+
+    def AddStraightSlotByOverall(self, StartPoint, EndPoint, Width):
+        (x0, y0), (x1, y1)=_xy(StartPoint), _xy(EndPoint)
+        norm=((x1-x0)**2+(y1-y0)**2)**.5
+        ux, uy=(x1-x0)/norm*Width/2., (y1-y0)/norm*Width/2.
+        return self._slot((x0+ux, y0+uy), (x1-ux, y1-uy), Width)
+
+    def AddStraightSlotByCenterToCenter(self, StartCenter, EndCenter, Width):
+        return self._slot(_xy(StartCenter), _xy(EndCenter), Width)
+
+    def AddStraightSlotBySlotCenter(self, SlotCenter, EndCenter, Width):
+        (xc, yc), (x1, y1)=_xy(SlotCenter), _xy(EndCenter)
+        return self._slot((2*xc-x1, 2*yc-y1), (x1, y1), Width)
+
+class PlanarSketches(_inv_collection):
+    def Add(self, PlanarEntity, UseFaceEdges=False):
+        return self._add(PlanarSketch(self._backend, PlanarEntity))
+
+
+#Work features
+
+class WorkPlane(_inv_object):
+    def __init__(self, backend, name, offset=0.0):
+        super(WorkPlane, self).__init__(backend)
+        self._name=name
+        self._set(Name=name, Offset=offset, Visible=True)
+
+class WorkAxis(_inv_object):
+    def __init__(self, backend, name):
+        super(WorkAxis, self).__init__(backend)
+        self._name=name
+        self._set(Name=name)
+
+class WorkPoint(_inv_object):
+    def __init__(self, backend, name, pt):
+        super(WorkPoint, self).__init__(backend)
+        self._name=name
+        self._point=pt
+        self._set(Name=name)
+
+class WorkPlanes(_inv_collection):
+    def __init__(self, backend):
+        super(WorkPlanes, self).__init__(backend, [WorkPlane(backend, name) for name in ('YZ Plane', 'XZ Plane', 'XY Plane')])
+
+    def AddByPlaneAndOffset(self, Plane, Offset, Construction=False):
+        return self._add(WorkPlane(self._backend, 'Work Plane%s'%str(len(self._items)-2), Offset))
+
+class WorkAxes(_inv_collection):
+    def __init__(self, backend):
+        super(WorkAxes, self).__init__(backend, [WorkAxis(backend, name) for name in ('X Axis', 'Y Axis', 'Z Axis')])
+
+    def _new(self):
+        return self._add(WorkAxis(self._backend, 'Work Axis%s'%str(len(self._items)-2)))
+
+    def AddByTwoPoints(self, Point1, Point2, Construction=False):
+        return self._new()
+
+    def AddByLine(self, Line, Construction=False):
+        return self._new()
+
+class WorkPoints(_inv_collection):
+    def __init__(self, backend):
+        super(WorkPoints, self).__init__(backend, [WorkPoint(backend, 'Center Point', None)])
+
+    def AddByPoint(self, Point, Construction=False):
+        return self._add(WorkPoint(self._backend, 'Work Point%s'%str(len(self._items)), Point))
+
+
+#Features
+
+#unit strings Inventor reports in Parameter.Units for the UnitsTypeEnum values
+UNIT_NAMES={constants.kInchLengthUnits: 'in', constants.kMillimeterLengthUnits: 'mm',
+            constants.kDegreeAngleUnits: 'deg', constants.kRadianAngleUnits: 'rad', constants.kUnitlessUnits: 'ul'}
+
+class ModelParameter(_inv_object):
+    def __init__(self, backend, name, value, units='in'):
+        super(ModelParameter, self).__init__(backend)
+        self._name=name
+        self._set(Name=name, Expression=str(value), Units=units)
+
+class UserParameter(ModelParameter):
+    pass
+
+class UserParameters(_inv_collection):
+    def AddByExpression(self, Name, Expression, UnitsSpecifier):
+        if any(object.__getattribute__(item, '_name')==Name for item in self._items):
+            raise Exception('ERROR: Parameter %s already exists'%Name)
+        return self._add(UserParameter(self._backend, Name, Expression, UNIT_NAMES.get(UnitsSpecifier, UnitsSpecifier)))
+
+    def AddByValue(self, Name, Value, UnitsSpecifier):
+        return self.AddByExpression(Name, Value, UnitsSpecifier)
+
+class Parameters(_inv_collection):
+    '''
+    Parameters of a feature, or of the part (given its features) holding the user
+    parameters and looking up model parameters of every feature by name
+    '''
+    def __init__(self, backend, items=None, features=None):
+        super(Parameters, self).__init__(backend, items)
+        self._features=features
+        if features!=None:
+            self._set(UserParameters=UserParameters(backend))
+
+    def _all(self):
+        if self._features==None:
+            return self._items
+        return object.__getattribute__(self, 'UserParameters')._items+self._features._parameters()
+
+    @property
+    def Count(self):
+        return len(self._all())
+
+    def Item(self, index):
+        return _inv_collection(self._backend, self._all()).Item(index)
+
+class DistanceExtent(_inv_object):
+    def __init__(self, backend, distance):
+        super(DistanceExtent, self).__init__(backend)
+        self._set(Distance=distance)
+
+class AngleExtent(_inv_object):
+    def __init__(self, backend, angle):
+        super(AngleExtent, self).__init__(backend)
+        self._set(Angle=angle)
+
+class _feature(_inv_object):
+    #units of the feature parameters in order, the last one repeats
+    _units=('in',)
+
+    def __init__(self, backend, name, params=()):
+        super(_feature, self).__init__(backend)
+        self._name=name
+        units=self._units+self._units[-1:]*len(params)
+        self._params=Parameters(backend, [ModelParameter(backend, '%s_d%s'%(name, str(I)), val, units[I]) for I, val in enumerate(params)])
+        self._set(Name=name, Suppressed=False)
+
+    @property
+    def Parameters(self):
+        return self._params
+
+    def SetEndOfPart(self, Before):
+        pass
+
+    def Delete(self, RetainConsumedSketches=False, RetainDependentFeaturesAndSketches=False, RetainDependentWorkFeatures=False):
+        pass
+
+class ExtrudeFeature(_feature):
+    @property
+    def Extent(self):
+        return DistanceExtent(self._backend, self._params._items[0])
+
+class RevolveFeature(_feature):
+    _units=('deg',)
+
+    @property
+    def Extent(self):
+        return AngleExtent(self._backend, self._params._items[0] if self._params._items else None)
+
+class HoleFeature(_feature):
+    @property
+    def HoleDiameter(self):
+        if len(self._params._items)<2:
+            raise Exception('ERROR: Tapped holes have no HoleDiameter')
+        return self._params._items[0]
+
+    @property
+    def Extent(self):
+        return DistanceExtent(self._backend, self._params._items[-1])
+
+class CircularPatternFeature(_feature):
+    _units=('ul', 'deg')
+
+    @property
+    def Definition(self):
+        definition=CircularPatternDefinition(self._backend)
+        definition._set(Count=self._params._items[0], Angle=self._params._items[1])
+        return definition
+
+class RectangularPatternFeature(_feature):
+    _units=('ul', 'in')
+
+    @property
+    def Definition(self):
+        definition=RectangularPatternDefinition(self._backend)
+        definition._set(XCount=self._params._items[0], XSpacing=self._params._items[1])
+        return definition
+
+class MirrorFeature(_feature):
+    pass
+
+class _definition(_inv_object):
+    def __init__(self, backend, *args):
+        super(_definition, self).__init__(backend)
+        self._args=args
+
+class ExtrudeDefinition(_definition):
+    def __init__(self, backend, *args):
+        super(ExtrudeDefinition, self).__init__(backend, *args)
+        self._distance=None
+
+    def SetDistanceExtent(self, Distance, Direction):
+        self._distance=Distance
+
+class CircularPatternDefinition(_definition):
+    pass
+
+class RectangularPatternDefinition(_definition):
+    pass
+
+class MirrorFeatureDefinition(_definition):
+    pass
+
+class PointHolePlacementDefinition(_definition):
+    pass
+
+class SketchHolePlacementDefinition(_definition):
+    pass
+
+class HoleTapInfo(_definition):
+    pass
+
+class _feature_collection(_inv_collection):
+    _prefix='Feature'
+    _type=None
+
+    def _new(self, params=()):
+        name='%s%s'%(self._prefix, str(len(self._items)+1))
+        self._backend._model_event('recompute')
+        return self._add(self._type(self._backend, name, params))
+
+class ExtrudeFeatures(_feature_collection):
+    _prefix='Extrusion'
+    _type=ExtrudeFeature
+
+    def CreateExtrudeDefinition(self, Profile, Operation):
+        return ExtrudeDefinition(self._backend, Profile, Operation)
+
+    def Add(self, Definition):
+        return self._new((object.__getattribute__(Definition, '_distance'),))
+
+class RevolveFeatures(_feature_collection):
+    _prefix='Revolution'
+    _type=RevolveFeature
+
+    def AddFull(self, Profile, AxisEntity, Operation):
+        return self._new()
+
+    def AddByAngle(self, Profile, AxisEntity, Angle, ExtentDirection, Operation):
+        return self._new((Angle,))
+
+class HoleFeatures(_feature_collection):
+    _prefix='Hole'
+    _type=HoleFeature
+
+    def CreatePointPlacementDefinition(self, Point, Plane):
+        return PointHolePlacementDefinition(self._backend, Point, Plane)
+
+    def CreateSketchPlacementDefinition(self, HoleCenterPoints, ConstructionEntity=None):
+        return SketchHolePlacementDefinition(self._backend, HoleCenterPoints)
+
+    def CreateTapInfo(self, RightHanded, ThreadType, ThreadDesignation, Class, FullTapDepth, ThreadDepth=None):
+        return HoleTapInfo(self._backend, RightHanded, ThreadType, ThreadDesignation, Class, FullTapDepth, ThreadDepth)
+
+    def AddDrilledByDistanceExtent(self, PlacementDefinition, HoleDiameter, Distance, ExtentDirection, FlatBottom=False, BottomTipAngle=None):
+        if isinstance(HoleDiameter, HoleTapInfo):
+            return self._new((Distance,))
+        return self._new((HoleDiameter, Distance))
+
+class CircularPatternFeatures(_feature_collection):
+    _prefix='Circular Pattern'
+    _type=CircularPatternFeature
+
+    def CreateDefinition(self, ParentFeatures, AxisEntity, NaturalAxisDirection, Count, Angle, FitWithinAngle=True):
+        return CircularPatternDefinition(self._backend, Count, Angle)
+
+    def AddByDefinition(self, Definition):
+        return self._new(object.__getattribute__(Definition, '_args'))
+
+class RectangularPatternFeatures(_feature_collection):
+    _prefix='Rectangular Pattern'
+    _type=RectangularPatternFeature
+
+    def CreateDefinition(self, ParentFeatures, XDirectionEntity, NaturalXDirection, XCount, XSpacing, XDirectionSpacingType=None):
+        return RectangularPatternDefinition(self._backend, XCount, XSpacing)
+
+    def AddByDefinition(self, Definition):
+        return self._new(object.__getattribute__(Definition, '_args'))
+
+class MirrorFeatures(_feature_collection):
+    _prefix='Mirror'
+    _type=MirrorFeature
+
+    def CreateDefinition(self, ParentFeatures, MirrorPlaneEntity, ComputeType=None):
+        return MirrorFeatureDefinition(self._backend, MirrorPlaneEntity)
+
+    def AddByDefinition(self, Definition):
+        return self._new()
+
+class PartFeatures(_inv_object):
+    def __init__(self, backend):
+        super(PartFeatures, self).__init__(backend)
+        self._set(ExtrudeFeatures=ExtrudeFeatures(backend),
+                  RevolveFeatures=RevolveFeatures(backend),
+                  HoleFeatures=HoleFeatures(backend),
+                  CircularPatternFeatures=CircularPatternFeatures(backend),
+                  RectangularPatternFeatures=RectangularPatternFeatures(backend),
+                  MirrorFeatures=MirrorFeatures(backend))
+
+    def _summary(self):
+        return dict((name, len(object.__getattribute__(self, name)._items)) for name in
+                    ('ExtrudeFeatures', 'RevolveFeatures', 'HoleFeatures', 'CircularPatternFeatures',
+                     'RectangularPatternFeatures', 'MirrorFeatures'))
+
+    def _parameters(self):
+        params=[]
+        for name in ('ExtrudeFeatures', 'RevolveFeatures', 'HoleFeatures', 'CircularPatternFeatures',
+                     'RectangularPatternFeatures', 'MirrorFeatures'):
+            for feature in object.__getattribute__(self, name)._items:
+                params.extend(feature._params._items)
+        return params
+
+class PartComponentDefinition(_inv_object):
+    def __init__(self, backend):
+        super(PartComponentDefinition, self).__init__(backend)
+        self._set(Sketches=PlanarSketches(backend),
+                  WorkPlanes=WorkPlanes(backend),
+                  WorkAxes=WorkAxes(backend),
+                  WorkPoints=WorkPoints(backend),
+                  Features=PartFeatures(backend))
+        self._set(Parameters=Parameters(backend, features=object.__getattribute__(self, 'Features')))
+
+
+#Documents and application
+
+class UnitsOfMeasure(_inv_object):
+    def __init__(self, backend):
+        super(UnitsOfMeasure, self).__init__(backend)
+        self._set(LengthUnits=constants.kInchLengthUnits, AngleUnits=constants.kDegreeAngleUnits)
+
+class SelectSet(_inv_collection):
+    def Clear(self):
+        self._items=[]
+
+    def Select(self, Entity):
+        self._items.append(Entity)
+
+class PartDocument(_inv_object):
+    def __init__(self, backend, app, full_name=''):
+        super(PartDocument, self).__init__(backend)
+        self._app=app
+        self._set(DocumentType=constants.kPartDocumentObject,
+                  FullFileName=full_name,
+                  ComponentDefinition=PartComponentDefinition(backend),
+                  UnitsOfMeasure=UnitsOfMeasure(backend),
+                  SelectSet=SelectSet(backend))
+        #an opened file keeps the summary it was saved with
+        self._opened=None
+        if full_name!='':
+            try:
+                with open(full_name) as f:
+                    self._opened=json.load(f)
+            except (OSError, ValueError):
+                pass
+
+    def _summary(self):
+        compdef=object.__getattribute__(self, 'ComponentDefinition')
+        sketches=object.__getattribute__(compdef, 'Sketches')._items
+        if self._opened!=None and sketches==[]:
+            return dict(self._opened)
+        return {'document': 'PartDocument',
+                'sketches': len(sketches),
+                'sketch_entities': sum(len(sketch._entities) for sketch in sketches),
+                'sketch_points': sum(len(sketch._points) for sketch in sketches),
+                'features': object.__getattribute__(compdef, 'Features')._summary()}
+
+    def _write(self, path):
+        with open(path, 'w') as f:
+            json.dump(self._summary(), f, sort_keys=True)
+
+    def Rebuild(self):
+        self._backend._model_event('rebuild')
+
+    def Update(self):
+        self._backend._model_event('update')
+
+    def Save(self):
+        path=object.__getattribute__(self, 'FullFileName')
+        if path=='':
+            raise Exception('ERROR: Document has never been saved')
+        self._write(path)
+
+    def SaveAs(self, FileName, SaveCopyAs):
+        self._write(FileName)
+        if not SaveCopyAs:
+            object.__setattr__(self, 'FullFileName', FileName)
+
+    def Close(self, SkipSave=False):
+        docs=self._app._documents
+        if self in docs._items:
+            docs._items.remove(self)
+
+class TranslatorAddIn(_inv_object):
+    #default SaveCopyAs options of the translators pyinvent uses, keyed by file extension
+    _defaults={'stl': {'Resolution': 1, 'OutputFileType': 0, 'ExportUnits': 4, 'SurfaceDeviation': 0.0,
+                       'NormalDeviation': 0.0, 'MaxEdgeLength': 0.0, 'AspectRatio': 0.0},
+               'stp': {'ApplicationProtocolType': 3, 'Author': '', 'Organization': '', 'Description': ''},
+               'igs': {'SolidFaceType': 0, 'SurfaceType': 0}}
+
+    def __init__(self, backend, client_id, ext):
+        super(TranslatorAddIn, self).__init__(backend)
+        self._ext=ext
+        self._set(ClientId=client_id, Activated=True)
+
+    def HasSaveCopyAsOptions(self, SourceObject, Context, Options):
+        for key, val in self._defaults.get(self._ext, {}).items():
+            Options.Add(key, val)
+        return True
+
+    def SaveCopyAs(self, SourceObject, Context, Options, TargetData):
+        backend=self._backend
+        if backend.translate_latency>0:
+            backend._wait(backend.translate_latency)
+        summary=SourceObject._summary()
+        summary['translator']=self._ext
+        summary['options']=dict(object.__getattribute__(Options, '_values'))
+        with open(object.__getattribute__(TargetData, 'FileName'), 'w') as f:
+            json.dump(summary, f, sort_keys=True)
+
+class ApplicationAddIns(_inv_collection):
+    #translator add-in client ids as in the Inventor registry
+    _translators={'{90AF7F40-0C01-11D5-8E83-0010B541CD80}': 'stp',
+                  '{533E9A98-FC3B-11D4-8E7E-0010B541CD80}': 'stl',
+                  '{90AF7F44-0C01-11D5-8E83-0010B541CD80}': 'igs'}
+
+    def ItemById(self, ClientId):
+        if ClientId not in self._translators:
+            raise Exception('ERROR: No add-in with id %s'%ClientId)
+        return TranslatorAddIn(self._backend, ClientId, self._translators[ClientId])
+
+class Transaction(_inv_object):
+    def __init__(self, backend, manager, document, name):
+        super(Transaction, self).__init__(backend)
+        self._manager=manager
+        self._set(DisplayName=name)
+
+    def End(self):
+        self._manager._close(self, 'ended')
+
+    def Abort(self):
+        #changes are not rolled back in the simulator
+        self._manager._close(self, 'aborted')
+
+class TransactionManager(_inv_object):
+    def __init__(self, backend):
+        super(TransactionManager, self).__init__(backend)
+        self._open=[]
+        self._log=[]
+
+    def StartTransaction(self, Document, DisplayName):
+        trans=Transaction(self._backend, self, Document, DisplayName)
+        self._open.append(trans)
+        return trans
+
+    def _close(self, trans, state):
+        if trans not in self._open:
+            raise Exception('ERROR: Transaction is not open')
+        self._open.remove(trans)
+        self._log.append((object.__getattribute__(trans, 'DisplayName'), state))
+
+class Documents(_inv_collection):
+    def __init__(self, backend, app):
+        super(Documents, self).__init__(backend)
+        self._app=app
+
+    def Add(self, DocumentType, TemplateFileName='', CreateVisible=True):
+        if DocumentType!=constants.kPartDocumentObject:
+            raise Exception('ERROR: Simulated Inventor only supports part documents')
+        return self._add(PartDocument(self._backend, self._app))
+
+    def Open(self, FullDocumentName, OpenVisible=True):
+        if not os.path.isfile(FullDocumentName):
+            raise Exception('ERROR: File not found %s'%FullDocumentName)
+        return self._add(PartDocument(self._backend, self._app, FullDocumentName))
+
+    def CloseAll(self, UnreferencedOnly=False):
+        self._items=[]
+
+class ControlDefinition(_inv_object):
+    def __init__(self, backend, name):
+        super(ControlDefinition, self).__init__(backend)
+        self._name=name
+
+    def Execute(self):
+        pass
+
+class ControlDefinitions(_inv_object):
+    def Item(self, Index):
+        return ControlDefinition(self._backend, Index)
+
+class CommandManager(_inv_object):
+    def __init__(self, backend):
+        super(CommandManager, self).__init__(backend)
+        self._set(ControlDefinitions=ControlDefinitions(backend))
+
+    def Pick(self, SelectionFilter, Prompt):
+        raise Exception('ERROR: Interactive selection is not available in simulated Inventor')
+
+class SketchOptions(_inv_object):
+    def __init__(self, backend):
+        super(SketchOptions, self).__init__(backend)
+        self._set(ConstraintInference=True, ConstraintPersistence=True)
+
+class View(_inv_object):
+    def __init__(self, backend):
+        super(View, self).__init__(backend)
+        self._set(DisplayMode=8710)
+
+    def Fit(self, Transition=True):
+        pass
+
+    def GoHome(self, Transition=True):
+        pass
+
+    def Update(self):
+        pass
+
+class Application(_inv_object):
+    def __init__(self, backend):
+        super(Application, self).__init__(backend)
+        self._documents=Documents(backend, self)
+        self._set(Visible=True,
+                  ScreenUpdating=True,
+                  UserInteractionDisabled=False,
+                  SilentOperation=False,
+                  TransientGeometry=TransientGeometry(backend),
+                  TransientObjects=TransientObjects(backend),
+                  CommandManager=CommandManager(backend),
+                  TransactionManager=TransactionManager(backend),
+                  SketchOptions=SketchOptions(backend),
+                  ApplicationAddIns=ApplicationAddIns(backend),
+                  ActiveView=View(backend))
+
+    @property
+    def Documents(self):
+        return self._documents
+
+    @property
+    def ActiveDocument(self):
+        if self._documents._items==[]:
+            return None
+        return self._documents._items[-1]
+
+    def Quit(self):
+        self._documents._items=[]
@@ -0,0 +1,565 @@
+import os
+import json
+import hashlib
+import inspect
+import functools
+import numpy as np
+from .export import export_job, export_targets
+
+'''
+
+Build journal for iPart and structure. While a build_journal is set on an inv_session
+(session.journal) every public build call made on the parts of the session, and on the
+structures drawn on them, is recorded as one entry: the method, its arguments bound by
+name and canonically encoded, and the part units. Objects handed out by recorded calls
+(parts, sketches, planes, features, collections) get ref numbers and are recorded by ref
+when passed back in, ObjectCollections by their items.
+
+    sess=inv_session()
+    sess.journal=build_journal()
+    part=sess.new_part(path, 'demo.ipt')
+    ...
+    key=sess.journal.key()       #sha256 of the build, None if it can't be keyed
+    sess.journal.dump('demo.journal')
+
+Calls made from inside a recorded call (poly_lines drawing through sketch_polyline, say)
+are not recorded themselves. File names given to the output calls (save, save_copy_as,
+export) and to iPart are kept out of the key, the same build saved under another name
+has the same key. A dry journal (build_journal(dry=True)) records the output calls
+without writing anything, build_cache uses one to key a build on the simulator before
+Inventor is driven.
+
+Journals are written as JSON lines, a version header and one call per line, and replay
+makes the calls again on any session: a fresh one, a sweep worker's Inventor instance
+(replay_build is a sweep build function taking journal files as params) or the
+simulator. Build plans can so be made on machines without Inventor:
+
+    record_build(build, params).dump('plan_%d.journal'%n)      #on the simulator
+    replay('plan_0.journal', inv_session())                      #where Inventor runs
+
+A build can't be keyed (key() is None and opaque says why) when it passes objects that
+did not come from a recorded call, uses the interactive pick calls, opens an existing
+part file, or, on the simulator, makes COM calls of its own between recorded calls
+(other than adding to ObjectCollections and view and sketch visibility changes, the COM
+calls made by unrecorded library methods such as set_visual_style are not the script's).
+Such journals still replay as far as their arguments can be decoded.
+
+Arguments are recorded as given along with the part units, not converted to Inventor's
+internal units: the journal can't tell a length from an angle, count or ratio argument,
+so the same geometry built in other units keys differently (a cache miss, never a wrong
+hit).
+
+'''
+
+JOURNAL_VERSION=1
+
+#public iPart and structure methods that don't change the part
+UNJOURNALED=('f_check', 'SP_check', 'API_type', 'object_check', 'copy_file_ext_types', 'unit_conv',
+             'inv_unit_conv', 'ang_conv', 'thread_gen', 'sketch_test', 'point', 'unit_scale', 'xy_array',
+             'bulk_sketch', 'batch', 'overwrite_file', 'new_part', 'close_all_parts', 'set_visual_style',
+             'obj_type_check', 'get_pts', 'get_line_pts', 'get_poly_pts', 'get_plt_pts', 'validate')
+
+#COM members that only change the display, the script may use them between recorded calls
+VIEW_MEMBERS=('ObjectCollection.', 'View.', 'Camera.', 'PlanarSketch.Visible')
+
+PICK_CALLS=('pick', 'pick_point', 'pick_plane', 'pick_sketch', 'pick_line', 'pick_circle', 'pick_face')
+
+OUTPUT_CALLS=('save', 'save_copy_as', 'export', 'close')
+
+#arguments that only name files, kept out of the key
+IO_ARGS={'iPart': ('path', 'prefix', 'overwrite'),
+         'save': ('file_path', 'file_name'),
+         'save_copy_as': ('copy_name', 'file_path'),
+         'export': ('file_path', 'file_name', 'exports')}
+
+_signatures={}
+
+def _signature(cls, name):
+    try:
+        return _signatures[(cls, name)]
+    except KeyError:
+        sig=inspect.signature(getattr(cls, name))
+        #drop self, calls are bound to a part
+        sig=sig.replace(parameters=list(sig.parameters.values())[1:])
+        _signatures[(cls, name)]=sig
+        return sig
+
+def journaled_methods(cls):
+    '''
+    Names of the public methods of cls that a journal records
+    '''
+    return [name for name in dir(cls) if not name.startswith('_') and name not in UNJOURNALED
+            and inspect.isfunction(getattr(cls, name))]
+
+
+class build_journal(object):
+    def __init__(self, dry=False):
+        '''
+        Journal of the build calls of the parts of one session, see module docs. dry
+        records the output calls without saving or exporting.
+        '''
+        self.dry=dry
+        self.entries=[]
+        #reason the build can't be keyed, None if it can
+        self.opaque=None
+        #(name, result) of each output call, in order
+        self.outputs=[]
+        self._refs={}
+        self._objs=[]
+        #item count of each ObjectCollection ref when last recorded
+        self._counts={}
+        self._depth=0
+        self._backend=None
+        self._calls=None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _set_opaque(self, reason):
+        if self.opaque==None:
+            self.opaque=reason
+
+    def check_source(self, path, prefix, overwrite):
+        '''
+        Called by iPart before it opens its document, a part opened from an existing file
+        can't be keyed
+        '''
+        self._check_calls()
+        if prefix!='' and overwrite!=True and os.path.isfile(os.path.join(path, prefix)):
+            self._set_opaque('part opened from existing file %s'%os.path.join(path, prefix))
+
+    def attach(self, part, path='', prefix='', overwrite=True):
+        '''
+        Records the creation of part and wraps its public build methods so their calls
+        are recorded
+        '''
+        #the calls iPart made to set the part up are its own
+        self._backend=part.backend
+        self._snapshot()
+        self._add('iPart', None, {'units': part.units}, part.units,
+                  {'path': path, 'prefix': prefix, 'overwrite': overwrite}, self._register(part))
+        self._wrap_methods(part)
+
+    def attach_structure(self, struct):
+        '''
+        Records the creation of a structure and wraps its public build methods
+        '''
+        if self._depth>0:
+            return
+        self._check_calls()
+        args={'part': struct.part, 'sketch': struct.sketch, 'start': struct.start, 'direction': struct.last_dir}
+        self._add('structure', None, self._encode_args(args), struct.part.units, None, self._register(struct))
+        self._wrap_methods(struct)
+
+    def _wrap_methods(self, target):
+        for name in journaled_methods(type(target)):
+            setattr(target, name, self._wrap(target, name, getattr(target, name)))
+        for name in UNJOURNALED:
+            if inspect.isfunction(getattr(type(target), name, None)):
+                setattr(target, name, self._wrap_quiet(getattr(target, name)))
+
+    def _wrap_quiet(self, method):
+        #unrecorded library methods, the COM calls they make are not the script's own
+        journal=self
+
+        @functools.wraps(method)
+        def call(*args, **kwargs):
+            if journal._depth>0:
+                return method(*args, **kwargs)
+            journal._check_calls()
+            journal._depth+=1
+            try:
+                result=method(*args, **kwargs)
+            finally:
+                journal._depth-=1
+                journal._snapshot()
+            if hasattr(result, '__enter__') and hasattr(result, '__exit__'):
+                return _quiet_scope(journal, result)
+            return result
+        return call
+
+    def _wrap(self, target, name, method):
+        journal=self
+        signature=_signature(type(target), name)
+
+        @functools.wraps(method)
+        def call(*args, **kwargs):
+            if journal._depth>0:
+                return method(*args, **kwargs)
+            return journal._call(target, name, method, signature, args, kwargs)
+        return call
+
+    def _call(self, target, name, method, signature, args, kwargs):
+        bound=signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments=dict(bound.arguments)
+        io=dict((key, arguments.pop(key)) for key in IO_ARGS.get(name, ()) if key in arguments)
+        self._check_calls()
+        if name in PICK_CALLS:
+            self._set_opaque('%s is interactive'%name)
+        encoded=self._encode_args(arguments)
+        units=_units(target)
+        self._depth+=1
+        try:
+            if self.dry==True and name in OUTPUT_CALLS:
+                result=_plan_output(target, name, dict(arguments, **io))
+            else:
+                result=method(*args, **kwargs)
+        finally:
+            self._depth-=1
+            self._snapshot()
+        if name in OUTPUT_CALLS:
+            io=dict((key, val if val==None or type(val) in (str, bool) else repr(val)) for key, val in io.items())
+            self.outputs.append((name, result))
+            self._add(name, self._register(target)['ref'], encoded, units, io, None)
+        else:
+            self._add(name, self._register(target)['ref'], encoded, units, None, self._register(result))
+        return result
+
+    def _encode_args(self, arguments):
+        return dict((key, self.encode(val)) for key, val in arguments.items())
+
+    def _add(self, name, target, args, units, io, result):
+        entry={'call': name, 'target': target, 'args': args, 'units': units}
+        if result!=None:
+            entry['result']=result
+        if io!=None:
+            entry['io']=io
+        self.entries.append(entry)
+
+    def _snapshot(self):
+        #COM calls made so far on the simulator
+        calls=getattr(self._backend, 'calls', None)
+        self._calls=None if calls==None else calls.copy()
+
+    def _check_calls(self):
+        #COM calls made by the script itself since the last recorded call
+        calls=getattr(self._backend, 'calls', None)
+        if calls==None or self._calls==None or self.opaque!=None:
+            return
+        for member, count in calls.items():
+            if count>self._calls.get(member, 0) and not member.startswith(VIEW_MEMBERS):
+                self._set_opaque('%s called outside the journaled calls'%member)
+                return
+
+    def _register(self, val):
+        #ref numbers for the objects a call returns
+        if val is None or isinstance(val, (bool, int, float, str, np.generic, np.ndarray)):
+            return self.encode(val)
+        if type(val)==tuple:
+            return {'tuple': [self._register(item) for item in val]}
+        if type(val)==list:
+            return [self._register(item) for item in val]
+        ind=self._refs.get(id(val))
+        if ind==None:
+            ind=len(self._objs)
+            self._refs[id(val)]=ind
+            #kept alive so ids are not reused
+            self._objs.append(val)
+            if type(val).__name__=='ObjectCollection':
+                self._counts[ind]=val.Count
+        return {'ref': ind}
+
+    def ref(self, ind):
+        '''
+        Object handed out under ref number ind
+        '''
+        return self._objs[ind]
+
+    def encode(self, val):
+        '''
+        JSON encoding of a call argument, tuples, dicts and arrays are tagged so they
+        are told apart from lists
+        '''
+        if val is None or isinstance(val, (bool, str)):
+            return val
+        if isinstance(val, (int, np.integer)):
+            return int(val)
+        if isinstance(val, (float, np.floating)):
+            return float(val)
+        if type(val)==tuple:
+            return {'tuple': [self.encode(item) for item in val]}
+        if type(val)==list:
+            return [self.encode(item) for item in val]
+        if type(val)==dict:
+            return {'dict': [[self.encode(key), self.encode(item)] for key, item in val.items()]}
+        if isinstance(val, np.ndarray):
+            return {'array': val.tolist(), 'dtype': val.dtype.str}
+        ind=self._refs.get(id(val))
+        if ind!=None and ind in self._counts:
+            #a journaled collection, with the items the script added since
+            count=val.Count
+            if count<self._counts[ind]:
+                self._set_opaque('items removed from a collection outside the journaled calls')
+            added=[self.encode(val.Item(ii+1)) for ii in range(self._counts[ind], count)]
+            self._counts[ind]=count
+            return {'ref': ind, 'add': added} if added!=[] else {'ref': ind}
+        if ind!=None:
+            return {'ref': ind}
+        if type(val).__name__=='ObjectCollection':
+            return {'collection': [self.encode(val.Item(ii+1)) for ii in range(val.Count)]}
+        self._set_opaque('%s argument did not come from a journaled call'%type(val).__name__)
+        return {'object': type(val).__name__}
+
+    def key(self):
+        '''
+        sha256 of the journal without file names, None if the build can't be keyed
+        '''
+        self._check_calls()
+        if self.opaque!=None:
+            return None
+        digest=hashlib.sha256(('PyInventor journal %d\n'%JOURNAL_VERSION).encode('ascii'))
+        for entry in self.entries:
+            entry=dict((key, val) for key, val in entry.items() if key!='io')
+            digest.update(json.dumps(entry, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+            digest.update(b'\n')
+        return digest.hexdigest()
+
+    def artifacts(self):
+        '''
+        Files written by the output calls, in call order, waiting for queued exports.
+        Each export gives its saved .ipt and then the exported copies.
+        '''
+        paths=[]
+        for name, result in self.outputs:
+            paths+=_output_paths(name, result)
+        return paths
+
+    def dumps(self):
+        '''
+        The journal as JSON lines, a version header and then one line per call
+        '''
+        lines=[json.dumps({'journal': 'PyInventor', 'version': JOURNAL_VERSION}, separators=(',', ':'))]
+        lines+=[json.dumps(entry, sort_keys=True, separators=(',', ':')) for entry in self.entries]
+        return '\n'.join(lines)+'\n'
+
+    def dump(self, path):
+        tmp_path=path+'.%d.tmp'%os.getpid()
+        with open(tmp_path, 'w') as f:
+            f.write(self.dumps())
+        os.replace(tmp_path, path)
+        return path
+
+    def restore(self, artifacts, output=None):
+        '''
+        Copies artifacts (as listed by artifacts() of the same build) to the files the
+        output calls of this dry journal would have written, file names are allocated as
+        the calls do and part files of iParts made with overwrite=True are replaced. Returns output with the planned paths and export jobs swapped for
+        the written ones.
+        '''
+        from .file_index import file_index, release_name
+        import shutil
+        artifacts=list(artifacts)
+        written={}
+
+        def copy(directory, name):
+            path=os.path.join(directory, file_index(directory).allocate(name))
+            try:
+                shutil.copyfile(artifacts.pop(0), path)
+            finally:
+                release_name(path)
+            return path
+
+        outputs=iter(self.outputs)
+        for entry in self.entries:
+            io=entry.get('io', {})
+            if entry['call']=='iPart' and io.get('overwrite')==True and io.get('prefix', '')!='':
+                #as iPart.overwrite_file does before the part is saved
+                target=os.path.join(io.get('path', ''), io['prefix'])
+                if os.path.isfile(target):
+                    os.remove(target)
+                continue
+            if entry['call'] not in OUTPUT_CALLS:
+                continue
+            name, result=next(outputs)
+            if name in ('save', 'save_copy_as'):
+                written[id(result)]=copy(*os.path.split(result))
+            elif name=='export':
+                directory, base=os.path.split(result[0].source)
+                source=copy(directory, base)
+                base=os.path.splitext(os.path.basename(source))[0]
+                for job in result:
+                    path=source if job.ext=='ipt' else copy(directory, base+'.'+job.ext)
+                    done=export_job(source, path, job.ext, job.options)
+                    done.done.set()
+                    written[id(job)]=done
+        return _substitute(output, written)
+
+
+class _quiet_scope(object):
+    #context manager returned by an unrecorded method (batch, bulk_sketch), the COM calls
+    #of its enter and exit are the library's
+    def __init__(self, journal, scope):
+        self.journal=journal
+        self.scope=scope
+
+    def __enter__(self):
+        self.journal._check_calls()
+        try:
+            return self.scope.__enter__()
+        finally:
+            self.journal._snapshot()
+
+    def __exit__(self, *exc):
+        self.journal._check_calls()
+        try:
+            return self.scope.__exit__(*exc)
+        finally:
+            self.journal._snapshot()
+
+
+def loads_journal(text):
+    '''
+    Entries of a journal written by build_journal.dumps
+    '''
+    lines=[line for line in text.splitlines() if line.strip()!='']
+    try:
+        header=json.loads(lines[0])
+    except (IndexError, ValueError):
+        header={}
+    if header.get('journal')!='PyInventor':
+        raise Exception('ERROR: Not a PyInventor journal')
+    if header.get('version')!=JOURNAL_VERSION:
+        raise Exception('ERROR: Unsupported journal version %s, expected %d'%(header.get('version'), JOURNAL_VERSION))
+    return [json.loads(line) for line in lines[1:]]
+
+def load_journal(path):
+    with open(path) as f:
+        return loads_journal(f.read())
+
+def _entries(journal):
+    if isinstance(journal, build_journal):
+        return journal.entries
+    elif type(journal)==str:
+        if os.path.isfile(journal):
+            return load_journal(journal)
+        return loads_journal(journal)
+    return list(journal)
+
+def _decode(val, refs, session, ind):
+    if type(val)==list:
+        return [_decode(item, refs, session, ind) for item in val]
+    if type(val)!=dict:
+        return val
+    if 'ref' in val:
+        obj=refs[val['ref']]
+        for item in val.get('add', []):
+            obj.Add(_decode(item, refs, session, ind))
+        return obj
+    if 'tuple' in val:
+        return tuple(_decode(item, refs, session, ind) for item in val['tuple'])
+    if 'dict' in val:
+        return dict((_decode(key, refs, session, ind), _decode(item, refs, session, ind)) for key, item in val['dict'])
+    if 'array' in val:
+        return np.array(val['array'], dtype=np.dtype(val['dtype']))
+    if 'collection' in val:
+        coll=session.trans_obj.CreateObjectCollection()
+        for item in val['collection']:
+            coll.Add(_decode(item, refs, session, ind))
+        return coll
+    raise Exception('ERROR: Journal entry %d passes a %s that was not journaled, it cant be replayed'%(ind, val.get('object')))
+
+def _bind(pattern, val, refs):
+    #ref numbers of the objects a replayed call returned
+    if type(pattern)==dict and 'ref' in pattern:
+        refs[pattern['ref']]=val
+    elif type(pattern)==dict and 'tuple' in pattern:
+        for item, sub in zip(pattern['tuple'], val):
+            _bind(item, sub, refs)
+    elif type(pattern)==list:
+        for item, sub in zip(pattern, val):
+            _bind(item, sub, refs)
+
+def replay(journal, session=None):
+    '''
+    Makes the calls of journal (a build_journal, its entries, a journal file or the text
+    of one) again on session (default a new inv_session), which may be on any backend.
+    Returns the files written by the output calls, as build_journal.artifacts.
+    '''
+    from .pyinvent import inv_session, iPart, structure
+    entries=_entries(journal)
+    if session==None:
+        session=inv_session()
+    refs={}
+    paths=[]
+    for ind, entry in enumerate(entries):
+        name=entry['call']
+        args=dict((key, _decode(val, refs, session, ind)) for key, val in entry['args'].items())
+        io=entry.get('io', {})
+        if name=='iPart':
+            result=iPart(io.get('path', ''), io.get('prefix', ''), args['units'], io.get('overwrite', True), session=session)
+        elif name=='structure':
+            result=structure(**args)
+        else:
+            for key in IO_ARGS.get(name, ()):
+                if key in io and key!='exports':
+                    args[key]=io[key]
+            result=getattr(refs[entry['target']], name)(**args)
+        _bind(entry.get('result'), result, refs)
+        if name in OUTPUT_CALLS:
+            paths+=_output_paths(name, result)
+    return paths
+
+def sim_session():
+    from .pyinvent import inv_session
+    from .inv_sim import sim_backend
+    return inv_session(sim_backend())
+
+def record_build(build_fn, params=None):
+    '''
+    Journal of build_fn(session, params) run on the simulator without writing files (a
+    dry journal), e.g. to plan builds off the machines that have Inventor
+    '''
+    session=sim_session()
+    session.journal=build_journal(dry=True)
+    build_fn(session, params)
+    return session.journal
+
+def replay_build(session, journal):
+    '''
+    Sweep build function replaying a journal (see sweep), params are the journal files
+    '''
+    return replay(journal, session)
+
+def _output_paths(name, result):
+    if name in ('save', 'save_copy_as'):
+        return [result]
+    elif name=='export':
+        return [result[0].source]+[job.result() for job in result if job.ext!='ipt']
+    return []
+
+def _units(target):
+    #units of a part, or of the part a structure draws on
+    units=getattr(target, 'units', None)
+    if units==None:
+        units=target.part.units
+    return units
+
+def _plan_output(part, name, arguments):
+    #what an output call would write, without writing it
+    if name=='save':
+        return os.path.join(*part._save_target(arguments['file_path'], arguments['file_name']))
+    elif name=='save_copy_as':
+        return os.path.join(*part._copy_target(arguments['copy_name'], arguments['file_path'], arguments['copy_as']))
+    elif name=='export':
+        source=os.path.join(*part._save_target(arguments['file_path'], arguments['file_name']))
+        base=os.path.splitext(source)[0]
+        targets=export_targets(arguments['formats'])
+        jobs=[]
+        for ext, options in sorted(targets, key=lambda target: target[0]!='ipt'):
+            job=export_job(source, source if ext=='ipt' else base+'.'+ext, ext, options)
+            job.done.set()
+            jobs.append(job)
+        return jobs
+    return None
+
+def _substitute(val, written):
+    if id(val) in written:
+        return written[id(val)]
+    if type(val)==list:
+        return [_substitute(item, written) for item in val]
+    if type(val)==tuple:
+        return tuple(_substitute(item, written) for item in val)
+    if type(val)==dict:
+        return dict((key, _substitute(item, written)) for key, item in val.items())
+    return val
@@ -1,18 +1,28 @@
 import glob
-from win32com.client import Dispatch, GetActiveObject, gencache, constants
 import numpy as np
-from numpy import cos, sin, pi, sqrt
 import os
-import copy
-import xlwings as xw
 import warnings
 import re
 import sys
 import shutil
-from scipy.special import binom
+import time
+from contextlib import contextmanager
+from .segments import segment_store, segment_view, TYPE_CODES
+from .thread_tables import find_thread_tables, load_thread_index
+from .file_index import file_index, numbered_name, release_name
+from .export import export_queue, export_job, export_targets, translate
+from .validate import validate_path, dedupe_xy
+from .fitting import fit_runs
+from .geometry import (round_pt, round_pts, remove_duplicate_pts, distance, ang2pt, vec_rot, arc_pts_pattern,
+                       mirror_x, rotate_pt, rotate_pts, translate_pt, translate_pts, orient_pt, orient_pts,
+                       scale_pt, scale_pts, mirror_pt, mirror_pts, arc_pattern, circle_pattern, bernstein_poly, b_spline,
+                       b_spline_xy, bspline, bspline_xy, as_xy, arc_xy, mirror_xy, affine)
 
 '''
 
+win32com (pywin32) and scipy are imported on first use so that the module,
+and the pure geometry helpers in PyInventor.geometry, import quickly and off Windows.
+
 This version 4 of the inventor API for python creates a new com_obj class that is used for the initialization 
 of the com port and the inventor object
 
@@ -31,6 +41,7 @@ Written by: Andrew Oriani
 '''
 
 def clear_excel_app_data():
+    from win32com.client import gencache
     try:
         xw = gencache.EnsureDispatch('Excel.Application')
     except AttributeError:
@@ -44,28 +55,162 @@ def clear_excel_app_data():
     xw.Quit()
 
 
-class com_obj(object):
-    def __init__(self):
+_win32_typelib=None
+
+@contextmanager
+def _no_scope():
+    yield
+
+
+class win32_backend(object):
+    def __init__(self, new_instance=False, visible=True):
         '''
-        Attempts to open inventor and setup com port
+        Default com_obj backend, attaches to the running Inventor through pywin32. With
+        new_instance=True the backend starts its own Inventor process on first connect
+        (DispatchEx), shared by every com_obj on this backend and closed by quit().
         '''
         try:
-            self.invApp = GetActiveObject('Inventor.Application')
+            from win32com.client import constants
+        except ImportError:
+            raise Exception('ERROR: pywin32 not installed, use a simulated backend (see inv_sim) off Windows')
+        self.constants=constants
+        self.new_instance=new_instance
+        self.visible=visible
+        self.app=None
+
+    def connect(self):
+        from win32com.client import Dispatch, DispatchEx, GetActiveObject
+        if self.new_instance==True:
+            if self.app==None:
+                self.app=DispatchEx('Inventor.Application')
+                self.app.Visible=self.visible
+            return self.app
+        try:
+            invApp = GetActiveObject('Inventor.Application')
         except:
-            self.invApp = Dispatch('Inventor.Application')
-            self.invApp.Visible = True           
+            invApp = Dispatch('Inventor.Application')
+            invApp.Visible = True
+        return invApp
+
+    def typelib(self):
+        #EnsureModule checks the generated cache on every call, the module is process wide
+        global _win32_typelib
+        if _win32_typelib==None:
+            from win32com.client import gencache
+            _win32_typelib=gencache.EnsureModule('{D98A091D-3A0F-4C3E-B36E-61F62068D488}', 0, 1, 0)
+        return _win32_typelib
+
+    def quit(self):
+        #only an instance started by this backend is closed
+        if self.app!=None:
+            self.app.Quit()
+            self.app=None
+
+
+_default_backend=None
+
+def set_default_backend(backend=None):
+    '''
+    Sets the backend used by com_obj when none is passed, None restores pywin32.
+    Setting the PYINVENTOR_BACKEND environment variable to sim selects inv_sim.
+    '''
+    global _default_backend
+    _default_backend=backend
+
+def get_default_backend():
+    global _default_backend
+    if _default_backend==None:
+        if os.environ.get('PYINVENTOR_BACKEND', '').lower()=='sim':
+            from . import inv_sim
+            _default_backend=inv_sim.sim_backend()
+        else:
+            _default_backend=win32_backend()
+    return _default_backend
+
 
-        self.mod = gencache.EnsureModule('{D98A091D-3A0F-4C3E-B36E-61F62068D488}', 0, 1, 0)
+class inv_session(object):
+    def __init__(self, backend=None):
+        '''
+        Inventor connection that is set up once and reused for many parts: the application,
+        typelib module and application level handles (TransientGeometry, TransientObjects,
+        CommandManager) are fetched here and shared by every part made from the session.
+
+            sess=inv_session()
+            for n in range(100):
+                part=sess.new_part(path, 'part_%d.ipt'%n)
+        '''
+        if backend==None:
+            backend=get_default_backend()
+        self.backend=backend
+        self.constants=backend.constants
+        self.invApp=backend.connect()
+
+        self.mod = backend.typelib()
         self.invAppCom = self.mod.Application(self.invApp)
+
+        self.cmdManager=self.invApp.CommandManager
+        self.tg=self.invApp.TransientGeometry
+        self.trans_obj=self.invApp.TransientObjects
+
+        #background export_queue used by iPart.export, see start_exports
+        self.exports=None
+        #build_journal recording the build calls of the session's parts, see journal module
+        self.journal=None
+
+    def start_exports(self, backend_factory=None, max_pending=0):
+        '''
+        Starts a background export_queue for the parts of this session
+        '''
+        if self.exports==None:
+            self.exports=export_queue(backend_factory, max_pending)
+        return self.exports
+
+    def stop_exports(self):
+        '''
+        Waits for the queued exports and stops the export worker, returns its report
+        '''
+        if self.exports==None:
+            return None
+        self.exports.close()
+        report=self.exports.report()
+        self.exports=None
+        return report
+
+    def new_part(self, path='', prefix='', units='imperial', overwrite=True, thread_tables=None):
+        '''
+        New or opened iPart on this session, arguments as in iPart
+        '''
+        return iPart(path, prefix, units, overwrite, thread_tables=thread_tables, session=self)
+
+    def close_all_parts(self):
+        self.invApp.Documents.CloseAll()
+
+
+class com_obj(object):
+    def __init__(self, backend=None, session=None):
+        '''
+        Attempts to open inventor and setup com port. The backend provides the
+        application object, typelib module and enum constants (default pywin32).
+        Passing an inv_session reuses its connection and handles instead.
+        '''
+        if session==None:
+            session=inv_session(backend)
+        self.session=session
+        self.backend=session.backend
+        self.constants=session.constants
+        self.invApp=session.invApp
+
+        self.mod = session.mod
+        self.invAppCom = session.invAppCom
         
     
     def overwrite_file(self, path, prefix):  
         '''
         Overwrites existing file name
         '''
-        if os.path.isfile(path+'\\'+prefix)==True:
+        if os.path.isfile(os.path.join(path, prefix))==True:
             self.invApp.Documents.CloseAll()
-            os.remove(path+'\\'+prefix)
+            os.remove(os.path.join(path, prefix))
         else:
             pass
         
@@ -75,20 +220,20 @@ class com_obj(object):
         '''
         
         if prefix=='':
-            self.invDoc = self.invApp.Documents.Add(constants.kPartDocumentObject, "", True)
+            self.invDoc = self.invApp.Documents.Add(self.constants.kPartDocumentObject, "", True)
         else:
             #check if input filename exists, if so, modify
-            if os.path.isfile(path+'\\'+prefix)==True:
+            if os.path.isfile(os.path.join(path, prefix))==True:
                 try:
-                    self.invDoc=self.invApp.Documents.Open(path+'\\'+prefix)
+                    self.invDoc=self.invApp.Documents.Open(os.path.join(path, prefix))
                 except:
                     raise Exception('ERROR: Unable to open file, check filetype and if file is in target directory.')
-                if self.invDoc.DocumentType==constants.kPartDocumentObject:
+                if self.invDoc.DocumentType==self.constants.kPartDocumentObject:
                     pass
                 else:
                     raise Exception('ERROR: Document type is not part document')
             else:
-                self.invDoc = self.invApp.Documents.Add(constants.kPartDocumentObject, "", True)
+                self.invDoc = self.invApp.Documents.Add(self.constants.kPartDocumentObject, "", True)
         
         # Casting Document to PartDocument
         self.invPartDoc = self.mod.PartDocument(self.invDoc)
@@ -97,14 +242,12 @@ class com_obj(object):
         #Opened document handle
         self.oDoc=self.invAppCom.ActiveDocument
         
-        #create command manager
-        self.cmdManager=self.invApp.CommandManager
-        
-        #Set transient geometry object
-        self.tg=self.invApp.TransientGeometry
-        self.trans_obj=self.invApp.TransientObjects
+        #command manager and transient geometry/object handles are cached on the session
+        self.cmdManager=self.session.cmdManager
+        self.tg=self.session.tg
+        self.trans_obj=self.session.trans_obj
         
-        #object view handle
+        #object view handle, belongs to the new document's window
         self.view=self.invApp.ActiveView
         
     def close_all_parts(self):
@@ -113,28 +256,48 @@ class com_obj(object):
 
                 
 class iPart(com_obj):
-    def __init__(self, path='', prefix='', units='imperial', overwrite=True):
+    def __init__(self, path='', prefix='', units='imperial', overwrite=True, backend=None, thread_tables=None, session=None):
         
         self.overwrite=overwrite
         self.file_path=path
         self.f_name=prefix
         self.units=units
         
-        try:
-            self.thread_tables=glob.glob('C:\\Users\\Public\\Documents\\Autodesk\\Inventor 20*')[0]+'\\Design Data\\XLS\\en-US\\thread.xls'
-        except:
+        #native inventor thread tables or a custom tables file (see thread_tables module)
+        if thread_tables==None:
+            thread_tables=find_thread_tables()
+        if thread_tables==None:
             warnings.warn('Unable to locate thread tables, wont be able to create thread feature')
             self.thread_tables=[]
+        else:
+            self.thread_tables=thread_tables
+        #fewest entities added at once that are worth a sketch bulk_edit scope
+        self.bulk_min=8
+        #most hole centers in one hole feature made by hole_array
+        self.hole_chunk=1000
+        #length, angle or unitless, of the user parameters made by user_parameter
+        self._param_kinds={}
+        #batch() nesting depth and a Rebuild deferred to the end of the batch
+        self._batch_depth=0
+        self._deferred_rebuild=False
         #setup com with inventor
-        super(iPart, self).__init__()
+        super(iPart, self).__init__(backend, session)
+        
+        #a dry run journal (see build_cache) must not touch the output directory
+        journal=self.session.journal
+        doc_path, doc_prefix=path, prefix
+        if journal!=None:
+            journal.check_source(path, prefix, overwrite)
+            if journal.dry==True:
+                doc_path, doc_prefix='', ''
         
         if overwrite==True:
-            self.overwrite_file(path, prefix)
+            self.overwrite_file(doc_path, doc_prefix)
         elif overwrite==False:
             pass
     
         #open part or setup new part
-        self.new_part(prefix, path)
+        self.new_part(doc_prefix, doc_path)
 
         #set document units
         self.set_units(units)
@@ -158,18 +321,82 @@ class iPart(com_obj):
         self.plane_num=0
         self.plane_list=[]
         
+        #record the build calls made from here on, see journal module
+        if journal!=None:
+            journal.attach(self, path, prefix, overwrite)
     
+    #feature dimensions bind_parameter can set: kind and attribute path to the Parameter
+    _feature_dimensions={'ExtrudeFeature': {'distance': ('length', ('Extent', 'Distance'))},
+                         'RevolveFeature': {'angle': ('angle', ('Extent', 'Angle'))},
+                         'HoleFeature': {'diameter': ('length', ('HoleDiameter',)),
+                                         'depth': ('length', ('Extent', 'Distance'))},
+                         'RectangularPatternFeature': {'count': ('unitless', ('Definition', 'XCount')),
+                                                       'spacing': ('length', ('Definition', 'XSpacing'))},
+                         'CircularPatternFeature': {'count': ('unitless', ('Definition', 'Count')),
+                                                    'angle': ('angle', ('Definition', 'Angle'))}}
+    #Parameter.Units strings set_parameters reads as angles and lengths
+    _angle_units=('deg', 'rad', 'grad')
+    _length_units=('in', 'ft', 'mil', 'mm', 'cm', 'm', 'micron', 'nm', 'km', 'yd', 'mile')
+
     class sketch:
-        def __init__(self, sketch_obj, sketch_num, plane):
+        #SketchOptions members turned off inside bulk_edit, where the Inventor version has them
+        _inference_options=('ConstraintInference', 'ConstraintPersistence')
+
+        def __init__(self, sketch_obj, sketch_num, plane, app=None):
             self.sketch_num=sketch_num
             self.sketch_obj=sketch_obj
             self.plane=plane
+            self.app=app
+            self._bulk_depth=0
         
         def edit(self):
             self.sketch_obj.Edit()
             
         def exit_edit(self):
             self.sketch_obj.ExitEdit()
+
+        @contextmanager
+        def bulk_edit(self):
+            '''
+            Defers sketch updates and turns off constraint inference while many entities are
+            added, the sketch is solved once on exit. Nested scopes join the outer one.
+            '''
+            if self._bulk_depth>0:
+                self._bulk_depth+=1
+                try:
+                    yield self
+                finally:
+                    self._bulk_depth-=1
+                return
+
+            sketch_obj=self.sketch_obj
+            deferred=sketch_obj.DeferUpdates
+            options=None
+            restore={}
+            if self.app!=None:
+                try:
+                    options=self.app.SketchOptions
+                except Exception:
+                    options=None
+            self._bulk_depth=1
+            try:
+                if options!=None:
+                    for name in self._inference_options:
+                        try:
+                            restore[name]=getattr(options, name)
+                            setattr(options, name, False)
+                        except Exception:
+                            pass
+                sketch_obj.DeferUpdates=True
+                yield self
+            finally:
+                self._bulk_depth=0
+                try:
+                    sketch_obj.DeferUpdates=deferred
+                    for name, val in restore.items():
+                        setattr(options, name, val)
+                finally:
+                    sketch_obj.Solve()
             
     class extrusion:
         def __init__(self, extrude_obj, extrude_num):
@@ -209,9 +436,7 @@ class iPart(com_obj):
         self.view.DisplayMode=val
         
     def f_check(self, path, f_name):
-        if path[-1]!='\\':
-            path=path+'\\'
-        dirlist = glob.glob(path+'*'+f_name)
+        dirlist = glob.glob(os.path.join(path, '*'+f_name))
         if dirlist!=[]:
             return True
         elif dirlist==[]:
@@ -246,8 +471,8 @@ class iPart(com_obj):
     def copy_file_ext_types(self):
         return ['stp', 'stl', 'step', 'stpz', 'ste', 'ipt', 'igs', 'ige', 'iges']
             
-    def save(self, file_path='', file_name=''):
-        #save file in requisite path, if copy flag is set it saves a numbered copy of the original file
+    def _save_target(self, file_path='', file_name=''):
+        #directory and requested file name of save
         if file_name=='' and self.f_name!='':
             file_name=self.f_name
         elif self.f_name=='':
@@ -256,25 +481,38 @@ class iPart(com_obj):
             file_path=self.file_path
         elif file_path=='' and self.file_path=='':
             file_path=os.getcwd()
-            
-        check=self.f_check(file_path, file_name)
+        return file_path, file_name
+
+    def _doc_path(self):
+        #full path the document was opened from or last saved to, '' if never saved
+        doc_path=self.invDoc.FullFileName
+        return os.path.abspath(doc_path) if doc_path!='' else ''
+    
+    def save(self, file_path='', file_name=''):
+        #save file in requisite path, if copy flag is set it saves a numbered copy of the original file
+        file_path, file_name=self._save_target(file_path, file_name)
         
-        if check==True:
-            file_name=get_next_filename(file_path, file_name)
-        else:
-            pass
-            
-        full_path=file_path+'\\'+file_name
+        full_path=os.path.join(file_path, file_name)
         
-        if os.path.isfile(full_path)==True and self.overwrite==False:
+        #a document opened from (or saved to) this file is saved in place
+        if os.path.isfile(full_path)==True and self.overwrite==False and self._doc_path()==os.path.abspath(full_path):
             self.invDoc.Save()
-        else:
+            return full_path
+            
+        #file_name if it is free, otherwise the next numbered copy, claimed atomically
+        file_name=file_index(file_path).allocate(file_name)
+            
+        full_path=os.path.join(file_path, file_name)
+        
+        try:
             self.invDoc.SaveAs(full_path, SaveCopyAs=False)
+        finally:
+            release_name(full_path)
        
         return full_path
             
-    def save_copy_as(self,  copy_name='', file_path='', copy_as=''):
-        
+    def _copy_target(self, copy_name='', file_path='', copy_as=''):
+        #directory and requested file name of save_copy_as
         suffix=copy_as
         
         if file_path=='' and self.file_path!='':
@@ -295,35 +533,143 @@ class iPart(com_obj):
                 raise Exception('ERROR: Not a valid filetype, must be stp, stl, ipt, or igs file extension') 
         else:
             pass
+        return file_path, copy_name
+
+    def save_copy_as(self,  copy_name='', file_path='', copy_as=''):
         
-        if self.f_check(file_path, copy_name)==True:
-            copy_name=get_next_filename(file_path, copy_name)
-        else:
-            pass
+        file_path, copy_name=self._copy_target(copy_name, file_path, copy_as)
         
-        full_path=file_path+'\\'+copy_name
+        copy_name=file_index(file_path).allocate(copy_name)
         
-        self.invDoc.SaveAs(full_path, SaveCopyAs=True)
+        full_path=os.path.join(file_path, copy_name)
+        
+        try:
+            self.invDoc.SaveAs(full_path, SaveCopyAs=True)
+        finally:
+            release_name(full_path)
         
         print('File successfully copied as: %s'%(full_path))
         
         return full_path 
         
+    def export(self, formats, file_path='', file_name='', exports=None):
+        '''
+        Saves the part and writes a copy in each of formats, e.g. ['ipt', 'stp', ('stl',
+        {'Resolution': 0})] (see the export module for the translator options). The copies
+        are named after the saved .ipt. With an export_queue (or the session's, see
+        inv_session.start_exports) they are written in the background, otherwise here.
+        Returns an export_job per format.
+        '''
+        targets=export_targets(formats)
+        if exports==None:
+            exports=self.session.exports
+        t_0=time.perf_counter()
+        source=self.save(file_path, file_name)
+        save_time=time.perf_counter()-t_0
+        directory, base=os.path.split(source)
+        base=os.path.splitext(base)[0]
+        index=file_index(directory)
+        jobs=[]
+        outputs=[]
+        for ext, options in targets:
+            if ext=='ipt':
+                job=export_job(source, source, ext, options)
+                job.time=save_time
+                job.done.set()
+                jobs.append(job)
+                if exports!=None:
+                    exports.record(job)
+            else:
+                outputs.append((os.path.join(directory, index.allocate(base+'.'+ext)), ext, options))
+        if exports!=None:
+            return jobs+exports.submit(source, outputs)
+        for path, ext, options in outputs:
+            job=export_job(source, path, ext, options)
+            t_0=time.perf_counter()
+            try:
+                translate(self.invApp, self.constants, self.invDoc, path, ext, options)
+            finally:
+                release_name(path)
+            job.time=time.perf_counter()-t_0
+            job.done.set()
+            jobs.append(job)
+        return jobs
+
     def set_units(self, units='imperial'):
         if units=='imperial':
-            angle=constants.kDegreeAngleUnits
-            length=constants.kInchLengthUnits
+            angle=self.constants.kDegreeAngleUnits
+            length=self.constants.kInchLengthUnits
         elif units=='metric':
-            angle=constants.kRadianAngleUnits
-            length=constants.kMillimeterLengthUnits
+            angle=self.constants.kRadianAngleUnits
+            length=self.constants.kMillimeterLengthUnits
         else:
             raise Exception('ERROR: Invalid units input, must be imperial or metric')
-        self.invDoc.UnitsOfMeasure.LengthUnits=length
-        self.invDoc.UnitsOfMeasure.AngleUnits=angle
-        self.invDoc.Rebuild
+        units_obj=self.invDoc.UnitsOfMeasure
+        units_obj.LengthUnits=length
+        units_obj.AngleUnits=angle
+        if self._batch_depth>0:
+            self._deferred_rebuild=True
+        else:
+            self.invDoc.Rebuild()
         self.units=units    
         
+    @contextmanager
+    def batch(self, name='PyInventor build', abort_on_error=False):
+        '''
+        Builds everything in the with block as one Inventor transaction (a single undo step)
+        with screen updating and user interaction off. Document rebuilds are deferred and
+        done once on exit with a single Update. Application state is restored on exceptions,
+        abort_on_error=True also aborts the transaction. Nested batches join the outer one.
+
+            with part.batch():
+                for ...:
+                    part.extrude(...)
+        '''
+        if self._batch_depth>0:
+            self._batch_depth+=1
+            try:
+                yield self
+            finally:
+                self._batch_depth-=1
+            return
+
+        app=self.invApp
+        screen_updating=app.ScreenUpdating
+        interaction_disabled=app.UserInteractionDisabled
+        trans=app.TransactionManager.StartTransaction(self.invDoc, name)
+        self._batch_depth=1
+        self._deferred_rebuild=False
+        try:
+            app.ScreenUpdating=False
+            app.UserInteractionDisabled=True
+            yield self
+        except BaseException:
+            self._batch_depth=0
+            try:
+                if abort_on_error==True:
+                    trans.Abort()
+                else:
+                    trans.End()
+            finally:
+                app.ScreenUpdating=screen_updating
+                app.UserInteractionDisabled=interaction_disabled
+            raise
+        else:
+            self._batch_depth=0
+            try:
+                if self._deferred_rebuild==True:
+                    self.invDoc.Rebuild()
+                else:
+                    self.invDoc.Update()
+                trans.End()
+            finally:
+                app.ScreenUpdating=screen_updating
+                app.UserInteractionDisabled=interaction_disabled
+        
     def unit_conv(self, val_in):
+        #strings are Inventor expressions (e.g. a user parameter name) and are passed on as is
+        if type(val_in)==str:
+            return val_in
         units=self.units
         if units=='imperial':
             mult=2.54
@@ -375,6 +721,103 @@ class iPart(com_obj):
             mult=1
         return val_in*mult
     
+    def param_expression(self, value, kind='length'):
+        '''
+        Inventor expression of a number in the part units, kind is length, angle or
+        unitless. Strings are taken to be expressions already.
+        '''
+        if type(value)==str:
+            return value
+        if kind=='length':
+            unit='in' if self.units=='imperial' else 'mm'
+        elif kind=='angle':
+            unit='deg' if self.units=='imperial' else 'rad'
+        elif kind=='unitless':
+            unit='ul'
+        else:
+            raise Exception('ERROR: Invalid parameter kind, must be length, angle or unitless')
+        value=float(value)
+        return '%s %s'%(str(int(value)) if value.is_integer() else repr(value), unit)
+
+    def _param_units(self, kind):
+        if kind=='length':
+            return self.constants.kInchLengthUnits if self.units=='imperial' else self.constants.kMillimeterLengthUnits
+        elif kind=='angle':
+            return self.constants.kDegreeAngleUnits if self.units=='imperial' else self.constants.kRadianAngleUnits
+        elif kind=='unitless':
+            return self.constants.kUnitlessUnits
+        raise Exception('ERROR: Invalid parameter kind, must be length, angle or unitless')
+
+    def user_parameter(self, name, value, kind='length'):
+        '''
+        Creates the user parameter name (or sets it if it exists) to value, a number in the
+        part units or an expression string. kind is length, angle or unitless. Feature
+        dimensions given as the name (e.g. extrude(sketch, 'thickness')) follow it.
+        '''
+        params=self.compdef.Parameters.UserParameters
+        expression=self.param_expression(value, kind)
+        self._param_kinds[name]=kind
+        try:
+            param=params.Item(name)
+        except Exception:
+            return params.AddByExpression(name, expression, self._param_units(kind))
+        param.Expression=expression
+        if self._batch_depth==0:
+            self.invDoc.Update()
+        return param
+
+    def _unit_kind(self, name, units):
+        #kind of a parameter from the unit string Inventor reports for it
+        if units in self._angle_units:
+            return 'angle'
+        elif units=='ul':
+            return 'unitless'
+        elif units in self._length_units:
+            return 'length'
+        raise Exception('ERROR: Parameter %s is in %s, give its value as an expression'%(name, units))
+
+    def set_parameters(self, values):
+        '''
+        Sets many parameters, {name: number or expression}, and updates the part once (at
+        the end of the batch inside batch()). Numbers are in the part units, of the kind
+        given to user_parameter or the kind of the units Inventor reports for others.
+        '''
+        params=self.compdef.Parameters
+        for name, value in values.items():
+            param=params.Item(name)
+            if type(value)==str:
+                kind=None
+            elif name in self._param_kinds:
+                kind=self._param_kinds[name]
+            else:
+                kind=self._unit_kind(name, param.Units)
+            param.Expression=self.param_expression(value, kind)
+        if self._batch_depth==0:
+            self.invDoc.Update()
+
+    def bind_parameter(self, feature, dimension, value):
+        '''
+        Sets a feature dimension to value, usually an expression of user parameters, e.g.
+        bind_parameter(hole, 'diameter', 'pitch/2'). dimension is one of distance
+        (extrude), angle (revolve, circular pattern), diameter and depth (hole), count and
+        spacing (patterns), or the index of the feature parameter. Returns the parameter.
+        '''
+        if type(dimension)==int:
+            kind='length'
+            param=feature.Parameters.Item(dimension)
+        else:
+            dimensions=self._feature_dimensions.get(self.API_type(feature), {})
+            if dimension not in dimensions:
+                raise Exception('ERROR: Invalid dimension %s for %s, must be one of %s'%(dimension, self.API_type(feature), ', '.join(sorted(dimensions)) or 'parameter indices'))
+            kind, path=dimensions[dimension]
+            param=feature
+            for attr in path:
+                param=getattr(param, attr)
+        param.Expression=self.param_expression(value, kind)
+        if self._batch_depth==0:
+            self.invDoc.Update()
+        return param
+    
     def close(self, save=True):
         #close the inventor part document
         if save==True:
@@ -386,97 +829,24 @@ class iPart(com_obj):
             
     def thread_gen(self, dia, pitch, thread_type='unified', thread_class=''):
         
-        #open native inventor thread tables with thread designators
-
+        #look up thread designators in the cached index of the native inventor thread tables
         if self.thread_tables==[]:
             raise Exception('ERROR: Unable to find native inventor thread tables.')
 
         try:
-            thread_tables_path=self.thread_tables
-            try:
-                xw.App(visible=False)
-            except:
-                clear_excel_app_data()
-                xw.App(visible=False)
-
-            thread_tables=xw.Book(thread_tables_path)
-
-            if thread_type=='unified' or thread_type=='imperial':
-                thread_type='ANSI Unified Screw Threads'
-                split_ele='-'
-                if thread_class=='':
-                    thread_class='2B'
-                else:
-                    pass
-            elif thread_type=='metric':
-                dia='M'+dia
-                split_ele='x'
-                thread_type='ANSI Metric M Profile'
-                if pitch.split('.')[0]=='':
-                    pitch='0'+pitch
-                else:
-                    pass
-                if thread_class=='':
-                    thread_class='6H'
-                else:
-                    pass
-
-            thread_sheet=thread_tables.sheets[thread_type]
-            thread_des=thread_sheet.api.UsedRange.Find('Thread Designation').GetAddress()
-        except:
-            raise Exception('ERROR: Unable to open native inventor thread tables.')
-
-        #conduct search of thread tables for single listing
-        class_col='N'
-
-        row_col=thread_des.split('$')[1::]
-        row_start=int(row_col[1])+1
-        row=row_start
-        col=row_col[0]
-        while thread_sheet.range('%s%s'%(col, str(row))).value!=None:
-            row+=1
-            pass
-
-        tap_list=thread_sheet.range('%s%s:%s%s'%(col, str(row_start), col, str(row-1))).value
-        class_list=thread_sheet.range('%s%s:%s%s'%(class_col, str(row_start), class_col, str(row-1))).value
-        
-        #make sure to fully close table
-        thread_tables.close()
-        
-        dia_indices = [i for i, elem in enumerate(tap_list) if dia in elem.split(split_ele)[0][0:len(dia)] and len(elem.split(split_ele)[0])==len(dia)]
-
-        if dia_indices==[]:
-            raise Exception('ERROR: Invalid value for hole diameter')
-        else:
-            pass
-
-        dia_vals=[np.array(tap_list)[dia_indices].tolist(), dia_indices]
-
-        pitch_indices=[dia_indices[i] for i, elem in enumerate(dia_vals[0]) if pitch in elem.split(split_ele)[1]]
-
-        if pitch_indices==[]:
-            raise Exception('ERROR: Invalid value for thread pitch')
-        else:
-            pass
+            index=load_thread_index(self.thread_tables)
+        except Exception as e:
+            raise Exception('ERROR: Unable to open native inventor thread tables. %s'%str(e))
 
-        thread_input=[]
-        for inds in pitch_indices:
-            thread_input.append([tap_list[inds], class_list[inds]])
-
-        thread_input=[thread_input[1][i] for i, elem in enumerate(thread_input) if elem[1]!=None and thread_class in elem[1]]
-
-        if thread_input==[] or len(thread_input)>1:
-            raise Exception('ERROR: Invalid thread class')
-
-        return thread_input[0], thread_type, thread_class
+        return index.lookup(dia, pitch, thread_type, thread_class)
             
     def pick(self, feature='planes'):
-        feature_vals={'points':{'msg': 'Pick Points', 'enum': constants.kAllPointEntities},
-                 'planes':{'msg': 'Pick Planes', 'enum': constants.kWorkPlaneFilter},
-                 'linear':{'msg': 'Pick Line Elements', 'enum': constants.kAllLinearEntities}, 
-                 'circular':{'msg': 'Pick Circular Elements', 'enum': constants.kAllCircularEntities},
-                 'sketch':{'msg': 'Pick Sketch', 'enum': constants.kSketchObjectFilter},
-                 'face':{'msg': 'Pick Face', 'enum': constants.kPartFacePlanarFilter}
+        feature_vals={'points':{'msg': 'Pick Points', 'enum': self.constants.kAllPointEntities},
+                 'planes':{'msg': 'Pick Planes', 'enum': self.constants.kWorkPlaneFilter},
+                 'linear':{'msg': 'Pick Line Elements', 'enum': self.constants.kAllLinearEntities}, 
+                 'circular':{'msg': 'Pick Circular Elements', 'enum': self.constants.kAllCircularEntities},
+                 'sketch':{'msg': 'Pick Sketch', 'enum': self.constants.kSketchObjectFilter},
+                 'face':{'msg': 'Pick Face', 'enum': self.constants.kPartFacePlanarFilter}
             }
         if feature in feature_vals.keys():
             pass
@@ -579,7 +949,7 @@ class iPart(com_obj):
     def new_sketch(self, plane):
         self.sketch_num+=1
         self.sketch_list.append(self.sketch_num)
-        return self.sketch(self.compdef.Sketches.Add(plane.plane_obj), self.sketch_num, plane)
+        return self.sketch(self.compdef.Sketches.Add(plane.plane_obj), self.sketch_num, plane, self.invApp)
     
     def delete_sketch(self, sketch):
         sketch_obj, sketch_num, _=self.sketch_test(sketch)
@@ -598,15 +968,11 @@ class iPart(com_obj):
         return sketch_obj.SketchPoints.Add(self.point(pos))
 
     def sketch_point_coll(self, sketch, pos):
-        sketch_obj=sketch.sketch_obj
         if pos==[] or type(pos)!=list:
             raise Exception('ERROR: Must be a list of tuples representing points')
         else:
             pass
-        points=[]
-        for coords in pos:
-            points.append(self.sketch_point(sketch, coords))
-        return self.create_obj_collection(points)
+        return self.sketch_points(sketch, pos)
     
     def two_point_rect(self, sketch, corner_1, corner_2):
         rect_obj=sketch.SketchLines.AddAsTwoPointRectangle(self.point(corner_1), self.point(corner_2))
@@ -643,18 +1009,103 @@ class iPart(com_obj):
         return slot_obj
             
     def point(self, pos):
-        self.tg=self.invApp.TransientGeometry
-        if self.SP_check(pos)==False:
-            if type(pos)!=tuple and type(pos)!=list:
-                raise Exception('ERROR: Point position must be list of form [x,y]')
-            elif len(pos)!=2:
+        if type(pos)==tuple or type(pos)==list:
+            if len(pos)!=2:
                 raise Exception('ERROR: Point position must be len=2 list')
-            else:
-                return self.tg.CreatePoint2d(self.unit_conv(pos[0]), self.unit_conv(pos[1]))
+            mult=self.unit_scale()
+            return self.tg.CreatePoint2d(mult*pos[0], mult*pos[1])
         elif self.SP_check(pos)==True:
-                return pos
+            return pos
+        else:
+            raise Exception('ERROR: Point position must be list of form [x,y]')
+
+    def unit_scale(self):
+        #document units to Inventor internal units (cm)
+        if self.units=='imperial':
+            return 2.54
+        elif self.units=='metric':
+            return .1
         else:
-            raise Exception('Position must be object endpoint or [x,y] position')
+            raise Exception('ERROR: Invalid units, must be imperial or metric')
+
+    def xy_array(self, xy):
+        '''
+        Converts an (N,2) array or list of points to a list of [x,y] in internal units
+        '''
+        xy=np.asarray(xy, dtype=float)
+        if xy.ndim!=2 or xy.shape[1]!=2:
+            raise Exception('ERROR: Points must be an (N,2) array of [x,y] positions')
+        return (xy*self.unit_scale()).tolist()
+
+    def bulk_sketch(self, sketch, count=None):
+        '''
+        bulk_edit scope of an iPart sketch for adding count entities, does nothing for
+        other sketch handles or when count is below bulk_min (the scope costs a few round trips)
+        '''
+        if isinstance(sketch, iPart.sketch) and (count==None or count>=self.bulk_min):
+            return sketch.bulk_edit()
+        return _no_scope()
+
+    def sketch_points(self, sketch, xy, hole_center=False):
+        '''
+        Adds sketch points at every row of the (N,2) array xy, returns an object collection
+        '''
+        sketch_obj, _, _=self.sketch_test(sketch)
+        create=self.tg.CreatePoint2d
+        add=sketch_obj.SketchPoints.Add
+        points_coll=self.new_obj_collection()
+        coll_add=points_coll.Add
+        xy=self.xy_array(xy)
+        with self.bulk_sketch(sketch, len(xy)):
+            for x, y in xy:
+                coll_add(add(create(x, y), hole_center))
+        return points_coll
+
+    def sketch_lines(self, sketch, starts, ends):
+        '''
+        Adds independent lines from each row of starts to the same row of ends (both (N,2)
+        arrays), returns an object collection
+        '''
+        sketch_obj, _, _=self.sketch_test(sketch)
+        starts=self.xy_array(starts)
+        ends=self.xy_array(ends)
+        if len(starts)!=len(ends):
+            raise Exception('ERROR: starts and ends must have the same number of points')
+        create=self.tg.CreatePoint2d
+        add=sketch_obj.SketchLines.AddByTwoPoints
+        line_coll=self.new_obj_collection()
+        coll_add=line_coll.Add
+        with self.bulk_sketch(sketch, len(starts)):
+            for (x_0, y_0), (x_1, y_1) in zip(starts, ends):
+                coll_add(add(create(x_0, y_0), create(x_1, y_1)))
+        return line_coll
+
+    def sketch_polyline(self, sketch, xy, close=False):
+        '''
+        Adds connected lines through the rows of the (N,2) array xy, consecutive lines share
+        their sketch points. If close the last point is joined to the first, returns an
+        object collection
+        '''
+        sketch_obj, _, _=self.sketch_test(sketch)
+        pts=self.xy_array(xy)
+        if len(pts)<2:
+            raise Exception('ERROR: Polyline needs at least 2 points')
+        create=self.tg.CreatePoint2d
+        add=sketch_obj.SketchLines.AddByTwoPoints
+        line_coll=self.new_obj_collection()
+        coll_add=line_coll.Add
+        start_pt=create(pts[0][0], pts[0][1])
+        first=None
+        with self.bulk_sketch(sketch, len(pts)):
+            for x, y in pts[1:]:
+                line=add(start_pt, create(x, y))
+                coll_add(line)
+                if first==None:
+                    first=line
+                start_pt=line.EndSketchPoint
+            if close==True:
+                coll_add(add(start_pt, first.StartSketchPoint))
+        return line_coll
             
     def undo(self):
         undoDef=self.cmdManager.ControlDefinitions.Item("AppUndoCmd")
@@ -666,24 +1117,24 @@ class iPart(com_obj):
         self.extrude_num+=1
         self.extrude_list.append(self.extrude_num)
         if operation=='join':
-            op=constants.kJoinOperation
+            op=self.constants.kJoinOperation
         elif operation=='intersect':
-            op=constants.kIntersectOperation
+            op=self.constants.kIntersectOperation
         elif operation=='cut':
-            op=constants.kCutOperation
+            op=self.constants.kCutOperation
         elif operation=='new_form':
-            op=constants.kNewBodyOperation
+            op=self.constants.kNewBodyOperation
         elif operation=='surface':
-            op=constants.kSurfaceOperation
+            op=self.constants.kSurfaceOperation
         else:
             raise Exception('ERROR: Operation must be either join, cut, intersect, new_form, or surface.')
         
         if direction=='positive':
-            extrude_dir=constants.kPositiveExtentDirection
+            extrude_dir=self.constants.kPositiveExtentDirection
         elif direction=='negative':
-            extrude_dir=constants.kNegativeExtentDirection
+            extrude_dir=self.constants.kNegativeExtentDirection
         elif direction=='symmetric':
-            extrude_dir=constants.kSymmetricExtentDirection
+            extrude_dir=self.constants.kSymmetricExtentDirection
         else:
             raise Exception('ERROR: Extrude direction must be positive, negative, or symmetric')
         if obj_collection==None:
@@ -715,15 +1166,15 @@ class iPart(com_obj):
             raise Exception('ERROR: Revolve axis must be SketchLine object or cardinal axis')
         
         if operation=='join':
-            op=constants.kJoinOperation
+            op=self.constants.kJoinOperation
         elif operation=='intersect':
-            op=constants.kIntersectOperation
+            op=self.constants.kIntersectOperation
         elif operation=='cut':
-            op=constants.kCutOperation
+            op=self.constants.kCutOperation
         elif operation=='new_form':
-            op=constants.kNewBodyOperation
+            op=self.constants.kNewBodyOperation
         elif operation=='surface':
-            op=constants.kSurfaceOperation
+            op=self.constants.kSurfaceOperation
         else:
             raise Exception('ERROR: Operation must be either join, cut, intersect, new_form, or surface.')
         
@@ -754,24 +1205,24 @@ class iPart(com_obj):
             raise Exception('ERROR: Revolve axis must be SketchLine object or cardinal axis')
         
         if operation=='join':
-            op=constants.kJoinOperation
+            op=self.constants.kJoinOperation
         elif operation=='intersect':
-            op=constants.kIntersectOperation
+            op=self.constants.kIntersectOperation
         elif operation=='cut':
-            op=constants.kCutOperation
+            op=self.constants.kCutOperation
         elif operation=='new_form':
-            op=constants.kNewBodyOperation
+            op=self.constants.kNewBodyOperation
         elif operation=='surface':
-            op=constants.kSurfaceOperation
+            op=self.constants.kSurfaceOperation
         else:
             raise Exception('ERROR: Operation must be either join, cut, intersect, new_form, or surface.')
         
         if direction=='positive':
-            extrude_dir=constants.kPositiveExtentDirection
+            extrude_dir=self.constants.kPositiveExtentDirection
         elif direction=='negative':
-            extrude_dir=constants.kNegativeExtentDirection
+            extrude_dir=self.constants.kNegativeExtentDirection
         elif direction=='symmetric':
-            extrude_dir=constants.kSymmetricExtentDirection
+            extrude_dir=self.constants.kSymmetricExtentDirection
         else:
             raise Exception('ERROR: Extrude direction must be positive, negative, or symmetric')
     
@@ -805,7 +1256,9 @@ class iPart(com_obj):
         else:
             pass
             
-        if self.units=='imperial':
+        if type(angle)==str:
+            rot_angle=angle
+        elif self.units=='imperial':
             rot_angle='%.3f deg'%angle
         elif self.units=='radian':
             rot_angle='%.3f rad'%angle
@@ -837,9 +1290,9 @@ class iPart(com_obj):
             pass
           
         if fit_within_len==False:
-            space_type=constants.kDefault
+            space_type=self.constants.kDefault
         elif fit_within_len==True:
-            space_type=constants.kFitted
+            space_type=self.constants.kFitted
         else:
             raise Exception('ERROR: fit within length must be boolean')
             
@@ -850,7 +1303,7 @@ class iPart(com_obj):
         else:
             raise Exception('ERROR: direction must be positive of negative')
         
-        pat_def=self.compdef.Features.RectangularPatternFeatures.CreateDefinition(obj_collection, axis, direction, int(count), self.unit_conv(spacing), space_type)
+        pat_def=self.compdef.Features.RectangularPatternFeatures.CreateDefinition(obj_collection, axis, direction, count if type(count)==str else int(count), self.unit_conv(spacing), space_type)
         pat_feat=self.compdef.Features.RectangularPatternFeatures.AddByDefinition(pat_def)
         return pat_feat
         
@@ -875,11 +1328,11 @@ class iPart(com_obj):
             raise TypeError('ERROR: Invalid plane desciptor, (xy, xz, yz) or Inventor plane object')
 
         if compute_type=='identical':
-            comp_type=constants.kIdenticalCompute
+            comp_type=self.constants.kIdenticalCompute
         elif compute_type=='optimized':
-            comp_type=constants.kOptimizedCompute
+            comp_type=self.constants.kOptimizedCompute
         elif compute_type=='adjusted':
-            comp_type=constants.kAdjustToModelCompute
+            comp_type=self.constants.kAdjustToModelCompute
         else:
             raise Exception('Compute-type must be identical, optimized, or adjusted...may need to play around with.')
 
@@ -919,31 +1372,76 @@ class iPart(com_obj):
         arc_lines=sketch_obj.SketchArcs
         return arc_lines.AddByCenterStartEndPoint(center_pt, start_pt, end_pt, flip)
     
+    def _extent_dir(self, direction):
+        if direction=='positive':
+            return self.constants.kPositiveExtentDirection
+        elif direction=='negative':
+            return self.constants.kNegativeExtentDirection
+        elif direction=='symmetric':
+            return self.constants.kSymmetricExtentDirection
+        else:
+            raise Exception('ERROR: Extrude direction must be positive, negative, or symmetric')
+
     def new_hole(self,sketch, pos, dia, depth, direction='negative', FlatBottom=False, BottomTipAngle=None):
+        '''
+        Drilled hole at the point pos (a work point is made for it), or one hole feature at
+        every point of the list pos. Use hole_array for large arrays, it splits the centers
+        over several features.
+        '''
+        if type(pos)==list and pos!=[]:
+            return self.hole_array(sketch, pos, dia, depth, direction, FlatBottom, BottomTipAngle, chunk_size=len(pos))[0]
+        
         sketch_obj, sketch_num, plane=self.sketch_test(sketch)
         dia=self.unit_conv(dia)
         depth=self.unit_conv(depth)
         self.hole_num+=1
         self.hole_list.append(self.hole_num)
         
-        if direction=='positive':
-            extent_dir=constants.kPositiveExtentDirection
-        elif direction=='negative':
-            extent_dir=constants.kNegativeExtentDirection
-        elif direction=='symmetric':
-            extent_dir=constants.kSymmetricExtentDirection
-        else:
-            raise Exception('ERROR: Extrude direction must be positive, negative, or symmetric')
+        extent_dir=self._extent_dir(direction)
         
         if type(pos)==tuple:
             work_point=self.fixed_work_point(sketch, pos)
             hole_placement=self.compdef.Features.HoleFeatures.CreatePointPlacementDefinition(work_point, plane.plane_obj)
-        elif type(pos)==list and pos!=[]:
-            points_coll=self.sketch_point_coll(sketch, pos)
-            hole_placement=self.compdef.Features.HoleFeatures.CreateSketchPlacementDefinition(points_coll)
             
         hole_feature=self.compdef.Features.HoleFeatures.AddDrilledByDistanceExtent(hole_placement, dia, depth, extent_dir, FlatBottom, BottomTipAngle)    
         return hole_feature
+
+    def hole_array(self, sketch, xy, dia, depth, direction='negative', FlatBottom=False, BottomTipAngle=None, chunk_size=None):
+        '''
+        Drilled holes at every row of the (N,2) array xy. The centers are added to sketch
+        as hole center points in one deferred sketch edit (no work points), and drilled by
+        one hole feature per chunk_size centers (default hole_chunk), since a single
+        feature with tens of thousands of centers is too much for Inventor to compute.
+        Returns the list of hole features.
+        '''
+        sketch_obj, _, _=self.sketch_test(sketch)
+        extent_dir=self._extent_dir(direction)
+        dia=self.unit_conv(dia)
+        depth=self.unit_conv(depth)
+        if chunk_size==None:
+            chunk_size=self.hole_chunk
+        if len(xy)==0:
+            raise Exception('ERROR: Need at least one hole position')
+        xy=self.xy_array(xy)
+        create=self.tg.CreatePoint2d
+        add=sketch_obj.SketchPoints.Add
+        chunks=[]
+        with self.bulk_sketch(sketch, len(xy)):
+            for start in range(0, len(xy), chunk_size):
+                points_coll=self.new_obj_collection()
+                coll_add=points_coll.Add
+                for x, y in xy[start:start+chunk_size]:
+                    coll_add(add(create(x, y), True))
+                chunks.append(points_coll)
+        
+        hole_features=self.compdef.Features.HoleFeatures
+        holes=[]
+        for points_coll in chunks:
+            self.hole_num+=1
+            self.hole_list.append(self.hole_num)
+            hole_placement=hole_features.CreateSketchPlacementDefinition(points_coll)
+            holes.append(hole_features.AddDrilledByDistanceExtent(hole_placement, dia, depth, extent_dir, FlatBottom, BottomTipAngle))
+        return holes
     
     def new_threaded_hole(self, sketch, pos, depth, thread_dia, thread_pitch, thread_depth, direction='negative', right_handed=True, FlatBottom=False, BottomTipAngle=None):
         sketch_obj, sketch_num, plane=self.sketch_test(sketch)
@@ -952,14 +1450,7 @@ class iPart(com_obj):
         self.hole_num+=1
         self.hole_list.append(self.hole_num)
         
-        if direction=='positive':
-            extent_dir=constants.kPositiveExtentDirection
-        elif direction=='negative':
-            extent_dir=constants.kNegativeExtentDirection
-        elif direction=='symmetric':
-            extent_dir=constants.kSymmetricExtentDirection
-        else:
-            raise Exception('ERROR: Extrude direction must be positive, negative, or symmetric')
+        extent_dir=self._extent_dir(direction)
         
         if thread_dia[0].upper()=='M':
             thread_type='metric'
@@ -967,7 +1458,8 @@ class iPart(com_obj):
         else:
             thread_type='unified'
             
-        if thread_depth>=depth:
+        #expressions can't be compared here, the thread depth is given to Inventor as is
+        if type(depth)!=str and type(thread_depth)!=str and thread_depth>=depth:
             full_tap_depth=True
             thread_depth=depth
         else:
@@ -990,9 +1482,15 @@ class iPart(com_obj):
     def sketch_spline(self, sketch, points):
         sketch=sketch.sketch_obj
         pt_coll=self.new_obj_collection()
-        pts=[self.point(pt) for pt in points]
-        for pt in pts:
-            pt_coll.Add(pt)
+        coll_add=pt_coll.Add
+        try:
+            create=self.tg.CreatePoint2d
+            for x, y in self.xy_array(points):
+                coll_add(create(x, y))
+        except TypeError:
+            #fit points given as sketch points
+            for pt in points:
+                coll_add(self.point(pt))
         spline=sketch.SketchSplines.Add(pt_coll)
         return spline
 
@@ -1002,37 +1500,18 @@ class iPart(com_obj):
         return lines.AddByTwoPoints(self.point(start), self.point(end))
     
     def poly_lines(self, sketch, points):
-        sketch_obj, _, _=self.sketch_test(sketch)
-        points=self.unit_conv(points)
         if len(points)<3:
             raise Exception('ERROR: Points array must be len=3 or greater')
         else:
             pass
         
-        if points[0]!=points[-1]:
-            points.append(points[0])
+        if tuple(points[0])==tuple(points[-1]):
+            points=points[:-1]
         
-        start=points[0]
-        start_pt=self.tg.CreatePoint2d(start[0], start[1])
-        lines=[]
-        self.tg=self.invApp.TransientGeometry
-        line_obj=sketch_obj.SketchLines
-        for pt in points[1:-1]:
-            stop_pt=self.tg.CreatePoint2d(pt[0], pt[1])
-            lines.append(line_obj.AddByTwoPoints(start_pt, stop_pt))
-            start_pt=lines[-1].EndSketchPoint
-            
-        lines.append(line_obj.AddByTwoPoints(start_pt, lines[0].StartSketchPoint))
-        
-        poly_line_coll=self.new_obj_collection()
-        for vals in lines:
-            poly_line_coll.Add(vals)
-            
-        return poly_line_coll
+        return self.sketch_polyline(sketch, points, close=True)
     
     def new_obj_collection(self):
-        trans_obj=self.invApp.TransientObjects
-        return trans_obj.CreateObjectCollection()
+        return self.trans_obj.CreateObjectCollection()
     
     def create_obj_collection(self, obj):
         new_coll=self.new_obj_collection()
@@ -1121,9 +1600,17 @@ class structure(object):
         self.last_dir=direction
         self.sketch=sketch
         self.part=part
-        self.obj_dict={'start':{'type':'origin', 'pts':[start]}}
+        #elements live in a columnar store, obj_dict is a read-only view of it
+        self.segments=segment_store()
+        self.segments.append('origin', [start])
+        self.obj_dict=segment_view(self.segments)
         self.obj_num=0
         
+        #record the build calls made from here on, see journal module
+        journal=part.session.journal
+        if journal!=None:
+            journal.attach_structure(self)
+        
     def obj_type_check(self, obj):
         return str(type(obj)).split(' ')[-1].split('.')[-1].split('\'')[0]
         
@@ -1131,43 +1618,41 @@ class structure(object):
         if direction == None: direction = self.last_dir
         self.last = translate_pt(self.last, ang2pt(direction, distance))
     
-    def append_element(self, obj_handle):
+    def append_element(self, obj_handle, transform=None):
         self.obj_num+=1
-        self.obj_dict['obj_%s'%str(self.obj_num)]=obj_handle
+        self.segments.append_element(obj_handle, transform)
+        self.structure_key='obj_%s'%str(self.obj_num)
+
+    def _type_pts(self, seg_types):
+        #points and keys of all elements of seg_types in obj_dict sub key order, the pool
+        #already holds them in that order except splines which only list start/end points
+        segs=self.segments
+        codes=[TYPE_CODES[val] for val in seg_types]
+        inds=np.flatnonzero(np.isin(segs.types, codes)).tolist()
+        spline=TYPE_CODES['spline']
+        rows=[]
+        for ind in inds:
+            off=int(segs.offsets[ind])
+            count=int(segs.counts[ind])
+            if segs.types[ind]==spline:
+                rows+=[off, off+count-1]
+            else:
+                rows.extend(range(off, off+count))
+        pts=[tuple(pt) for pt in segs.pool[rows].tolist()]
+        return pts, [self.obj_dict.key(ind) for ind in inds]
     
     def get_pts(self):
-        pts=[self.obj_dict['start']['pts'][0]]
-        obj_keys=[]
-        for key in iter(self.obj_dict.keys()):
-            if "point" in self.obj_dict[key]['type']:
-                pts+=self.obj_dict[key]['pts']
-                obj_keys.append(key)
-        pts=remove_duplicate_pts(pts)
+        pts, obj_keys=self._type_pts(('point', 'point_line', 'point_arc'))
+        pts=remove_duplicate_pts([self.segments.start_pt(0)]+pts)
         return [pts, obj_keys]
         
     def get_line_pts(self):
-        pts=[]
-        obj_keys=[]
-        for key in iter(self.obj_dict.keys()):
-            if "line" in self.obj_dict[key]['type']:
-                if "point" in self.obj_dict[key]['type']:
-                    pass
-                else:
-                    for sub_key in iter(self.obj_dict[key]):
-                        if "_pt" in sub_key:
-                            pts.append(self.obj_dict[key][sub_key])
-                    obj_keys.append(key)
+        pts, obj_keys=self._type_pts(('line', 'line_arc', 'spline'))
         pts.append(pts[0])
         return [pts, obj_keys]  
     
     def get_poly_pts(self):
-        pts=[]
-        obj_keys=[]
-        for key in iter(self.obj_dict.keys()):
-            if "poly" in self.obj_dict[key]['type']:
-                pts+=self.obj_dict[key]['pts']
-                obj_keys.append(key)
-        return [pts, obj_keys]
+        return list(self._type_pts(('poly',)))
     
     def draw_poly(self, item=1):
         sketch=self.sketch
@@ -1194,7 +1679,7 @@ class structure(object):
     def draw_path(self, item='all', close_path=False):
         sketch=self.sketch
         obj_dict=self.obj_dict
-        if len(list(obj_dict.keys()))<2:
+        if len(obj_dict)<2:
             raise Exception('ERROR: Object list is empty')
         else: 
             pass
@@ -1217,7 +1702,7 @@ class structure(object):
                 obj_keys=[]
                 for keys in item:
                     if keys in obj_dict.keys():
-                        obj_keys.append()
+                        obj_keys.append(keys)
                     else:
                         raise Exception('ERROR: Invalid structure key')
             else:
@@ -1236,37 +1721,40 @@ class structure(object):
         
         first_pt=start_pt
         
-        for key in obj_keys:
-            s_copy=copy.deepcopy(obj_dict)
-            s_copy[key]['start_pt']=start_pt
-            if obj_dict[key]['type']=='line_arc':
-                lines.append(self.draw_line_arc(s_copy, key))
-            elif obj_dict[key]['type']=='line':
-                lines.append(self.draw_line(s_copy, key))
-            elif obj_dict[key]['type']=='spline':
-                lines.append(self.draw_spline(s_copy, key))
-                if len(lines)>1:
-                    lines[-1].StartSketchPoint.Merge(lines[-2].EndSketchPoint)
+        #one sketch solve for the whole path
+        with self.part.bulk_sketch(sketch, len(obj_keys)):
+            for key in obj_keys:
+                #only the element being drawn needs the running start point
+                obj=dict(obj_dict[key])
+                obj['start_pt']=start_pt
+                if obj['type']=='line_arc':
+                    lines.append(self.draw_line_arc({key: obj}, key))
+                elif obj['type']=='line':
+                    lines.append(self.draw_line({key: obj}, key))
+                elif obj['type']=='spline':
+                    lines.append(self.draw_spline({key: obj}, key))
+                    if len(lines)>1:
+                        lines[-1].StartSketchPoint.Merge(lines[-2].EndSketchPoint)
                 
-            end_pt_coord=round_pt(self.part.inv_unit_conv((lines[-1].EndSketchPoint.Geometry.X, lines[-1].EndSketchPoint.Geometry.Y)))
+                end_pt_coord=round_pt(self.part.inv_unit_conv((lines[-1].EndSketchPoint.Geometry.X, lines[-1].EndSketchPoint.Geometry.Y)))
 
-            if type(start_pt)==tuple:
-                start_pt_check=round_pt(start_pt)
-            else:
-                start_pt_check=round_pt(self.part.inv_unit_conv((start_pt.Geometry.X, start_pt.Geometry.Y)))
+                if type(start_pt)==tuple:
+                    start_pt_check=round_pt(start_pt)
+                else:
+                    start_pt_check=round_pt(self.part.inv_unit_conv((start_pt.Geometry.X, start_pt.Geometry.Y)))
 
-            if end_pt_coord==start_pt_check:
-                start_pt=lines[-1].StartSketchPoint
-            else:
-                start_pt=lines[-1].EndSketchPoint
+                if end_pt_coord==start_pt_check:
+                    start_pt=lines[-1].StartSketchPoint
+                else:
+                    start_pt=lines[-1].EndSketchPoint
         
-        if close_path==True and first_pt!=final_pt:
-            line_obj=sketch.sketch_obj.SketchLines
-            lines.append(line_obj.AddByTwoPoints(start_pt, lines[0].StartSketchPoint))
-        elif close_path==True and first_pt==final_pt:
-            start_pt.Merge(lines[0].StartSketchPoint)
-        else:
-            pass
+            if close_path==True and first_pt!=final_pt:
+                line_obj=sketch.sketch_obj.SketchLines
+                lines.append(line_obj.AddByTwoPoints(start_pt, lines[0].StartSketchPoint))
+            elif close_path==True and first_pt==final_pt:
+                start_pt.Merge(lines[0].StartSketchPoint)
+            else:
+                pass
         
         obj_coll=self.part.new_obj_collection()
         for vals in lines:
@@ -1276,7 +1764,7 @@ class structure(object):
 
     def get_plt_pts(self, item='all', close_path=False, curve_res=10):
         obj_dict=self.obj_dict
-        if len(list(obj_dict.keys()))<2:
+        if len(obj_dict)<2:
             raise Exception('ERROR: Object list is empty')
         else: 
             pass
@@ -1299,7 +1787,7 @@ class structure(object):
                 obj_keys=[]
                 for keys in item:
                     if keys in obj_dict.keys():
-                        obj_keys.append()
+                        obj_keys.append(keys)
                     else:
                         raise Exception('ERROR: Invalid structure key')
             else:
@@ -1315,24 +1803,32 @@ class structure(object):
         pts=[]
 
         for key in obj_keys:
-            s_copy=copy.deepcopy(obj_dict)
-            s_copy[key]['start_pt']=start_pt
-            if obj_dict[key]['type']=='line_arc':
-                start=obj_dict[key]['start_pt']
-                end=obj_dict[key]['end_pt']
-                center=obj_dict[key]['center_pt']
-                arc_pts=arc_pts_pattern(start, end, center, curve_res)
-                for pt in arc_pts:
-                    pts.append(pt)
-            elif obj_dict[key]['type']=='line':
-                line_pts=[obj_dict[key]['start_pt'], obj_dict[key]['end_pt']]
-                for pt in line_pts:
-                    pts.append(pt)
-            elif obj_dict[key]['type']=='spline':
-                for pt in obj_dict[key]['pts']:
-                    pts.append(pt)
+            obj=obj_dict[key]
+            if obj['type']=='line_arc':
+                pts.extend(arc_pts_pattern(obj['start_pt'], obj['end_pt'], obj['center_pt'], curve_res))
+            elif obj['type']=='line':
+                pts.append(obj['start_pt'])
+                pts.append(obj['end_pt'])
+            elif obj['type']=='spline':
+                pts.extend(obj['pts'])
         return pts
             
+
+    def validate(self, item='all', close_path=False, tol=1e-6, curve_res=10):
+        '''
+        Checks the path (or a poly element) for closure and self-intersections without
+        any COM call, see the validate module. close_path is as for draw_path. Returns
+        the validate_path report.
+        '''
+        if type(item)==int:
+            item='obj_%s'%str(item)
+        if type(item)==str and item!='all' and self.obj_dict[item]['type']=='poly':
+            pts=list(self.obj_dict[item]['pts'])
+        else:
+            pts=self.get_plt_pts(item, curve_res=curve_res)
+        if close_path==True and len(pts)>0:
+            pts.append(pts[0])
+        return validate_path(pts, True, tol)
                 
     def draw_line_arc(self,  obj_dict, item):
         sketch=self.sketch
@@ -1392,21 +1888,71 @@ class structure(object):
         spline=self.part.sketch_spline(sketch, obj['pts'])
         return spline
 
-    def add_bspline(self, num_pts, control_pts, degree=3, flip_dir=False, rotation=None, mirror=False, mirror_angle=0):
-        points=b_spline(control_pts, num=num_pts, degree=degree)
+    def fit_curves(self, tol=2e-5, types=('spline',), min_pts=4):
+        '''
+        Replaces runs of min_pts or more points of the elements of types lying on a line or
+        circular arc within tol (a little over the 5 digit rounding of the added points) by
+        single line and line_arc elements, see the fitting module. Points no run covers
+        stay a spline (lines for point types), a spline whose fit would not be cheaper to
+        draw is left as it is. Point elements (point_line, point_arc) are only fitted when
+        in types, they then become part of the drawn path. Returns the number of elements
+        after fitting.
+        '''
+        old=self.segments
+        codes=[TYPE_CODES[val] for val in types]
+        new=segment_store(old.n, old.n_pts)
+        for ind in range(old.n):
+            seg_type=old.seg_type(ind)
+            pts=old.points(ind)
+            if ind==0 or old.types[ind] not in codes or len(pts)<3:
+                new.append(seg_type, pts, int(old.flags[ind]))
+                continue
+            xy=dedupe_xy(pts)
+            fitted=[]
+            for kind, i, j, center, ccw in fit_runs(xy, tol, min_pts):
+                if kind=='arc':
+                    fitted.append(('line_arc', [center, xy[i], xy[j]], int(ccw)))
+                elif kind=='line' or j-i==1:
+                    fitted.append(('line', [xy[i], xy[j]], 0))
+                elif seg_type=='spline':
+                    fitted.append(('spline', xy[i:j+1], 0))
+                else:
+                    fitted.extend(('line', xy[k:k+2], 0) for k in range(i, j))
+            #a spline is kept when its fit would cost Inventor more, counting the points
+            #sent and about two extra round trips per entity
+            if seg_type=='spline' and sum(len(val[1])+2 for val in fitted)>=len(pts)+2:
+                new.append(seg_type, pts)
+                continue
+            for fit_type, fit_pts, flag in fitted:
+                new.append(fit_type, fit_pts, flag)
+        self.segments=new
+        self.obj_dict=segment_view(new)
+        self.obj_num=new.n-1
+        self.structure_key='obj_%s'%str(self.obj_num)
+        return self.obj_num
+
+    def add_bspline(self, num_pts, control_pts, degree=3, flip_dir=False, rotation=None, mirror=False, mirror_angle=0, clamped=False):
+        '''
+        Adds a spline through num_pts points, a Bezier curve of the control points or, with
+        clamped=True, a clamped uniform B-spline (use for long control polygons)
+        '''
+        if clamped==True:
+            points=bspline_xy(control_pts, num=num_pts, degree=degree)
+        else:
+            points=b_spline_xy(control_pts, num=num_pts, degree=degree)
         if flip_dir==True:
             points=points[::-1]
+        p_0=tuple(points[0].tolist())
+        #rotation, mirror and the move to self.last are applied as one transform when drawn
+        xform=affine()
         if rotation!=None:
-            points=rotate_pts(points, angle=rotation, center=points[0])
+            xform=xform.rotate(rotation, center=p_0)
         if mirror==True:
-            points=mirror_pts(points, axis_angle=mirror_angle, axis_pt=points[0])
-        dx=self.last[0]-points[0][0]
-        dy=self.last[1]-points[0][1]
-        new_pts=translate_pts(points, (dx, dy))
-        spline_obj={'type':'spline','pts':new_pts, 'start_pt':new_pts[0], 'end_pt':new_pts[-1]}
-        self.last=new_pts[-1]
-        self.append_element(spline_obj)
-        self.structure_key=list(self.obj_dict.keys())[-1]
+            xform=xform.mirror(mirror_angle, axis_pt=p_0)
+        xform=xform.translate((self.last[0]-p_0[0], self.last[1]-p_0[1]))
+        self.last=xform.apply_pt(points[-1])
+        spline_obj={'type':'spline', 'pts':points}
+        self.append_element(spline_obj, xform)
 
     def add_point_arc(self, start_angle=0, stop_angle=180, radius=1, segments=9, flip_dir=False, mirror=False, rotation=0):
         start=round_pt(self.last)
@@ -1424,18 +1970,15 @@ class structure(object):
         center_pt=round_pt(translate_pt(start, ang2pt(center_dir, radius)))
         start_angle=init_angle+start_angle+rotation
         stop_angle=init_angle+stop_angle+rotation
-        pts=arc_pattern(start_angle, stop_angle, radius, center_pt, segments)
-        if mirror==False:
-            pass
-        else:
-            pts=mirror_pts(pts, rotation-90, center_pt)
-        pts=round_pts(pts)
+        xy=arc_xy(start_angle, stop_angle, radius, center_pt, segments)
+        if mirror!=False:
+            xy=mirror_xy(xy, rotation-90, center_pt)
+        pts=round_pts(xy.tolist())
         self.last=pts[-1]
         self.last_dir=stop_angle
-        point_obj={'type':'point_arc', 'pts':round_pts(pts)}
+        point_obj={'type':'point_arc', 'pts':pts}
         self.append_element(point_obj)
-        self.structure_key=list(self.obj_dict.keys())[-1]
-        self.pts=round_pts(pts)
+        self.pts=pts
     
     def add_line(self, distance, direction):
         self.pts=[round_pt(self.last)]
@@ -1445,7 +1988,28 @@ class structure(object):
         self.last_dir=direction
         line_obj={'type':'line', 'start_pt':self.pts[0], 'end_pt':self.pts[1]}
         self.append_element(line_obj)
-        self.structure_key=list(self.obj_dict.keys())[-1]
+    
+    def add_polyline(self, xy):
+        '''
+        Adds lines from the last point through each point of xy ((n,2) array or list of
+        points, absolute coordinates), e.g. a contour simplified by PyInventor.contour.
+        A first point equal to the last point is skipped.
+        '''
+        xy=as_xy(xy)
+        if len(xy)==0:
+            return
+        if round_pt(tuple(xy[0].tolist()))==round_pt(self.last):
+            xy=xy[1:]
+        if len(xy)==0:
+            return
+        pts=np.vstack((np.asarray([self.last], dtype=np.float64), xy))
+        self.segments.append_lines(pts)
+        self.obj_num+=len(xy)
+        self.structure_key='obj_%s'%str(self.obj_num)
+        end_dir=pts[-1]-pts[-2]
+        self.last=tuple(pts[-1].tolist())
+        self.last_dir=float(np.degrees(np.arctan2(end_dir[1], end_dir[0])))
+        self.pts=[tuple(pts[-2].tolist()), self.last]
         
     def add_point_line(self, distance, direction, num_points):
         start=self.last
@@ -1457,7 +2021,6 @@ class structure(object):
         self.last_dir=direction
         point_obj={'type':'point_line', 'pts':pts }
         self.append_element(point_obj)
-        self.structure_key=list(self.obj_dict.keys())[-1]
         self.pts=pts
     
     def add_line_arc(self, start_angle=0, stop_angle=180, radius=1, flip_dir=False, mirror=False, rotation=0):
@@ -1477,7 +2040,6 @@ class structure(object):
         self.last_dir=stop_angle
         line_obj={'type':'line_arc', 'center_pt':center_pt, 'start_pt': start, 'end_pt':self.last, 'flip':flip_dir}
         self.append_element(line_obj)
-        self.structure_key=list(self.obj_dict.keys())[-1]
         
     def add_point(self, offset, ref_pt=None):
         if ref_pt==None:
@@ -1494,206 +2056,15 @@ class structure(object):
         self.last=end_pt
         point_obj={'type':'point', 'pts':[end_pt]}
         self.append_element(point_obj)
-        self.structure_key=list(self.obj_dict.keys())[-1]
         self.pts=round_pt(end_pt)
         
 
 
 def get_next_filename(datapath,prefix,suffix=''):
     ii = next_file_index(datapath, prefix)
-    return "%05d_" % (ii) + prefix +suffix
+    return numbered_name(ii, prefix, suffix)
 
 def next_file_index(datapath,prefix=''):
-    """Searches directories for files of the form *_prefix* and returns next number
-        in the series"""
-
-    dirlist=glob.glob(os.path.join(datapath,'*_'+prefix+'*'))
-    dirlist.sort()
-    try:
-        ii=int(os.path.split(dirlist[-1])[-1].split('_')[0])+1
-    except:
-        ii=0
-    return ii
-        
-def round_pt(pt, digits=5):
-    return (round(pt[0], digits), round(pt[1], digits))
-
-def round_pts(pts, digits=5):
-    return [(round(pt[0], digits), round(pt[1], digits)) for pt in pts]
-
-        
-def remove_duplicate_pts(seq):
-    seen = set()
-    seen_add = seen.add
-    return [x for x in seq if not (x in seen or seen_add(x))]
-
-def distance(tuple1, tuple2):
-    dx = tuple1[0] - tuple2[0]
-    dy = tuple1[1] - tuple2[1]
-    return sqrt(dx ** 2 + dy ** 2)
-
-
-def ang2pt(direction, distance):
-    theta = np.pi * direction / 180
-    dx = distance * cos(theta)
-    dy = distance * sin(theta)
-    return (dx, dy)
-
-
-def vec_rot(vector, angle):
-    rot_matrix=np.array([[np.cos(angle),-np.sin(angle)],[np.sin(angle),np.cos(angle)]])
-    return np.dot(rot_matrix, vector)
-
-def arc_pts_pattern(start, end, center, num_pts, return_list=True, dir=None):
-    P_1=center
-    P_2=start
-    P_3=end
-    D_12=distance(P_1, P_2)
-    D_13=distance(P_1, P_3)
-    D_23=distance(P_2, P_3)
-    ang=np.arccos((D_12**2+D_13**2-D_23**2)/(2*D_12*D_13))
-    ang_trans=ang/(num_pts-1)
-    start_dir=np.array([(P_2[0]-P_1[0])/D_12, (P_2[1]-P_1[1])/D_12])
-    end_dir=np.array([(P_3[0]-P_1[0])/D_13, (P_3[1]-P_1[1])/D_13])
-    dir_check=np.sign(np.cross(start_dir, end_dir))
-    if dir_check==0 and type(dir)!=type(None):
-        dir=dir
-    elif dir_check==0 and type(dir)==type(None):
-        dir=1
-    else:
-        dir=dir_check
-    pts=[]
-    new_ang=0
-    for i in range(num_pts):
-        new_vec=D_12*vec_rot(start_dir, dir*new_ang)
-        pts.append((center[0]+new_vec[0], center[1]+new_vec[1]))
-        new_ang+=ang_trans
-    if return_list==False:
-        return np.transpose(np.array(pts))
-    else:
-        return pts
-def mirror_x(pts, xline, concatenate=True):
-    if concatenate==True:
-        pts_x=np.concatenate((pts[0], xline-pts[0][::-1]))
-        pts_y=np.concatenate((pts[1], pts[1][::-1]))
-        return np.array([pts_x, pts_y])
-    else:
-        return np.array([xline-pts[0], pts[1]])
-
-def rotate_pt(p, angle, center=(0, 0)):
-    """rotates point p=(x,y) about point center (defaults to (0,0)) by CCW angle (in degrees)"""
-    dx = p[0] - center[0]
-    dy = p[1] - center[1]
-    theta = np.pi * angle / 180.
-    return (center[0] + dx * cos(theta) - dy * sin(theta), center[1] + dx * sin(theta) + dy * cos(theta))
-
-
-def rotate_pts(points, angle, center=(0, 0)):
-    """Rotates an array of points one by one using rotate_pt"""
-    return [rotate_pt(p, angle, center) for p in points]
-
-
-def translate_pt(p, offset):
-    """Translates point p=(x,y) by offset=(x,y)"""
-    return (p[0] + offset[0], p[1] + offset[1])
-
-
-def translate_pts(points, offset):
-    """Translates an array of points one by one using translate_pt"""
-    return [translate_pt(p, offset) for p in points]
-
-
-def orient_pt(p, angle, offset):
-    """Orient_pt rotates point p=(x,y) by angle (in degrees) and then translates it to offset=(x,y)"""
-    return translate_pt(rotate_pt(p, angle), offset)
-
-
-def orient_pts(points, angle, offset):
-    """Orients an array of points one by one using orient_pt"""
-    return [orient_pt(p, angle, offset) for p in points]
-
-
-def scale_pt(p, scale):
-    """Scales p=(x,y) by scale"""
-    return (p[0] * scale[0], p[1] * scale[1])
-
-
-def scale_pts(points, scale):
-    """Scales an array of points one by one using scale_pt"""
-    return [scale_pt(p, scale) for p in points]
-
-
-def mirror_pt(p, axis_angle, axis_pt):
-    """Mirrors point p about a line at angle "axis_angle" intercepting point "axis_pt" """
-    theta = axis_angle * np.pi / 180.
-    return (axis_pt[0] + (-axis_pt[0] + p[0]) * cos(2 * theta) + (-axis_pt[1] + p[1]) * sin(2 * theta),
-            p[1] + 2 * (axis_pt[1] - p[1]) * cos(theta) ** 2 + (-axis_pt[0] + p[0]) * sin(2 * theta) )
-
-
-def mirror_pts(points, axis_angle, axis_pt):
-    """Mirrors an array of points one by one using mirror_pt"""
-    return [mirror_pt(p, axis_angle, axis_pt) for p in points]
-
-def arc_pattern(start_angle, stop_angle, radius, center_pt=(2,1), segments=9):
-    if type(center_pt)==tuple or type(center_pt)==list:
-        if len(center_pt)==2:
-            pass
-        else:
-            raise Exception('ERROR: Center_pt must be list of len=2 of form [x,y]')
-    else:
-        raise Exception('ERROR: Invalid type, centerpoint must be list len=2 of form [x,y]')
-    pts = []
-    x_0=center_pt[0]
-    y_0=center_pt[1]
-    for ii in range(segments):
-        theta = (start_angle + ii / (segments - 1.) * (stop_angle - start_angle)) * pi / 180.
-        p = (x_0+radius * cos(theta), y_0+radius * sin(theta))
-        pts.append(p)
-    return pts
-
-
-def circle_pattern(radius, center_pt=(0,0), segments=3, offset=0):
-    if type(center_pt)==tuple or type(center_pt)==list:
-        if len(center_pt)==2:
-            pass
-        else:
-            raise Exception('ERROR: Center_pt must be list of len=2 of form [x,y]')
-    else:
-        raise Exception('ERROR: Invalid type, centerpoint must be list len=2 of form [x,y]')
-    pts = []
-    x_0=center_pt[0]
-    y_0=center_pt[1]
-    rot_ang=360/segments
-    theta=offset*np.pi/180
-    for ii in range(segments):
-        p = (x_0+radius * cos(theta), y_0+radius * sin(theta))
-        theta += rot_ang * pi / 180.
-        pts.append(p)
-    return pts
-
-def bernstein_poly(order, k):
-    """
-    Bernstein polynomial.
-
-    """
-    coeff = binom(order, k)
-    def _bpoly(x):
-        return coeff * x ** k * (1 - x) ** (order - k)
-
-    return _bpoly
-
-
-def b_spline(c_points, num=200, degree=3):
-    """
-    Build Bézier curve from control points.
-
-    """
-    N = len(c_points)
-    # Prevent degree from exceeding count-1, otherwise splev will crash
-    degree = np.clip(degree,1,N-1)
-
-    t = np.linspace(0, 1, num=num)
-    curve = np.zeros((num, 2))
-    for ii in range(N):
-        curve += np.outer(bernstein_poly(degree , ii)(t), c_points[ii])
-    return [tuple(pt) for pt in curve]
+    """Allocates the next number in the series of files of the form NNNNN_prefix* in
+        datapath, see file_index"""
+    return file_index(datapath).next_index(prefix)
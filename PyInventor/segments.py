@@ -0,0 +1,233 @@
+import numpy as np
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+'''
+
+Columnar element store for structure. Elements are kept as a type code array plus
+offsets/counts into one shared (M,2) float point pool, all backed by growable NumPy
+buffers, so appends are amortized O(1) and a line segment costs ~50 bytes instead of
+a dict of tuples.
+
+segment_view exposes the store with the historical structure.obj_dict layout:
+
+    obj_dict['start']   -> {'type':'origin', 'pts':[start]}
+    obj_dict['obj_N']   -> the N-th element as a dict, built on access
+
+Point layout per element type in the pool:
+
+    origin                          [start]
+    line                            [start, end]
+    line_arc                        [center, start, end]   (flip kept in flags)
+    spline, point, point_line,
+    point_arc, poly                 pts
+
+An element can be appended with a pending geometry.affine transform, its raw points are
+stored as given and the transform is applied in place the first time the points are read
+(drawing, plotting or exporting), so generated elements are transformed in one multiply.
+
+'''
+
+SEGMENT_TYPES=('origin', 'line', 'line_arc', 'spline', 'point', 'point_line', 'point_arc', 'poly')
+TYPE_CODES=dict((name, code) for code, name in enumerate(SEGMENT_TYPES))
+
+
+class segment_store(object):
+    def __init__(self, capacity=16, pt_capacity=32):
+        self.n=0
+        self.n_pts=0
+        self._types=np.empty(capacity, dtype=np.int8)
+        self._flags=np.zeros(capacity, dtype=np.int8)
+        self._offsets=np.empty(capacity, dtype=np.int64)
+        self._counts=np.empty(capacity, dtype=np.int32)
+        self._pool=np.empty((pt_capacity, 2), dtype=np.float64)
+        self._pending={}
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def types(self):
+        return self._types[:self.n]
+
+    @property
+    def flags(self):
+        return self._flags[:self.n]
+
+    @property
+    def offsets(self):
+        return self._offsets[:self.n]
+
+    @property
+    def counts(self):
+        return self._counts[:self.n]
+
+    @property
+    def pool(self):
+        self.materialize()
+        return self._pool[:self.n_pts]
+
+    def nbytes(self):
+        return self._types.nbytes+self._flags.nbytes+self._offsets.nbytes+self._counts.nbytes+self._pool.nbytes
+
+    def _grow(self, n, n_pts):
+        if n>len(self._types):
+            size=max(n, 2*len(self._types))
+            for name in ('_types', '_flags', '_offsets', '_counts'):
+                old=getattr(self, name)
+                new=np.zeros(size, dtype=old.dtype)
+                new[:self.n]=old[:self.n]
+                setattr(self, name, new)
+        if n_pts>len(self._pool):
+            new=np.empty((max(n_pts, 2*len(self._pool)), 2), dtype=np.float64)
+            new[:self.n_pts]=self._pool[:self.n_pts]
+            self._pool=new
+
+    def append(self, seg_type, pts, flag=0, transform=None):
+        '''
+        Appends an element of seg_type with the points in pool layout order, returns its index.
+        transform is an affine applied to the points when they are first read.
+        '''
+        pts=np.asarray(pts, dtype=np.float64).reshape(-1, 2)
+        n_new=len(pts)
+        self._grow(self.n+1, self.n_pts+n_new)
+        ind=self.n
+        self._types[ind]=TYPE_CODES[seg_type]
+        self._flags[ind]=flag
+        self._offsets[ind]=self.n_pts
+        self._counts[ind]=n_new
+        self._pool[self.n_pts:self.n_pts+n_new]=pts
+        self.n_pts+=n_new
+        self.n+=1
+        if transform!=None and not transform.is_identity():
+            self._pending[ind]=transform
+        return ind
+
+    def append_lines(self, xy):
+        '''
+        Appends a line element between each pair of consecutive points of xy in one go,
+        returns the index of the first or None if xy has less than two points
+        '''
+        xy=np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        n_new=len(xy)-1
+        if n_new<1:
+            return None
+        self._grow(self.n+n_new, self.n_pts+2*n_new)
+        ind=self.n
+        rows=slice(ind, ind+n_new)
+        self._types[rows]=TYPE_CODES['line']
+        self._flags[rows]=0
+        self._offsets[rows]=self.n_pts+2*np.arange(n_new)
+        self._counts[rows]=2
+        pool=self._pool[self.n_pts:self.n_pts+2*n_new]
+        pool[0::2]=xy[:-1]
+        pool[1::2]=xy[1:]
+        self.n_pts+=2*n_new
+        self.n+=n_new
+        return ind
+
+    def materialize(self, ind=None):
+        '''
+        Applies pending transforms, of element ind or of all elements
+        '''
+        if ind==None:
+            inds=list(self._pending)
+        elif ind in self._pending:
+            inds=[ind]
+        else:
+            return
+        for ind in inds:
+            off=self._offsets[ind]
+            rows=slice(off, off+self._counts[ind])
+            self._pool[rows]=self._pending.pop(ind).apply(self._pool[rows])
+
+    def append_element(self, obj, transform=None):
+        '''
+        Appends an element given in obj_dict form
+        '''
+        seg_type=obj['type']
+        if seg_type=='line':
+            return self.append(seg_type, [obj['start_pt'], obj['end_pt']], transform=transform)
+        elif seg_type=='line_arc':
+            return self.append(seg_type, [obj['center_pt'], obj['start_pt'], obj['end_pt']], int(bool(obj['flip'])), transform)
+        elif seg_type in TYPE_CODES:
+            return self.append(seg_type, obj['pts'], transform=transform)
+        raise Exception('ERROR: Invalid structure element type %s'%str(seg_type))
+
+    def seg_type(self, ind):
+        return SEGMENT_TYPES[self._types[ind]]
+
+    def points(self, ind):
+        '''
+        (count,2) view of the element's points in the pool
+        '''
+        if ind in self._pending:
+            self.materialize(ind)
+        off=self._offsets[ind]
+        return self._pool[off:off+self._counts[ind]]
+
+    def start_pt(self, ind):
+        if self._types[ind]==TYPE_CODES['line_arc']:
+            return tuple(self.points(ind)[1].tolist())
+        return tuple(self.points(ind)[0].tolist())
+
+    def end_pt(self, ind):
+        return tuple(self.points(ind)[-1].tolist())
+
+    def element(self, ind):
+        '''
+        Element as a dict in the structure.obj_dict layout
+        '''
+        if ind<0 or ind>=self.n:
+            raise IndexError(ind)
+        seg_type=SEGMENT_TYPES[self._types[ind]]
+        pts=[tuple(pt) for pt in self.points(ind).tolist()]
+        if seg_type=='line':
+            return {'type': seg_type, 'start_pt': pts[0], 'end_pt': pts[1]}
+        elif seg_type=='line_arc':
+            return {'type': seg_type, 'center_pt': pts[0], 'start_pt': pts[1], 'end_pt': pts[2], 'flip': bool(self._flags[ind])}
+        elif seg_type=='spline':
+            return {'type': seg_type, 'pts': pts, 'start_pt': pts[0], 'end_pt': pts[-1]}
+        return {'type': seg_type, 'pts': pts}
+
+
+class segment_view(Mapping):
+    '''
+    Read-only obj_dict style mapping over a segment_store, element 0 is 'start'
+    '''
+    def __init__(self, store):
+        self.store=store
+
+    def index(self, key):
+        if key=='start':
+            return 0
+        try:
+            prefix, num=key.split('_')
+            ind=int(num)
+        except (ValueError, AttributeError):
+            raise KeyError(key)
+        if prefix!='obj' or ind<1 or ind>=self.store.n or num!=str(ind):
+            raise KeyError(key)
+        return ind
+
+    def key(self, ind):
+        return 'start' if ind==0 else 'obj_%d'%ind
+
+    def __getitem__(self, key):
+        return self.store.element(self.index(key))
+
+    def __contains__(self, key):
+        try:
+            self.index(key)
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        for ind in range(self.store.n):
+            yield self.key(ind)
+
+    def __len__(self):
+        return self.store.n
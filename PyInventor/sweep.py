@@ -0,0 +1,234 @@
+import os
+import time
+import queue
+import threading
+import traceback
+import multiprocessing
+from functools import partial
+
+'''
+
+Parallel parametric sweeps. A sweep_executor starts N workers, each with its own
+Inventor application instance (a process started with DispatchEx, not the shared
+GetActiveObject instance), and hands out part-build jobs from a queue:
+
+    def build(session, params):
+        part=session.new_part(path, 'cavity_%d.ipt'%params['n'])
+        ...
+        return part.save()
+
+    sweep=sweep_executor(build, workers=8)
+    results=sweep.run([{'n': n, 'radius': r} for n, r in variants])
+    print(sweep.report())
+
+build(session, params) is called once per job with the worker's inv_session, which is
+set up once per worker so each part skips the connection and typelib setup
+(session.backend is the worker's backend). build returns the output path(s), which
+are collected in the results in job order along with the traceback of failed jobs.
+Workers are processes by default, build must then be importable from a module (not
+defined in a notebook or __main__ run interactively). mode='thread' runs the workers as
+COM STA threads in this process instead.
+
+Each worker calls backend_factory() to get its backend, the default starts a hidden
+Inventor instance per worker, or a simulated one when PYINVENTOR_BACKEND=sim. Use
+sim_factory(latency) to sweep against inv_sim.
+
+'''
+
+def inventor_instance():
+    '''
+    Backend factory, a new hidden Inventor instance, or the simulator if PYINVENTOR_BACKEND=sim
+    '''
+    if os.environ.get('PYINVENTOR_BACKEND', '').lower()=='sim':
+        from .inv_sim import sim_backend
+        return sim_backend()
+    from .pyinvent import win32_backend
+    return win32_backend(new_instance=True, visible=False)
+
+def sim_factory(latency=0.0):
+    '''
+    Picklable backend factory for simulated Inventor instances
+    '''
+    from .inv_sim import sim_backend
+    return partial(sim_backend, latency)
+
+def _com_init():
+    #every worker thread/process needs its own single threaded COM apartment
+    try:
+        import pythoncom
+    except ImportError:
+        return None
+    pythoncom.CoInitialize()
+    return pythoncom
+
+def _worker(worker_id, build_fn, backend_factory, jobs, results):
+    from .pyinvent import inv_session
+    pythoncom=_com_init()
+    backend=None
+    try:
+        t_0=time.perf_counter()
+        try:
+            backend=backend_factory()
+            session=inv_session(backend)
+        except Exception:
+            results.put(('failed', worker_id, traceback.format_exc()))
+            return
+        results.put(('ready', worker_id, time.perf_counter()-t_0))
+        while True:
+            job=jobs.get()
+            if job==None:
+                break
+            ind, params=job
+            t_0=time.perf_counter()
+            try:
+                output=build_fn(session, params)
+                error=None
+            except Exception:
+                output=None
+                error=traceback.format_exc()
+            results.put(('job', worker_id, ind, output, error, time.perf_counter()-t_0))
+    finally:
+        if backend!=None and hasattr(backend, 'quit'):
+            try:
+                backend.quit()
+            except Exception:
+                pass
+        results.put(('exit', worker_id))
+        if pythoncom!=None:
+            pythoncom.CoUninitialize()
+
+
+class sweep_executor(object):
+    def __init__(self, build_fn, workers=None, backend_factory=inventor_instance, mode='process'):
+        '''
+        Runs build_fn(session, params) for every params of a sweep on workers each
+        driving its own Inventor instance, mode is process or thread
+        '''
+        if mode not in ('process', 'thread'):
+            raise Exception('ERROR: Invalid sweep mode, must be process or thread')
+        self.build_fn=build_fn
+        self.workers=workers
+        self.backend_factory=backend_factory
+        self.mode=mode
+        self.results=[]
+        self.worker_stats={}
+        self.wall_time=0.0
+
+    def _start(self, n_workers):
+        if self.mode=='process':
+            ctx=multiprocessing.get_context('spawn')
+            jobs, results=ctx.Queue(), ctx.Queue()
+            start=ctx.Process
+        else:
+            jobs, results=queue.Queue(), queue.Queue()
+            start=threading.Thread
+        handles=[]
+        for worker_id in range(n_workers):
+            handle=start(target=_worker, args=(worker_id, self.build_fn, self.backend_factory, jobs, results),
+                         name='PyInventor sweep %d'%worker_id)
+            handle.daemon=True
+            handle.start()
+            handles.append(handle)
+        return jobs, results, handles
+
+    def run(self, params):
+        '''
+        Runs one job per entry of params, returns a list of result dicts in job order with
+        keys job, params, worker, output, error and time (seconds)
+        '''
+        params=list(params)
+        n_workers=self.workers if self.workers!=None else (os.cpu_count() or 1)
+        n_workers=max(1, min(n_workers, len(params)))
+        self.results=[{'job': ind, 'params': val, 'worker': None, 'output': None, 'error': None, 'time': 0.0}
+                      for ind, val in enumerate(params)]
+        self.worker_stats=dict((worker_id, {'jobs': 0, 'failed': 0, 'busy': 0.0, 'startup': None, 'ready_at': None,
+                                            'done_at': None, 'error': None}) for worker_id in range(n_workers))
+        if params==[]:
+            return []
+
+        t_start=time.perf_counter()
+        jobs, results, handles=self._start(n_workers)
+        for ind, val in enumerate(params):
+            jobs.put((ind, val))
+        for _ in range(n_workers):
+            jobs.put(None)
+
+        pending=set(range(len(params)))
+        running=set(range(n_workers))
+        while running:
+            try:
+                msg=results.get(timeout=1.0)
+            except queue.Empty:
+                #a worker process that died without reporting (e.g. Inventor crashed it)
+                for worker_id in list(running):
+                    if not handles[worker_id].is_alive():
+                        running.discard(worker_id)
+                        self.worker_stats[worker_id]['error']='worker exited unexpectedly'
+                continue
+            kind, worker_id=msg[0], msg[1]
+            stats=self.worker_stats[worker_id]
+            if kind=='ready':
+                stats['startup']=msg[2]
+                stats['ready_at']=time.perf_counter()
+            elif kind=='failed':
+                stats['error']=msg[2]
+            elif kind=='job':
+                _, _, ind, output, error, dt=msg
+                self.results[ind].update(worker=worker_id, output=output, error=error, time=dt)
+                pending.discard(ind)
+                stats['jobs']+=1
+                stats['busy']+=dt
+                if error!=None:
+                    stats['failed']+=1
+            elif kind=='exit':
+                stats['done_at']=time.perf_counter()
+                running.discard(worker_id)
+
+        for handle in handles:
+            handle.join(timeout=5.0)
+        for ind in pending:
+            self.results[ind]['error']='ERROR: Job not run, all sweep workers exited'
+        self.wall_time=time.perf_counter()-t_start
+        return self.results
+
+    def outputs(self):
+        '''
+        Output paths of the jobs that succeeded, in job order
+        '''
+        return [res['output'] for res in self.results if res['error']==None]
+
+    def failures(self):
+        return [res for res in self.results if res['error']!=None]
+
+    def report(self):
+        '''
+        Job counts, wall time and throughput (jobs/s) of the last run, overall and per
+        worker. Worker throughput is counted from the time its Inventor instance was ready.
+        '''
+        workers={}
+        for worker_id, stats in self.worker_stats.items():
+            active=0.0
+            if stats['ready_at']!=None and stats['done_at']!=None:
+                active=stats['done_at']-stats['ready_at']
+            workers[worker_id]={'jobs': stats['jobs'],
+                                'failed': stats['failed'],
+                                'startup': stats['startup'],
+                                'busy': stats['busy'],
+                                'throughput': stats['jobs']/active if active>0 else 0.0,
+                                'utilization': stats['busy']/active if active>0 else 0.0,
+                                'error': stats['error']}
+        n_jobs=len(self.results)
+        return {'jobs': n_jobs,
+                'failed': len(self.failures()),
+                'workers': workers,
+                'wall_time': self.wall_time,
+                'throughput': n_jobs/self.wall_time if self.wall_time>0 else 0.0}
+
+
+def run_sweep(build_fn, params, workers=None, backend_factory=inventor_instance, mode='process'):
+    '''
+    Runs a sweep, returns (results, report), see sweep_executor
+    '''
+    sweep=sweep_executor(build_fn, workers, backend_factory, mode)
+    results=sweep.run(params)
+    return results, sweep.report()
@@ -0,0 +1,247 @@
+import os
+import re
+import csv
+import glob
+import json
+import hashlib
+
+'''
+
+Thread specification index for iPart.thread_gen. Inventor's thread.xls is parsed once,
+without Excel, into a table keyed by (thread type, diameter, pitch, class) that is kept
+in memory and persisted as JSON in a cache directory. The persisted index is invalidated
+when the source file's mtime or size changes, so repeated tapped holes are O(1) dict
+lookups instead of an Excel session per hole.
+
+Sources:
+    .xls         Inventor thread tables, read with xlrd (pip install xlrd)
+    .csv         custom tables with columns thread_type, designation, class
+    .json        an index written by thread_index.save
+
+The default Inventor tables are searched for in the Inventor install, a custom tables
+file can be given to iPart(thread_tables=...) or set in the PYINVENTOR_THREAD_TABLES
+environment variable.
+
+'''
+
+INDEX_VERSION=1
+
+_inventor_tables='C:\\Users\\Public\\Documents\\Autodesk\\Inventor 20*\\Design Data\\XLS\\en-US\\thread.xls'
+
+#thread_gen thread_type -> (thread table sheet, designation split element, default class)
+thread_types={'unified': ('ANSI Unified Screw Threads', '-', '2B'),
+              'imperial': ('ANSI Unified Screw Threads', '-', '2B'),
+              'metric': ('ANSI Metric M Profile', 'x', '6H')}
+
+#column of the thread class in Inventor's tables when there is no Class header
+_class_col=13
+
+_indices={}
+
+
+def find_thread_tables():
+    '''
+    Returns the thread tables path from PYINVENTOR_THREAD_TABLES or the newest
+    Inventor install, None if neither exists
+    '''
+    custom=os.environ.get('PYINVENTOR_THREAD_TABLES', '')
+    if custom!='' and os.path.isfile(custom):
+        return custom
+    found=sorted(glob.glob(_inventor_tables))
+    if found!=[]:
+        return found[-1]
+    return None
+
+def default_cache_dir():
+    base=os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'PyInventor')
+
+def split_designation(designation, split_ele):
+    '''
+    Splits a thread designation into (diameter, pitch), e.g. 10-32 UNF -> (10, 32),
+    M6x0.75 -> (M6, 0.75). Returns None if the designation has no pitch.
+    '''
+    parts=designation.strip().split(split_ele, 1)
+    if len(parts)<2 or parts[1].strip()=='':
+        return None
+    return parts[0].strip(), norm_pitch(parts[1].split()[0])
+
+def norm_pitch(pitch):
+    pitch=str(pitch).strip()
+    if pitch.startswith('.'):
+        pitch='0'+pitch
+    return pitch
+
+def split_classes(thread_class):
+    if thread_class==None:
+        return []
+    return [val for val in re.split(r'[,;/\s]+', str(thread_class).strip()) if val!='']
+
+
+class thread_index(object):
+    def __init__(self, entries=None, source='', mtime=0.0, size=0):
+        '''
+        In-memory thread designation index, entries maps (type, dia, pitch, class) to
+        the thread designation
+        '''
+        self.entries={} if entries==None else entries
+        self.source=source
+        self.mtime=mtime
+        self.size=size
+        self._dias=set()
+        self._pitches=set()
+        for thread_type, dia, pitch, _ in self.entries:
+            self._dias.add((thread_type, dia))
+            self._pitches.add((thread_type, dia, pitch))
+
+    def add(self, thread_type, designation, thread_class, split_ele='-'):
+        split=split_designation(designation, split_ele)
+        if split==None:
+            return
+        dia, pitch=split
+        for val in split_classes(thread_class):
+            #first listing wins, as in the order of the thread tables
+            self.entries.setdefault((thread_type, dia, pitch, val), designation.strip())
+        self._dias.add((thread_type, dia))
+        self._pitches.add((thread_type, dia, pitch))
+
+    def lookup(self, dia, pitch, thread_type='unified', thread_class=''):
+        '''
+        Returns (thread designation, thread type, thread class) as used by HoleFeatures.CreateTapInfo
+        '''
+        if thread_type not in thread_types:
+            raise Exception('ERROR: Invalid thread type, must be unified, imperial or metric')
+        sheet, _, default_class=thread_types[thread_type]
+        if thread_type=='metric':
+            dia='M'+dia
+        pitch=norm_pitch(pitch)
+        if thread_class=='':
+            thread_class=default_class
+
+        try:
+            return self.entries[(sheet, dia, pitch, thread_class)], sheet, thread_class
+        except KeyError:
+            pass
+        if (sheet, dia) not in self._dias:
+            raise Exception('ERROR: Invalid value for hole diameter')
+        elif (sheet, dia, pitch) not in self._pitches:
+            raise Exception('ERROR: Invalid value for thread pitch')
+        else:
+            raise Exception('ERROR: Invalid thread class')
+
+    def save(self, path):
+        data={'version': INDEX_VERSION, 'source': self.source, 'mtime': self.mtime, 'size': self.size,
+              'entries': [list(key)+[val] for key, val in self.entries.items()]}
+        tmp_path=path+'.%d.tmp'%os.getpid()
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data=json.load(f)
+        if data.get('version')!=INDEX_VERSION:
+            raise ValueError('thread index version mismatch')
+        entries=dict((tuple(vals[:4]), vals[4]) for vals in data['entries'])
+        return cls(entries, data['source'], data['mtime'], data['size'])
+
+
+def _split_ele(sheet):
+    for _, (name, split_ele, _) in thread_types.items():
+        if name==sheet:
+            return split_ele
+    return 'x' if 'metric' in sheet.lower() else '-'
+
+def parse_xls(path, index=None):
+    '''
+    Reads every sheet with a Thread Designation column from Inventor thread tables
+    '''
+    try:
+        import xlrd
+    except ImportError:
+        raise Exception('ERROR: xlrd not installed, needed to read .xls thread tables: $ pip install xlrd')
+    if index==None:
+        index=thread_index()
+    book=xlrd.open_workbook(path, on_demand=True)
+    try:
+        for sheet_name in book.sheet_names():
+            sheet=book.sheet_by_name(sheet_name)
+            header=None
+            for row in range(sheet.nrows):
+                vals=sheet.row_values(row)
+                if 'Thread Designation' in vals:
+                    header=(row, vals.index('Thread Designation'), vals)
+                    break
+            if header==None:
+                continue
+            row, des_col, vals=header
+            class_col=vals.index('Class') if 'Class' in vals else _class_col
+            split_ele=_split_ele(sheet_name)
+            for row in range(row+1, sheet.nrows):
+                designation=sheet.cell_value(row, des_col)
+                if designation in (None, ''):
+                    break
+                thread_class=sheet.cell_value(row, class_col) if class_col<sheet.ncols else None
+                index.add(sheet_name, str(designation), thread_class, split_ele)
+            book.unload_sheet(sheet_name)
+    finally:
+        book.release_resources()
+    return index
+
+def parse_csv(path, index=None):
+    '''
+    Reads custom thread tables with thread_type, designation and class columns, the
+    thread type is the Inventor sheet name (e.g. ANSI Unified Screw Threads)
+    '''
+    if index==None:
+        index=thread_index()
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            index.add(row['thread_type'], row['designation'], row['class'], _split_ele(row['thread_type']))
+    return index
+
+def _cache_path(path, cache_dir):
+    key=hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, 'thread_index_%s.json'%key)
+
+def load_thread_index(path, cache_dir=None):
+    '''
+    Returns the thread index for the tables at path. The index is kept in memory and on
+    disk, and is rebuilt only when the tables file mtime or size changes.
+    '''
+    path=os.path.abspath(path)
+    stat=os.stat(path)
+    index=_indices.get(path)
+    if index!=None and index.mtime==stat.st_mtime and index.size==stat.st_size:
+        return index
+
+    if path.lower().endswith('.json'):
+        index=thread_index.load(path)
+        _indices[path]=index
+        index.mtime, index.size=stat.st_mtime, stat.st_size
+        return index
+
+    if cache_dir==None:
+        cache_dir=default_cache_dir()
+    cache_path=_cache_path(path, cache_dir)
+    try:
+        index=thread_index.load(cache_path)
+        if index.source!=path or index.mtime!=stat.st_mtime or index.size!=stat.st_size:
+            index=None
+    except (OSError, ValueError, KeyError):
+        index=None
+
+    if index==None:
+        if path.lower().endswith('.csv'):
+            index=parse_csv(path)
+        else:
+            index=parse_xls(path)
+        index.source, index.mtime, index.size=path, stat.st_mtime, stat.st_size
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            index.save(cache_path)
+        except OSError:
+            pass
+    _indices[path]=index
+    return index
@@ -0,0 +1,186 @@
+import math
+import numpy as np
+from .geometry import as_xy
+
+'''
+
+Offline checks of sketch profiles, run on the points of a structure path before anything
+is sent to Inventor. A path that is open or crosses itself only fails in Inventor when
+Profiles.AddForSolid is called by extrude/revolve, after the whole sketch was drawn; these
+checks need no COM and take microseconds to milliseconds:
+
+    report=validate_path(struct.get_plt_pts())     #or struct.validate()
+    if not report['valid']:
+        print(report['errors'])
+
+The path is checked for closure (first and last point within tol) and for crossings with
+a Shamos-Hoey sweep line in O(n log n), segments next to each other in the path only
+count when they fold back over each other. The report also has the signed area (positive
+counter clockwise, of the path closed by its last segment) and bounding box.
+
+'''
+
+def dedupe_xy(xy, tol=1e-9):
+    '''
+    Drops points closer than tol to the point before them
+    '''
+    xy=as_xy(xy)
+    if len(xy)<2:
+        return xy
+    keep=np.ones(len(xy), dtype=bool)
+    keep[1:]=np.hypot(*np.diff(xy, axis=0).T)>tol
+    return xy[keep]
+
+def signed_area(xy):
+    '''
+    Shoelace area of the polygon through xy, positive when counter clockwise
+    '''
+    xy=as_xy(xy)
+    if len(xy)<3:
+        return 0.0
+    x, y=xy[:, 0], xy[:, 1]
+    return 0.5*float(np.dot(x, np.roll(y, -1))-np.dot(np.roll(x, -1), y))
+
+def bounding_box(xy):
+    '''
+    (x_min, y_min, x_max, y_max) of xy
+    '''
+    xy=as_xy(xy)
+    if len(xy)==0:
+        return None
+    lo=xy.min(axis=0)
+    hi=xy.max(axis=0)
+    return (float(lo[0]), float(lo[1]), float(hi[0]), float(hi[1]))
+
+def _orient(a, b, c):
+    return (b[0]-a[0])*(c[1]-a[1])-(b[1]-a[1])*(c[0]-a[0])
+
+def _on_segment(a, b, c, tol):
+    #c collinear with a-b lies within its box
+    return (min(a[0], b[0])-tol<=c[0]<=max(a[0], b[0])+tol and
+            min(a[1], b[1])-tol<=c[1]<=max(a[1], b[1])+tol)
+
+def segments_intersect(p1, p2, q1, q2, tol=1e-9):
+    '''
+    True if segments p1-p2 and q1-q2 touch or cross, tol is a distance
+    '''
+    if (max(p1[1], p2[1])+tol<min(q1[1], q2[1]) or max(q1[1], q2[1])+tol<min(p1[1], p2[1]) or
+            max(p1[0], p2[0])+tol<min(q1[0], q2[0]) or max(q1[0], q2[0])+tol<min(p1[0], p2[0])):
+        return False
+    len_p=max(math.hypot(p2[0]-p1[0], p2[1]-p1[1]), tol)
+    len_q=max(math.hypot(q2[0]-q1[0], q2[1]-q1[1]), tol)
+    d1=_orient(q1, q2, p1)/len_q
+    d2=_orient(q1, q2, p2)/len_q
+    d3=_orient(p1, p2, q1)/len_p
+    d4=_orient(p1, p2, q2)/len_p
+    if ((d1>tol and d2<-tol) or (d1<-tol and d2>tol)) and ((d3>tol and d4<-tol) or (d3<-tol and d4>tol)):
+        return True
+    return ((abs(d1)<=tol and _on_segment(q1, q2, p1, tol)) or (abs(d2)<=tol and _on_segment(q1, q2, p2, tol)) or
+            (abs(d3)<=tol and _on_segment(p1, p2, q1, tol)) or (abs(d4)<=tol and _on_segment(p1, p2, q2, tol)))
+
+def _folds_back(p1, p2, p3, tol):
+    #consecutive segments p1-p2 and p2-p3 overlap beyond their shared point
+    len_a=math.hypot(p2[0]-p1[0], p2[1]-p1[1])
+    len_b=math.hypot(p3[0]-p2[0], p3[1]-p2[1])
+    if abs(_orient(p1, p2, p3))>tol*max(len_a, len_b, tol):
+        return False
+    return (p2[0]-p1[0])*(p3[0]-p2[0])+(p2[1]-p1[1])*(p3[1]-p2[1])<0
+
+def self_intersection(xy, closed=True, tol=1e-9):
+    '''
+    Shamos-Hoey sweep over the segments of the path xy (closed adds the segment from the
+    last point back to the first). Returns the indices (i, j) of a pair of segments that
+    touch or cross, segment i running from xy[i] to xy[i+1], or None.
+    '''
+    pts=dedupe_xy(xy, tol).tolist()
+    if closed and len(pts)>2 and math.hypot(pts[-1][0]-pts[0][0], pts[-1][1]-pts[0][1])<=tol:
+        pts.pop()
+    n_pts=len(pts)
+    n_segs=n_pts if closed and n_pts>2 else n_pts-1
+    if n_segs<2:
+        return None
+    segs=[]
+    for ii in range(n_segs):
+        a, b=pts[ii], pts[(ii+1)%n_pts]
+        segs.append((a, b) if (a[0], a[1])<=(b[0], b[1]) else (b, a))
+
+    def adjacent(i, j):
+        return abs(i-j)==1 or (closed and n_segs>2 and abs(i-j)==n_segs-1)
+
+    def crossing(i, j):
+        if i>j:
+            i, j=j, i
+        if adjacent(i, j):
+            if j-i==1:
+                return _folds_back(pts[i], pts[j], pts[(j+1)%n_pts], tol)
+            return _folds_back(pts[j], pts[0], pts[1], tol)
+        return segments_intersect(segs[i][0], segs[i][1], segs[j][0], segs[j][1], tol)
+
+    slopes=[]
+    for (x0, y0), (x1, y1) in segs:
+        slopes.append(math.inf if x1-x0<=tol else (y1-y0)/(x1-x0))
+
+    def y_at(ind, x):
+        x0, y0=segs[ind][0]
+        if slopes[ind]==math.inf:
+            return y0
+        return y0+slopes[ind]*(x-x0)
+
+    #left end points are inserted before right end points at the same place
+    events=[]
+    for ind, (a, b) in enumerate(segs):
+        events.append((a[0], a[1], 0, ind))
+        events.append((b[0], b[1], 1, ind))
+    events.sort()
+
+    #sweep line status, segments ordered by y where the sweep line crosses them
+    active=[]
+    for x, y, kind, ind in events:
+        if kind==0:
+            key=(y, slopes[ind])
+            lo, hi=0, len(active)
+            while lo<hi:
+                mid=(lo+hi)//2
+                if (y_at(active[mid], x), slopes[active[mid]])<key:
+                    lo=mid+1
+                else:
+                    hi=mid
+            active.insert(lo, ind)
+            for other in (active[lo-1] if lo>0 else None, active[lo+1] if lo+1<len(active) else None):
+                if other!=None and crossing(ind, other):
+                    return tuple(sorted((ind, other)))
+        else:
+            pos=active.index(ind)
+            below=active[pos-1] if pos>0 else None
+            above=active[pos+1] if pos+1<len(active) else None
+            del active[pos]
+            if below!=None and above!=None and crossing(below, above):
+                return tuple(sorted((below, above)))
+    return None
+
+def validate_path(points, closed=True, tol=1e-6):
+    '''
+    Checks a profile path (e.g. structure.get_plt_pts output) without Inventor, returns a
+    dict with valid, errors, closed, gap, intersection, area, bbox and points
+    '''
+    xy=dedupe_xy(points, 1e-12)
+    errors=[]
+    gap=float(np.hypot(*(xy[-1]-xy[0]))) if len(xy)>1 else 0.0
+    #the end point of a closed path repeats the start
+    distinct=len(xy)-1 if len(xy)>1 and gap<=tol else len(xy)
+    is_closed=distinct>2 and gap<=tol
+    if distinct<3:
+        errors.append('path has %d distinct points, a profile needs at least 3'%distinct)
+    elif closed and not is_closed:
+        errors.append('path is open, end point is %g from the start point'%gap)
+    intersection=self_intersection(xy, closed, tol) if len(xy)>2 else None
+    if intersection!=None:
+        errors.append('path crosses itself, segments %d and %d'%intersection)
+    return {'valid': errors==[],
+            'errors': errors,
+            'closed': is_closed,
+            'gap': gap,
+            'intersection': intersection,
+            'area': signed_area(xy[:-1] if is_closed else xy),
+            'bbox': bounding_box(xy),
+            'points': len(xy)}
@@ -0,0 +1,101 @@
+'''
+
+Benchmark for importing a large contour file into a structure on the simulated Inventor
+backend. Writes a wavy closed contour of n points as .npy and .csv, then loads it two
+ways: eagerly (the whole file read, every point added with add_line) and streamed with
+PyInventor.contour.add_contour (read --chunk points at a time, simplified to --tol).
+Reports the time to build the structure, the peak traced memory, the points kept and the
+sketch entities and COM round trips of draw_path.
+
+    python benchmarks/bench_contour.py [--sizes 100000 1000000] [--eager-max 100000]
+
+'''
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import warnings
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyInventor import iPart, structure
+from PyInventor.contour import add_contour, first_point
+from PyInventor.inv_sim import sim_backend
+
+def wavy_contour(n, waves=40, amp=0.02):
+    t=np.linspace(0, 2*np.pi, n)
+    r=1+amp*np.sin(waves*t)
+    return np.column_stack((r*np.cos(t), r*np.sin(t)))
+
+def eager(part, sketch, source, tol, chunk):
+    if source.endswith('.npy'):
+        xy=np.load(source)
+    else:
+        xy=np.loadtxt(source, delimiter=',')
+    pts=[tuple(pt) for pt in xy.tolist()]
+    s=structure(part, sketch, start=pts[0])
+    for x_1, y_1 in pts[1:]:
+        x_0, y_0=s.last
+        s.add_line(np.hypot(x_1-x_0, y_1-y_0), np.degrees(np.arctan2(y_1-y_0, x_1-x_0)))
+    return s
+
+def streamed(part, sketch, source, tol, chunk):
+    s=structure(part, sketch, start=first_point(source))
+    add_contour(s, source, tol=tol, chunk_size=chunk)
+    return s
+
+def bench_contour(sizes, eager_max, tol, chunk, path):
+    results=[]
+    for n in sizes:
+        xy=wavy_contour(n)
+        sources={'npy': os.path.join(path, 'contour_%d.npy'%n), 'csv': os.path.join(path, 'contour_%d.csv'%n)}
+        np.save(sources['npy'], xy)
+        np.savetxt(sources['csv'], xy, delimiter=',')
+        del xy
+        for fmt, source in sorted(sources.items()):
+            for name, func in (('eager', eager), ('streamed', streamed)):
+                if func==eager and n>eager_max:
+                    continue
+                backend=sim_backend()
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore')
+                    part=iPart(backend=backend)
+                sketch=part.new_sketch(part.add_workplane('xy'))
+                tracemalloc.start()
+                t_0=time.perf_counter()
+                s=func(part, sketch, source, tol, chunk)
+                t_build=time.perf_counter()-t_0
+                peak=tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                backend.reset_calls()
+                s.draw_path(close_path=True)
+                results.append({'points': n, 'format': fmt, 'method': name, 'time': t_build, 'peak_mb': peak/2.0**20,
+                                'kept': s.obj_num+1, 'entities': s.segments.n+1, 'round_trips': backend.call_count})
+    return results
+
+def main(argv=None):
+    parser=argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--eager-max', type=int, default=100000, help='largest n loaded eagerly')
+    parser.add_argument('--tol', type=float, default=1e-4)
+    parser.add_argument('--chunk', type=int, default=100000)
+    args=parser.parse_args(argv)
+
+    path=tempfile.mkdtemp(prefix='pyinventor_contour_')
+    try:
+        results=bench_contour(args.sizes, args.eager_max, args.tol, args.chunk, path)
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+    print('%9s %4s %-9s %9s %9s %9s %9s %12s'%('points', 'fmt', 'method', 'time s', 'peak MB', 'kept', 'entities', 'round trips'))
+    for res in results:
+        print('%9d %4s %-9s %9.3f %9.1f %9d %9d %12d'%(res['points'], res['format'], res['method'], res['time'], res['peak_mb'],
+                                                     res['kept'], res['entities'], res['round_trips']))
+    return 0
+
+if __name__=='__main__':
+    sys.exit(main())
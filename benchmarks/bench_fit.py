@@ -0,0 +1,95 @@
+'''
+
+Benchmark for structure.fit_curves on the simulated Inventor backend. Builds paths of
+dense generated points (splines through arc and line points, a B-spline, point arcs and
+point lines) and draws each as is and after fit_curves, reporting the sketch entities,
+the spline fit points sent to Inventor, the COM round trips and sketch solve work
+(entities and points solved) of draw_path and the time of the fit. Point elements are
+not drawn as they are, unfitted they are drawn as lines through their points.
+
+    python benchmarks/bench_fit.py [--sizes 100 1000 10000] [--tol 2e-5]
+
+'''
+
+import os
+import sys
+import time
+import argparse
+import warnings
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyInventor import iPart, structure
+from PyInventor.geometry import arc_xy
+from PyInventor.inv_sim import sim_backend
+
+def slot_splines(s, n):
+    #a slot outline as four splines through generated arc and line points
+    for xy in (arc_xy(270, 450, 1, (0, 0), n), np.column_stack((np.linspace(0, -4, n), np.ones(n))),
+               arc_xy(90, 270, 1, (-4, 0), n), np.column_stack((np.linspace(-4, 0, n), -np.ones(n)))):
+        s.segments.append('spline', xy)
+        s.obj_num+=1
+    s.last=(0, -1)
+
+def bspline(s, n):
+    s.add_bspline(n, [(0, 0), (1, 2), (3, -1), (4, 1)])
+
+def point_runs(s, n):
+    s.add_point_arc(0, 180, 1, segments=n)
+    s.add_point_line(4, 180, n)
+    s.add_point_arc(180, 360, 1, segments=n)
+
+CASES=(('slot splines', slot_splines, ('spline',)),
+       ('bspline', bspline, ('spline',)),
+       ('point arcs, lines', point_runs, ('point_arc', 'point_line')))
+
+def sketch_stats(sketch):
+    entities=object.__getattribute__(sketch.sketch_obj, '_entities')
+    fit_pts=sum(len(object.__getattribute__(ent, '_fit_points')) for ent in entities if hasattr(ent, '_fit_points'))
+    return len(entities), fit_pts
+
+def bench_fit(sizes, tol):
+    results=[]
+    for n in sizes:
+        for name, build, types in CASES:
+            for fitted in (False, True):
+                backend=sim_backend()
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore')
+                    part=iPart(backend=backend)
+                sketch=part.new_sketch(part.add_workplane('xy'))
+                s=structure(part, sketch, start=(0, -1))
+                build(s, n)
+                t_0=time.perf_counter()
+                if fitted:
+                    s.fit_curves(tol=tol, types=types)
+                t_fit=time.perf_counter()-t_0
+                if not fitted and types!=('spline',):
+                    #no run is long enough, every point element becomes lines through its points
+                    s.fit_curves(tol=tol, types=types, min_pts=n+1)
+                backend.reset_calls()
+                backend.events.clear()
+                s.draw_path()
+                entities, fit_pts=sketch_stats(sketch)
+                results.append({'points': n, 'case': name, 'fitted': fitted, 'elements': s.obj_num, 'entities': entities,
+                                'fit_points': fit_pts, 'round_trips': backend.call_count, 'solve_work': backend.events['solve_work'],
+                                'time': t_fit})
+    return results
+
+def main(argv=None):
+    parser=argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--tol', type=float, default=2e-5)
+    args=parser.parse_args(argv)
+
+    results=bench_fit(args.sizes, args.tol)
+    print('%7s %-18s %6s %9s %9s %11s %12s %11s %9s'%('points', 'case', 'fitted', 'elements', 'entities', 'fit points',
+                                                     'round trips', 'solve work', 'fit ms'))
+    for res in results:
+        print('%7d %-18s %6s %9d %9d %11d %12d %11d %9.2f'%(res['points'], res['case'], res['fitted'], res['elements'], res['entities'],
+                                                           res['fit_points'], res['round_trips'], res['solve_work'], res['time']*1e3))
+    return 0
+
+if __name__=='__main__':
+    sys.exit(main())
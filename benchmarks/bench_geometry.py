@@ -0,0 +1,162 @@
+'''
+
+Micro-benchmarks for the PyInventor.geometry point helpers. Each *_pts helper is timed
+against the per-point Python loop it replaced, on list input (the list-of-tuples API)
+and on ndarray input (the *_xy kernel), and the results are checked for agreement.
+b_spline is timed over repeated calls with the same (num, degree) against the per-call
+bernstein_poly evaluation, and bspline_xy on long control polygons.
+
+    python benchmarks/bench_geometry.py [--sizes 1000 10000 100000 1000000] [--calls 2000]
+
+'''
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from numpy import cos, sin, pi
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyInventor import geometry as geo
+
+#scalar reference implementations, as the helpers were before the ndarray kernel
+
+def legacy_rotate_pts(points, angle, center=(0, 0)):
+    return [geo.rotate_pt(p, angle, center) for p in points]
+
+def legacy_translate_pts(points, offset):
+    return [geo.translate_pt(p, offset) for p in points]
+
+def legacy_mirror_pts(points, axis_angle, axis_pt):
+    return [geo.mirror_pt(p, axis_angle, axis_pt) for p in points]
+
+def legacy_scale_pts(points, scale):
+    return [geo.scale_pt(p, scale) for p in points]
+
+def legacy_orient_pts(points, angle, offset):
+    return [geo.orient_pt(p, angle, offset) for p in points]
+
+def legacy_arc_pattern(start_angle, stop_angle, radius, center_pt=(2,1), segments=9):
+    pts=[]
+    for ii in range(segments):
+        theta=(start_angle+ii/(segments-1.)*(stop_angle-start_angle))*pi/180.
+        pts.append((center_pt[0]+radius*cos(theta), center_pt[1]+radius*sin(theta)))
+    return pts
+
+def legacy_circle_pattern(radius, center_pt=(0,0), segments=3, offset=0):
+    pts=[]
+    theta=offset*np.pi/180
+    for ii in range(segments):
+        pts.append((center_pt[0]+radius*cos(theta), center_pt[1]+radius*sin(theta)))
+        theta+=360/segments*pi/180.
+    return pts
+
+def legacy_arc_pts_pattern(start, end, center, num_pts):
+    D_12=geo.distance(center, start)
+    D_13=geo.distance(center, end)
+    D_23=geo.distance(start, end)
+    ang=np.arccos((D_12**2+D_13**2-D_23**2)/(2*D_12*D_13))
+    start_dir=np.array([(start[0]-center[0])/D_12, (start[1]-center[1])/D_12])
+    end_dir=np.array([(end[0]-center[0])/D_13, (end[1]-center[1])/D_13])
+    dir=np.sign(start_dir[0]*end_dir[1]-start_dir[1]*end_dir[0]) or 1
+    pts=[]
+    new_ang=0
+    for i in range(num_pts):
+        new_vec=D_12*geo.vec_rot(start_dir, dir*new_ang)
+        pts.append((center[0]+new_vec[0], center[1]+new_vec[1]))
+        new_ang+=ang/(num_pts-1)
+    return pts
+
+def legacy_b_spline(c_points, num=200, degree=3):
+    N=len(c_points)
+    degree=np.clip(degree, 1, N-1)
+    t=np.linspace(0, 1, num=num)
+    curve=np.zeros((num, 2))
+    for ii in range(N):
+        curve+=np.outer(geo.bernstein_poly(degree, ii)(t), c_points[ii])
+    return [tuple(pt) for pt in curve]
+
+def cases(n):
+    rng=np.random.RandomState(0)
+    xy=rng.uniform(-10, 10, (n, 2))
+    pts=geo.to_pts(xy)
+    return [('rotate_pts', lambda p: legacy_rotate_pts(p, 30, (1, 2)), lambda p: geo.rotate_pts(p, 30, (1, 2))),
+            ('translate_pts', lambda p: legacy_translate_pts(p, (1, 2)), lambda p: geo.translate_pts(p, (1, 2))),
+            ('mirror_pts', lambda p: legacy_mirror_pts(p, 30, (1, 2)), lambda p: geo.mirror_pts(p, 30, (1, 2))),
+            ('scale_pts', lambda p: legacy_scale_pts(p, (2, 3)), lambda p: geo.scale_pts(p, (2, 3))),
+            ('orient_pts', lambda p: legacy_orient_pts(p, 30, (1, 2)), lambda p: geo.orient_pts(p, 30, (1, 2)))], pts, xy
+
+def generators(n):
+    return [('arc_pattern', lambda: legacy_arc_pattern(0, 270, 2, (1, 1), n), lambda: geo.arc_pattern(0, 270, 2, (1, 1), n),
+             lambda: geo.arc_xy(0, 270, 2, (1, 1), n)),
+            ('circle_pattern', lambda: legacy_circle_pattern(2, (1, 1), n, 15), lambda: geo.circle_pattern(2, (1, 1), n, 15),
+             lambda: geo.circle_xy(2, (1, 1), n, 15)),
+            ('arc_pts_pattern', lambda: legacy_arc_pts_pattern((1, 0), (0, 1), (0, 0), n), lambda: geo.arc_pts_pattern((1, 0), (0, 1), (0, 0), n),
+             lambda: geo.arc_pts_xy((1, 0), (0, 1), (0, 0), n))]
+
+def timed(func, *args):
+    t_0=time.perf_counter()
+    val=func(*args)
+    return time.perf_counter()-t_0, val
+
+def check(ref, val, name):
+    if not np.allclose(np.asarray(ref, dtype=float), np.asarray(val, dtype=float), rtol=0, atol=1e-9):
+        raise Exception('ERROR: %s kernel result differs from the scalar reference'%name)
+
+def bench_geometry(sizes):
+    results=[]
+    for n in sizes:
+        ops, pts, xy=cases(n)
+        for name, legacy, kernel in ops:
+            t_ref, ref=timed(legacy, pts)
+            t_list, val=timed(kernel, pts)
+            check(ref, val, name)
+            t_arr, val=timed(kernel, xy)
+            check(ref, val, name)
+            results.append((name, n, t_ref, t_list, t_arr))
+        for name, legacy, adapter, kernel in generators(n):
+            t_ref, ref=timed(legacy)
+            t_list, val=timed(adapter)
+            check(ref, val, name)
+            t_arr, val=timed(kernel)
+            check(ref, val, name)
+            results.append((name, n, t_ref, t_list, t_arr))
+    return results
+
+def bench_splines(calls, sizes):
+    rng=np.random.RandomState(0)
+    c_points=geo.to_pts(rng.uniform(0, 1, (4, 2)))
+    t_ref, ref=timed(lambda: [legacy_b_spline(c_points, 200, 3) for _ in range(calls)])
+    t_list, val=timed(lambda: [geo.b_spline(c_points, 200, 3) for _ in range(calls)])
+    check(ref[-1], val[-1], 'b_spline')
+    t_arr, _=timed(lambda: [geo.b_spline_xy(c_points, 200, 3) for _ in range(calls)])
+    results=[('b_spline', calls, t_ref, t_list, t_arr)]
+    for n in sizes:
+        c_xy=np.cumsum(rng.uniform(-1, 1, (n//10, 2)), axis=0)
+        t_b, _=timed(geo.bspline_xy, c_xy, n, 3)
+        results.append(('bspline_xy', n, t_b))
+    return results
+
+def main(argv=None):
+    parser=argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--calls', type=int, default=2000)
+    args=parser.parse_args(argv)
+
+    print('%-16s %9s %12s %12s %12s %10s %10s'%('helper', 'points', 'loop ms', 'list ms', 'ndarray ms', 'list x', 'ndarray x'))
+    for name, n, t_ref, t_list, t_arr in bench_geometry(args.sizes):
+        print('%-16s %9d %12.3f %12.3f %12.3f %10.1f %10.1f'%(name, n, t_ref*1e3, t_list*1e3, t_arr*1e3, t_ref/t_list, t_ref/t_arr))
+
+    splines=bench_splines(args.calls, args.sizes)
+    name, calls, t_ref, t_list, t_arr=splines[0]
+    print('\n%-16s %9s %12s %12s %12s %10s %10s'%('spline', 'calls', 'loop ms', 'list ms', 'ndarray ms', 'list x', 'ndarray x'))
+    print('%-16s %9d %12.3f %12.3f %12.3f %10.1f %10.1f'%(name, calls, t_ref*1e3, t_list*1e3, t_arr*1e3, t_ref/t_list, t_ref/t_arr))
+    print('\n%-16s %9s %12s %12s'%('spline', 'points', 'ctrl pts', 'ms'))
+    for name, n, t_b in splines[1:]:
+        print('%-16s %9d %12d %12.3f'%(name, n, n//10, t_b*1e3))
+    return 0
+
+if __name__=='__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+'''
+
+Scaling benchmark for hole arrays on the simulated Inventor backend. Drills n holes
+three ways: one new_hole per position (a sketch point, work point and hole feature per
+hole), the list path as it was before hole_array (one sketch point at a time, each edit
+re-solving the sketch, then a single hole feature) and iPart.hole_array (all centers in
+one deferred sketch edit, one hole feature per --chunk centers). Every simulated COM round
+trip costs --latency seconds and a sketch solve --solve-latency seconds per entity.
+
+    python benchmarks/bench_holes.py [--sizes 500 5000 50000] [--loop-max 5000]
+
+'''
+
+import os
+import sys
+import time
+import argparse
+import warnings
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyInventor import iPart
+from PyInventor.inv_sim import sim_backend
+
+def lattice(n):
+    side=int(np.ceil(np.sqrt(n)))
+    ii=np.arange(n)
+    return np.column_stack((ii%side, ii//side))*0.1
+
+def per_hole(part, sketch, xy, chunk):
+    for x, y in xy.tolist():
+        part.new_hole(sketch, (x, y), 0.05, 0.1)
+
+def legacy_list(part, sketch, xy, chunk):
+    points_coll=part.new_obj_collection()
+    for pos in xy.tolist():
+        points_coll.Add(part.sketch_point(sketch, tuple(pos)))
+    holes=part.compdef.Features.HoleFeatures
+    placement=holes.CreateSketchPlacementDefinition(points_coll)
+    holes.AddDrilledByDistanceExtent(placement, part.unit_conv(0.05), part.unit_conv(0.1),
+                                     part.constants.kNegativeExtentDirection)
+
+def hole_array(part, sketch, xy, chunk):
+    part.hole_array(sketch, xy, 0.05, 0.1, chunk_size=chunk)
+
+def bench_holes(sizes, loop_max, chunk, latency, solve_latency):
+    results=[]
+    for n in sizes:
+        xy=lattice(n)
+        for name, func in (('new_hole loop', per_hole), ('list, per point', legacy_list), ('hole_array', hole_array)):
+            if func!=hole_array and n>loop_max:
+                continue
+            backend=sim_backend(latency=latency, solve_latency=solve_latency)
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                part=iPart(backend=backend)
+            sketch=part.new_sketch(part.add_workplane('xy'))
+            backend.reset_calls()
+            t_0=time.perf_counter()
+            func(part, sketch, xy, chunk)
+            results.append({'holes': n, 'method': name, 'time': time.perf_counter()-t_0,
+                            'features': part.compdef.Features.HoleFeatures.Count,
+                            'work_points': part.compdef.WorkPoints.Count-1,
+                            'solves': backend.events['sketch_solve'], 'round_trips': backend.call_count})
+    return results
+
+def main(argv=None):
+    parser=argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 5000, 50000])
+    parser.add_argument('--loop-max', type=int, default=5000, help='largest n run with the per point methods')
+    parser.add_argument('--chunk', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=2e-5)
+    parser.add_argument('--solve-latency', type=float, default=1e-7)
+    args=parser.parse_args(argv)
+
+    results=bench_holes(args.sizes, args.loop_max, args.chunk, args.latency, args.solve_latency)
+    print('%8s %-16s %10s %9s %12s %8s %12s'%('holes', 'method', 'time s', 'features', 'work points', 'solves', 'round trips'))
+    for res in results:
+        print('%8d %-16s %10.3f %9d %12d %8d %12d'%(res['holes'], res['method'], res['time'], res['features'],
+                                                  res['work_points'], res['solves'], res['round_trips']))
+    for n in args.sizes:
+        times=dict((res['method'], res['time']) for res in results if res['holes']==n)
+        for name in ('new_hole loop', 'list, per point'):
+            if name in times:
+                print('%d holes: hole_array %.1fx faster than %s'%(n, times[name]/times['hole_array'], name))
+    return 0
+
+if __name__=='__main__':
+    sys.exit(main())
@@ -0,0 +1,66 @@
+'''
+
+Cold-start import benchmark for PyInventor. Each import is timed in a fresh
+interpreter so nothing is cached in sys.modules. The run fails (exit code 1) if the
+median import time exceeds the budget or if a deferred dependency (pywin32, xlwings,
+scipy) gets imported at load time.
+
+    python benchmarks/bench_import.py [--repeat 7] [--budget 0.5]
+
+'''
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+
+REPO=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#module -> cold start budget in seconds, dominated by the numpy import
+BUDGETS={'PyInventor.geometry': 0.5,
+         'PyInventor': 0.5}
+
+DEFERRED=('win32com', 'pythoncom', 'xlwings', 'scipy')
+
+PROBE='''
+import sys, time, json
+t_0=time.perf_counter()
+import %s
+t_1=time.perf_counter()
+print(json.dumps({'time': t_1-t_0, 'modules': sorted(sys.modules)}))
+'''
+
+def cold_import(module):
+    env=dict(os.environ, PYTHONPATH=REPO+os.pathsep+os.environ.get('PYTHONPATH', ''))
+    out=subprocess.check_output([sys.executable, '-c', PROBE%module], env=env, cwd=REPO)
+    return json.loads(out.decode().strip().splitlines()[-1])
+
+def bench_import(module, repeat=7):
+    runs=[cold_import(module) for _ in range(repeat)]
+    loaded=set(name.split('.')[0] for name in runs[-1]['modules'])
+    return {'module': module,
+            'median': statistics.median(run['time'] for run in runs),
+            'min': min(run['time'] for run in runs),
+            'deferred_loaded': sorted(loaded.intersection(DEFERRED))}
+
+def main(argv=None):
+    parser=argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--budget', type=float, default=None, help='override the per-module budget (s)')
+    args=parser.parse_args(argv)
+
+    failed=False
+    for module, budget in BUDGETS.items():
+        if args.budget!=None:
+            budget=args.budget
+        res=bench_import(module, args.repeat)
+        ok=res['median']<=budget and res['deferred_loaded']==[]
+        failed=failed or not ok
+        print('%-22s median %7.1f ms  min %7.1f ms  budget %6.1f ms  eager deps %s  %s'%(
+            module, res['median']*1e3, res['min']*1e3, budget*1e3, res['deferred_loaded'] or '-', 'ok' if ok else 'FAIL'))
+    return 1 if failed else 0
+
+if __name__=='__main__':
+    sys.exit(main())
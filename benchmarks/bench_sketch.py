@@ -0,0 +1,67 @@
+'''
+
+Benchmark for deferred sketch solving. Draws sketches of n independent lines one
+AddByTwoPoints at a time (as structure.draw_path and poly_lines do) on the simulated
+Inventor backend, with every edit re-solving the sketch, and again inside
+iPart.sketch.bulk_edit() where the sketch is solved once. The simulated solve costs
+--solve-latency seconds per sketch entity, so per-edit solving is quadratic in n.
+
+    python benchmarks/bench_sketch.py [--sizes 1000 10000] [--solve-latency 1e-7]
+
+'''
+
+import os
+import sys
+import time
+import argparse
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyInventor import iPart
+from PyInventor.inv_sim import sim_backend
+
+def draw_lines(part, sketch, n_lines):
+    add=sketch.sketch_obj.SketchLines.AddByTwoPoints
+    point=part.point
+    for ii in range(n_lines):
+        add(point((ii, 0)), point((ii, 1)))
+
+def bench_sketch(sizes, solve_latency):
+    results=[]
+    for n_lines in sizes:
+        for bulk in (False, True):
+            backend=sim_backend(solve_latency=solve_latency)
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                part=iPart(backend=backend)
+            sketch=part.new_sketch(part.add_workplane('xy'))
+            backend.reset_calls()
+            t_0=time.perf_counter()
+            if bulk==True:
+                with sketch.bulk_edit():
+                    draw_lines(part, sketch, n_lines)
+            else:
+                draw_lines(part, sketch, n_lines)
+            results.append({'lines': n_lines, 'bulk_edit': bulk, 'time': time.perf_counter()-t_0,
+                            'solves': backend.events['sketch_solve'], 'solve_work': backend.events['solve_work'],
+                            'inference': backend.events['inference'], 'round_trips': backend.call_count})
+    return results
+
+def main(argv=None):
+    parser=argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--solve-latency', type=float, default=1e-7)
+    args=parser.parse_args(argv)
+
+    results=bench_sketch(args.sizes, args.solve_latency)
+    print('%8s %10s %10s %8s %14s %10s %12s'%('lines', 'bulk_edit', 'time s', 'solves', 'solved ents', 'inference', 'round trips'))
+    for res in results:
+        print('%8d %10s %10.3f %8d %14d %10d %12d'%(res['lines'], res['bulk_edit'], res['time'], res['solves'],
+                                                   res['solve_work'], res['inference'], res['round_trips']))
+    for plain, bulk in zip(results[::2], results[1::2]):
+        print('%d lines: bulk_edit speedup %.1fx'%(plain['lines'], plain['time']/bulk['time']))
+    return 0
+
+if __name__=='__main__':
+    sys.exit(main())
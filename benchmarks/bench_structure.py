@@ -0,0 +1,75 @@
+'''
+
+Scaling benchmark for structure building and path drawing. Builds a closed meander of
+n line and arc segments, then times structure.get_plt_pts and structure.draw_path (against the
+simulated Inventor backend with zero latency, so only Python-side cost is measured).
+The run fails (exit code 1) if the time per segment at the largest size is more than
+--max-ratio times the time per segment at the smallest size.
+
+    python benchmarks/bench_structure.py [--sizes 1000 10000 100000] [--max-ratio 3]
+
+'''
+
+import os
+import sys
+import time
+import argparse
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyInventor import iPart, structure
+from PyInventor.inv_sim import sim_backend
+
+def meander(part, sketch, n_seg):
+    s=structure(part, sketch, start=(0.0, 0.0))
+    for ii in range(n_seg//2):
+        s.add_line(1, 90 if ii%2==0 else 270)
+        s.add_line_arc(start_angle=180*(ii%2), stop_angle=180*((ii+1)%2), radius=.25, flip_dir=ii%2==0)
+    return s
+
+def timed(func, *args, **kwargs):
+    t_0=time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter()-t_0
+
+def bench_structure(sizes):
+    results=[]
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        part=iPart(backend=sim_backend())
+    for n_seg in sizes:
+        sketch=part.new_sketch(part.add_workplane('xy'))
+        t_0=time.perf_counter()
+        s=meander(part, sketch, n_seg)
+        t_build=time.perf_counter()-t_0
+        t_pts=timed(s.get_plt_pts)
+        t_draw=timed(s.draw_path)
+        results.append({'segments': n_seg, 'build': t_build, 'get_plt_pts': t_pts, 'draw_path': t_draw,
+                        'store_bytes': s.segments.nbytes()})
+    return results
+
+def main(argv=None):
+    parser=argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--max-ratio', type=float, default=3.0)
+    args=parser.parse_args(argv)
+
+    results=bench_structure(args.sizes)
+    print('%10s %14s %14s %14s %14s'%('segments', 'build us/seg', 'pts us/seg', 'draw us/seg', 'store MB'))
+    for res in results:
+        n_seg=float(res['segments'])
+        print('%10d %14.2f %14.2f %14.2f %14.2f'%(res['segments'], res['build']/n_seg*1e6, res['get_plt_pts']/n_seg*1e6,
+                                                  res['draw_path']/n_seg*1e6, res['store_bytes']/1e6))
+
+    failed=False
+    first, last=results[0], results[-1]
+    for key in ('build', 'get_plt_pts', 'draw_path'):
+        ratio=(last[key]/last['segments'])/(first[key]/first['segments'])
+        ok=ratio<=args.max_ratio
+        failed=failed or not ok
+        print('%-12s per-segment cost ratio %dx vs %dx segments: %.2f %s'%(key, last['segments'], first['segments'], ratio, 'ok' if ok else 'FAIL'))
+    return 1 if failed else 0
+
+if __name__=='__main__':
+    sys.exit(main())
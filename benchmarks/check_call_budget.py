@@ -0,0 +1,576 @@
+'''
+
+COM call budgets for the iPart, iPart.sketch and structure methods. Each method is run on
+the simulated Inventor backend, which counts every property get, put and method call a
+real COM connection would make a cross-process round trip for, at several input sizes n
+(points, segments, holes, ...). The count must stay within a+b*n for the budget (a, b)
+of the method, so a change that adds a round trip per entity (re-reading an application
+handle in a loop, reading back geometry per segment) fails the run with exit code 1.
+
+Every public method needs a budget or an entry in EXEMPT, new methods fail until they get
+one. Measured counts are printed with --show, use them to set the budget of a new method.
+
+    python benchmarks/check_call_budget.py [--sizes 10 100 1000] [--only sketch_] [--show]
+
+'''
+
+import os
+import sys
+import shutil
+import contextlib
+import inspect
+import argparse
+import tempfile
+import warnings
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyInventor import iPart, structure
+from PyInventor.inv_sim import sim_backend
+
+#methods without a budget and why
+EXEMPT={'iPart.pick': 'waits for the user to select in Inventor',
+        'iPart.pick_circle': 'waits for the user to select in Inventor',
+        'iPart.pick_face': 'waits for the user to select in Inventor',
+        'iPart.pick_line': 'waits for the user to select in Inventor',
+        'iPart.pick_plane': 'waits for the user to select in Inventor',
+        'iPart.pick_point': 'waits for the user to select in Inventor',
+        'iPart.pick_sketch': 'waits for the user to select in Inventor',
+        'iPart.close_all_parts': 'depends on the documents open in the application',
+        'iPart.copy_paste_sketch': 'clipboard commands, user driven',
+        'iPart.thread_gen': 'needs the Inventor thread tables',
+        'iPart.new_threaded_hole': 'needs the Inventor thread tables'}
+
+CASES={}
+
+def budget(name, a, b=0, sizes=None):
+    '''
+    Registers case(part, sketch, n) as the check of method name, case does its setup
+    and returns the call to count
+    '''
+    def register(case):
+        CASES[name]=(case, a, b, sizes)
+        return case
+    return register
+
+def meander_pts(n):
+    ii=np.arange(n)
+    return np.column_stack((ii*0.1, (ii%2)*0.5))
+
+def loop_pts(n):
+    theta=np.linspace(0, 2*np.pi, n, endpoint=False)
+    return np.column_stack((np.cos(theta), np.sin(theta)))
+
+def meander(part, sketch, n_seg):
+    s=structure(part, sketch, start=(0.0, 0.0))
+    for ii in range(n_seg//2):
+        s.add_line(1, 90 if ii%2==0 else 270)
+        s.add_line_arc(start_angle=180*(ii%2), stop_angle=180*((ii+1)%2), radius=.25, flip_dir=ii%2==0)
+    return s
+
+def features(part, sketch, n):
+    coll=part.new_obj_collection()
+    for ii in range(n):
+        coll.Add(part.extrude(sketch, 0.1, part.sketch_circle(sketch, (ii, 0), 0.1)))
+    return coll
+
+#pure helpers, no COM at all
+
+@budget('iPart.API_type', 0)
+def case_api_type(part, sketch, n):
+    return lambda: part.API_type(sketch.sketch_obj)
+
+@budget('iPart.SP_check', 0)
+def case_sp_check(part, sketch, n):
+    return lambda: part.SP_check(sketch.sketch_obj)
+
+@budget('iPart.object_check', 0)
+def case_object_check(part, sketch, n):
+    return lambda: part.object_check(sketch.sketch_obj)
+
+@budget('iPart.ang_conv', 0)
+def case_ang_conv(part, sketch, n):
+    return lambda: part.ang_conv(90)
+
+@budget('iPart.unit_conv', 0)
+def case_unit_conv(part, sketch, n):
+    return lambda: part.unit_conv(1.5)
+
+@budget('iPart.inv_unit_conv', 0)
+def case_inv_unit_conv(part, sketch, n):
+    return lambda: part.inv_unit_conv((1.5, 2.5))
+
+@budget('iPart.unit_scale', 0)
+def case_unit_scale(part, sketch, n):
+    return part.unit_scale
+
+@budget('iPart.param_expression', 0)
+def case_param_expression(part, sketch, n):
+    return lambda: part.param_expression(0.25)
+
+@budget('iPart.xy_array', 0)
+def case_xy_array(part, sketch, n):
+    pts=[tuple(pt) for pt in meander_pts(n).tolist()]
+    return lambda: part.xy_array(pts)
+
+@budget('iPart.sketch_test', 0)
+def case_sketch_test(part, sketch, n):
+    return lambda: part.sketch_test(sketch)
+
+@budget('iPart.f_check', 0)
+def case_f_check(part, sketch, n):
+    return lambda: part.f_check(tempfile.gettempdir(), 'no_such_part.ipt')
+
+@budget('iPart.overwrite_file', 0)
+def case_overwrite_file(part, sketch, n):
+    return lambda: part.overwrite_file(tempfile.gettempdir(), 'no_such_part.ipt')
+
+@budget('iPart.copy_file_ext_types', 0)
+def case_copy_file_ext_types(part, sketch, n):
+    return part.copy_file_ext_types
+
+#sketch geometry
+
+@budget('iPart.point', 1)
+def case_point(part, sketch, n):
+    return lambda: part.point((1, 2))
+
+@budget('iPart.sketch_point', 3)
+def case_sketch_point(part, sketch, n):
+    return lambda: part.sketch_point(sketch, (1, 2))
+
+@budget('iPart.sketch_line', 4)
+def case_sketch_line(part, sketch, n):
+    return lambda: part.sketch_line(sketch, (0, 0), (1, 2))
+
+@budget('iPart.arc_line', 5)
+def case_arc_line(part, sketch, n):
+    return lambda: part.arc_line(sketch, (0, 0), (1, 0), (0, 1))
+
+@budget('iPart.center_arc_line', 4)
+def case_center_arc_line(part, sketch, n):
+    return lambda: part.center_arc_line(sketch, (0, 0), 1, 0, 90)
+
+@budget('iPart.sketch_circle', 5)
+def case_sketch_circle(part, sketch, n):
+    return lambda: part.sketch_circle(sketch, (0, 0), 1)
+
+@budget('iPart.two_point_rect', 16)
+def case_two_point_rect(part, sketch, n):
+    #takes the PlanarSketch itself
+    return lambda: part.two_point_rect(sketch.sketch_obj, (0, 0), (1, 2))
+
+@budget('iPart.two_point_centered_rect', 6)
+def case_two_point_centered_rect(part, sketch, n):
+    return lambda: part.two_point_centered_rect(sketch, (0, 0), (1, 2))
+
+@budget('iPart.sketch_slot', 11)
+def case_sketch_slot(part, sketch, n):
+    return lambda: part.sketch_slot(sketch, (0, 0), (2, 0), 0.5)
+
+@budget('iPart.sketch_center_slot', 11)
+def case_sketch_center_slot(part, sketch, n):
+    return lambda: part.sketch_center_slot(sketch, (0, 0), (2, 0), 0.5)
+
+@budget('iPart.sketch_points', 13, 3)
+def case_sketch_points(part, sketch, n):
+    xy=meander_pts(n)
+    return lambda: part.sketch_points(sketch, xy)
+
+@budget('iPart.sketch_point_coll', 13, 3)
+def case_sketch_point_coll(part, sketch, n):
+    pts=[tuple(pt) for pt in meander_pts(n).tolist()]
+    return lambda: part.sketch_point_coll(sketch, pts)
+
+@budget('iPart.sketch_lines', 13, 4)
+def case_sketch_lines(part, sketch, n):
+    xy=meander_pts(n)
+    return lambda: part.sketch_lines(sketch, xy, xy+1)
+
+@budget('iPart.sketch_polyline', 10, 4)
+def case_sketch_polyline(part, sketch, n):
+    xy=meander_pts(n)
+    return lambda: part.sketch_polyline(sketch, xy)
+
+@budget('iPart.poly_lines', 13, 4)
+def case_poly_lines(part, sketch, n):
+    pts=[tuple(pt) for pt in loop_pts(n).tolist()]
+    return lambda: part.poly_lines(sketch, pts)
+
+@budget('iPart.sketch_spline', 3, 2)
+def case_sketch_spline(part, sketch, n):
+    xy=meander_pts(n)
+    return lambda: part.sketch_spline(sketch, xy)
+
+@budget('iPart.draw_line', 4)
+def case_draw_line(part, sketch, n):
+    obj_dict={'obj_1': {'type': 'line', 'start_pt': (0, 0), 'end_pt': (1, 1)}}
+    return lambda: part.draw_line(sketch, obj_dict, 1)
+
+@budget('iPart.draw_line_arc', 5)
+def case_draw_line_arc(part, sketch, n):
+    obj_dict={'obj_1': {'type': 'line_arc', 'center_pt': (0, 0), 'start_pt': (1, 0), 'end_pt': (0, 1), 'flip': True}}
+    return lambda: part.draw_line_arc(sketch, obj_dict, 1)
+
+@budget('iPart.new_obj_collection', 1)
+def case_new_obj_collection(part, sketch, n):
+    return part.new_obj_collection
+
+@budget('iPart.create_obj_collection', 1, 1)
+def case_create_obj_collection(part, sketch, n):
+    lines=[part.sketch_line(sketch, (ii, 0), (ii, 1)) for ii in range(n)]
+    return lambda: part.create_obj_collection(lines)
+
+#work geometry and sketches
+
+@budget('iPart.add_workplane', 4)
+def case_add_workplane(part, sketch, n):
+    return lambda: part.add_workplane('xz', offset=1)
+
+@budget('iPart.add_offset_workplane', 2)
+def case_add_offset_workplane(part, sketch, n):
+    plane=part.compdef.WorkPlanes.Item(1)
+    return lambda: part.add_offset_workplane(plane, 1)
+
+@budget('iPart.new_sketch', 2)
+def case_new_sketch(part, sketch, n):
+    plane=part.add_workplane('xy')
+    return lambda: part.new_sketch(plane)
+
+@budget('iPart.delete_sketch', 1)
+def case_delete_sketch(part, sketch, n):
+    other=part.new_sketch(part.add_workplane('xy'))
+    return lambda: part.delete_sketch(other)
+
+@budget('iPart.copy_sketch', 12)
+def case_copy_sketch(part, sketch, n):
+    return lambda: part.copy_sketch(sketch)
+
+@budget('iPart.copy', 3)
+def case_copy(part, sketch, n):
+    return part.copy
+
+@budget('iPart.paste', 3)
+def case_paste(part, sketch, n):
+    return part.paste
+
+@budget('iPart.undo', 3)
+def case_undo(part, sketch, n):
+    return part.undo
+
+@budget('iPart.fixed_work_point', 5)
+def case_fixed_work_point(part, sketch, n):
+    return lambda: part.fixed_work_point(sketch, (1, 1))
+
+@budget('iPart.work_axes_2_pt', 8)
+def case_work_axes_2_pt(part, sketch, n):
+    return lambda: part.work_axes_2_pt(sketch, (0, 0), (1, 1))
+
+@budget('iPart.work_axes_from_line', 2)
+def case_work_axes_from_line(part, sketch, n):
+    line=part.sketch_line(sketch, (0, 0), (1, 1))
+    return lambda: part.work_axes_from_line(line)
+
+#features
+
+@budget('iPart.extrude', 9)
+def case_extrude(part, sketch, n):
+    circle=part.sketch_circle(sketch, (0, 0), 1)
+    return lambda: part.extrude(sketch, 1, circle)
+
+@budget('iPart.revolve_full', 7)
+def case_revolve_full(part, sketch, n):
+    circle=part.sketch_circle(sketch, (0, 2), 1)
+    return lambda: part.revolve_full(sketch, 'x', circle)
+
+@budget('iPart.revolve_ang', 7)
+def case_revolve_ang(part, sketch, n):
+    circle=part.sketch_circle(sketch, (0, 2), 1)
+    return lambda: part.revolve_ang(sketch, 90, 'x', circle)
+
+@budget('iPart.new_hole', 11)
+def case_new_hole(part, sketch, n):
+    return lambda: part.new_hole(sketch, (1, 1), 0.1, 0.5)
+
+@budget('iPart.hole_array', 17, 3)
+def case_hole_array(part, sketch, n):
+    xy=meander_pts(n)
+    return lambda: part.hole_array(sketch, xy, 0.1, 0.5)
+
+@budget('iPart.circular_feature_pattern', 14, sizes=(1, 10))
+def case_circular_feature_pattern(part, sketch, n):
+    coll=features(part, sketch, n)
+    return lambda: part.circular_feature_pattern(coll, 6, 360, 'z')
+
+@budget('iPart.rectangular_feature_pattern', 8, sizes=(1, 10))
+def case_rectangular_feature_pattern(part, sketch, n):
+    coll=features(part, sketch, n)
+    return lambda: part.rectangular_feature_pattern(coll, 4, 1.5, 'x')
+
+@budget('iPart.mirror_objects', 8, sizes=(1, 10))
+def case_mirror_objects(part, sketch, n):
+    coll=features(part, sketch, n)
+    return lambda: part.mirror_objects(coll, 'yz')
+
+#parameters
+
+@budget('iPart.user_parameter', 4)
+def case_user_parameter(part, sketch, n):
+    return lambda: part.user_parameter('thickness', 0.25)
+
+@budget('iPart.set_parameters', 2, 3)
+def case_set_parameters(part, sketch, n):
+    for ii in range(n):
+        part.user_parameter('p%d'%ii, ii)
+    values=dict(('p%d'%ii, ii+1) for ii in range(n))
+    return lambda: part.set_parameters(values)
+
+@budget('iPart.bind_parameter', 4)
+def case_bind_parameter(part, sketch, n):
+    part.user_parameter('thickness', 0.25)
+    feature=part.extrude(sketch, 1, part.sketch_circle(sketch, (0, 0), 1))
+    return lambda: part.bind_parameter(feature, 'distance', 'thickness*2')
+
+#document
+
+@budget('iPart.set_units', 4)
+def case_set_units(part, sketch, n):
+    return lambda: part.set_units('metric')
+
+@budget('iPart.set_visual_style', 1)
+def case_set_visual_style(part, sketch, n):
+    return lambda: part.set_visual_style(shaded=False, edges=True, hidden_edges=True)
+
+@budget('iPart.new_part', 6)
+def case_new_part(part, sketch, n):
+    return part.new_part
+
+@budget('iPart.save', 1)
+def case_save(part, sketch, n):
+    return part.save
+
+@budget('iPart.save_copy_as', 1)
+def case_save_copy_as(part, sketch, n):
+    part.save()
+    return lambda: part.save_copy_as(copy_as='stp')
+
+@budget('iPart.export', 15)
+def case_export(part, sketch, n):
+    return lambda: part.export(['stp'])
+
+@budget('iPart.close', 1)
+def case_close(part, sketch, n):
+    return lambda: part.close(save=False)
+
+@budget('iPart.batch', 10)
+def case_batch(part, sketch, n):
+    def run():
+        with part.batch():
+            pass
+    return run
+
+@budget('iPart.bulk_sketch', 11)
+def case_bulk_sketch(part, sketch, n):
+    def run():
+        with part.bulk_sketch(sketch, 100):
+            pass
+    return run
+
+@budget('sketch.bulk_edit', 11)
+def case_bulk_edit(part, sketch, n):
+    def run():
+        with sketch.bulk_edit():
+            pass
+    return run
+
+@budget('sketch.edit', 1)
+def case_edit(part, sketch, n):
+    return sketch.edit
+
+@budget('sketch.exit_edit', 1)
+def case_exit_edit(part, sketch, n):
+    return sketch.exit_edit
+
+#structure, path building is Python only
+
+@budget('structure.add_line', 0)
+def case_add_line(part, sketch, n):
+    s=structure(part, sketch)
+    return lambda: s.add_line(1, 45)
+
+@budget('structure.add_line_arc', 0)
+def case_add_line_arc(part, sketch, n):
+    s=structure(part, sketch)
+    return lambda: s.add_line_arc(0, 90, 1)
+
+@budget('structure.add_bspline', 0)
+def case_add_bspline(part, sketch, n):
+    s=structure(part, sketch)
+    return lambda: s.add_bspline(n, [(0, 0), (1, 2), (3, -1), (4, 1)])
+
+@budget('structure.add_polyline', 0)
+def case_add_polyline(part, sketch, n):
+    s=structure(part, sketch)
+    return lambda: s.add_polyline(loop_pts(n))
+
+@budget('structure.fit_curves', 0)
+def case_fit_curves(part, sketch, n):
+    s=structure(part, sketch)
+    s.add_point_arc(0, 180, 1, segments=n)
+    return lambda: s.fit_curves(types=('point_arc',))
+
+@budget('structure.add_point', 0)
+def case_add_point(part, sketch, n):
+    s=structure(part, sketch)
+    return lambda: s.add_point((1, 1))
+
+@budget('structure.add_point_line', 0)
+def case_add_point_line(part, sketch, n):
+    s=structure(part, sketch)
+    return lambda: s.add_point_line(1, 90, n)
+
+@budget('structure.add_point_arc', 0)
+def case_add_point_arc(part, sketch, n):
+    s=structure(part, sketch)
+    return lambda: s.add_point_arc(0, 180, 1, segments=n)
+
+@budget('structure.append_element', 0)
+def case_append_element(part, sketch, n):
+    s=structure(part, sketch)
+    return lambda: s.append_element({'type': 'poly', 'pts': [tuple(pt) for pt in loop_pts(n).tolist()]})
+
+@budget('structure.move', 0)
+def case_move(part, sketch, n):
+    s=structure(part, sketch)
+    return lambda: s.move(1, 90)
+
+@budget('structure.obj_type_check', 0)
+def case_obj_type_check(part, sketch, n):
+    s=structure(part, sketch)
+    return lambda: s.obj_type_check('line')
+
+@budget('structure.get_pts', 0)
+def case_get_pts(part, sketch, n):
+    s=structure(part, sketch)
+    s.add_point_line(1, 90, n)
+    return s.get_pts
+
+@budget('structure.get_line_pts', 0)
+def case_get_line_pts(part, sketch, n):
+    return meander(part, sketch, n).get_line_pts
+
+@budget('structure.get_poly_pts', 0)
+def case_get_poly_pts(part, sketch, n):
+    s=structure(part, sketch)
+    s.append_element({'type': 'poly', 'pts': [tuple(pt) for pt in loop_pts(n).tolist()]})
+    return s.get_poly_pts
+
+@budget('structure.get_plt_pts', 0)
+def case_get_plt_pts(part, sketch, n):
+    return meander(part, sketch, n).get_plt_pts
+
+@budget('structure.validate', 0)
+def case_validate(part, sketch, n):
+    s=meander(part, sketch, n)
+    return lambda: s.validate(close_path=True)
+
+@budget('structure.draw_path', 17, 15.5)
+def case_draw_path(part, sketch, n):
+    s=meander(part, sketch, n)
+    return lambda: s.draw_path(close_path=True)
+
+@budget('structure.draw_poly', 13, 4)
+def case_draw_poly(part, sketch, n):
+    s=structure(part, sketch)
+    s.append_element({'type': 'poly', 'pts': [tuple(pt) for pt in loop_pts(n).tolist()]})
+    return lambda: s.draw_poly(1)
+
+@budget('structure.draw_line', 4)
+def case_structure_draw_line(part, sketch, n):
+    s=structure(part, sketch)
+    s.add_line(1, 90)
+    return lambda: s.draw_line(s.obj_dict, 1)
+
+@budget('structure.draw_line_arc', 5)
+def case_structure_draw_line_arc(part, sketch, n):
+    s=structure(part, sketch)
+    s.add_line_arc(0, 90, 1)
+    return lambda: s.draw_line_arc(s.obj_dict, 1)
+
+@budget('structure.draw_spline', 3, 2)
+def case_structure_draw_spline(part, sketch, n):
+    s=structure(part, sketch)
+    s.add_bspline(n, [(0, 0), (1, 2), (3, -1), (4, 1)])
+    return lambda: s.draw_spline(s.obj_dict, 1)
+
+def public_methods():
+    names=[]
+    for cls, prefix in ((iPart, 'iPart'), (iPart.sketch, 'sketch'), (structure, 'structure')):
+        for name, _ in inspect.getmembers(cls, inspect.isfunction):
+            if not name.startswith('_'):
+                names.append('%s.%s'%(prefix, name))
+    return names
+
+def count_calls(case, n, path):
+    backend=sim_backend()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        part=iPart(path, 'budget.ipt', backend=backend)
+    sketch=part.new_sketch(part.add_workplane('xy'))
+    call=case(part, sketch, n)
+    backend.reset_calls()
+    #save_copy_as and export print the files they write
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        call()
+    return backend.call_count, backend.calls
+
+def check_budgets(sizes, only=None, show=False):
+    '''
+    Returns [(method, [(n, calls)], a, b, status)] and the public methods without a budget
+    '''
+    path=tempfile.mkdtemp(prefix='pyinventor_budget_')
+    results=[]
+    try:
+        for name in sorted(CASES):
+            if only!=None and not any(key in name for key in only):
+                continue
+            case, a, b, case_sizes=CASES[name]
+            counts=[]
+            try:
+                for n in (case_sizes or sizes):
+                    calls, members=count_calls(case, n, path)
+                    counts.append((n, calls))
+                    if show==True:
+                        print('%s n=%d: %s'%(name, n, dict(members.most_common(8))))
+            except Exception as e:
+                results.append((name, counts, a, b, 'ERROR %s'%e))
+                continue
+            ok=all(calls<=a+b*n for n, calls in counts)
+            results.append((name, counts, a, b, 'ok' if ok else 'OVER BUDGET'))
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+    missing=[name for name in public_methods() if name not in CASES and name not in EXEMPT]
+    return results, missing
+
+def main(argv=None):
+    parser=argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--only', nargs='+', default=None, help='check the methods whose name contains one of these')
+    parser.add_argument('--show', action='store_true', help='print the most called members of each run')
+    args=parser.parse_args(argv)
+
+    results, missing=check_budgets(args.sizes, args.only, args.show)
+    print('%-36s %-10s %s'%('method', 'budget', 'calls at n'))
+    failed=0
+    for name, counts, a, b, status in results:
+        failed+=status!='ok'
+        print('%-36s %-10s %s  %s'%(name, '%d+%gn'%(a, b) if b else '%d'%a,
+                                    '  '.join('%d:%d'%(n, calls) for n, calls in counts), status))
+    for name in missing:
+        print('%-36s no call budget, add one (or an EXEMPT entry)'%name)
+    print('%d of %d methods failed, %d without a budget'%(failed, len(results), len(missing)))
+    return 1 if failed or (missing and args.only==None) else 0
+
+if __name__=='__main__':
+    sys.exit(main())
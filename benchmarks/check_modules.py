@@ -0,0 +1,273 @@
+'''
+
+Deterministic checks of the pure Python modules behind structure: contour simplification,
+curve fitting, path validation, the segment store and the geometry helpers, and the
+output file names of saves on the simulated backend. Each check builds fixed inputs and
+compares the result against an exact or bounded expectation. A failed check gives exit
+code 1.
+
+    python benchmarks/check_modules.py [--only contour fitting]
+
+'''
+
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+import warnings
+import traceback
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyInventor import inv_session
+from PyInventor.inv_sim import sim_backend
+from PyInventor.contour import douglas_peucker, load_contour
+from PyInventor.fitting import fit_runs
+from PyInventor.validate import validate_path
+from PyInventor.segments import segment_store, segment_view
+from PyInventor.geometry import affine, arc_xy, arc_pattern, circle_pattern, rotate_xy, mirror_xy, translate_xy, rotate_pts, round_pts
+
+CHECKS=[]
+
+def check(name):
+    '''
+    Registers fn() as the check name, fn raises on a failure
+    '''
+    def register(fn):
+        CHECKS.append((name, fn))
+        return fn
+    return register
+
+def expect(cond, msg, *args):
+    if not cond:
+        raise Exception('ERROR: '+msg%args)
+
+def wavy_contour(n):
+    #a fixed noisy spiral, points are distinct and the path never stalls
+    rng=np.random.RandomState(7)
+    t=np.linspace(0, 6*np.pi, n)
+    r=1+0.1*t+0.002*rng.standard_normal(n)
+    return np.column_stack((r*np.cos(t), r*np.sin(t)))
+
+def max_deviation(xy, kept):
+    '''
+    Largest distance of the points of xy from the polyline through xy[kept], each point
+    measured to the segment of the kept vertices around it
+    '''
+    worst=0.0
+    for first, last in zip(kept[:-1], kept[1:]):
+        a=xy[first]
+        seg=xy[last]-a
+        pts=xy[first:last+1]-a
+        seg_len2=float(np.dot(seg, seg))
+        t=np.clip(np.dot(pts, seg)/seg_len2, 0, 1) if seg_len2>0 else np.zeros(len(pts))
+        off=pts-np.outer(t, seg)
+        worst=max(worst, float(np.sqrt(np.einsum('ij,ij->i', off, off).max())))
+    return worst
+
+def kept_indices(xy, simplified):
+    #positions of the simplified vertices in xy, they are copies of input points in order
+    kept=[]
+    ind=0
+    for pt in simplified:
+        while not np.array_equal(xy[ind], pt):
+            ind+=1
+        kept.append(ind)
+    return np.array(kept)
+
+@check('contour/douglas_peucker tolerance')
+def check_dp_tolerance():
+    xy=wavy_contour(5000)
+    for tol in (1e-2, 1e-3, 1e-4):
+        kept=douglas_peucker(xy, tol)
+        expect(kept[0]==0 and kept[-1]==len(xy)-1, 'end points dropped at tol %g', tol)
+        dev=max_deviation(xy, kept)
+        expect(dev<=tol, 'deviation %g over tol %g', dev, tol)
+
+@check('contour/chunk boundaries')
+def check_dp_chunks():
+    xy=wavy_contour(5000)
+    tol=1e-3
+    whole=load_contour(xy, tol)
+    for chunk_size in (777, 1000, 4999):
+        simplified=load_contour(xy, tol, chunk_size=chunk_size)
+        kept=kept_indices(xy, simplified)
+        dev=max_deviation(xy, kept)
+        expect(dev<=tol, 'deviation %g over tol %g with chunks of %d', dev, tol, chunk_size)
+        #the last point of each chunk starts the next, so it stays a vertex
+        bounds=np.arange(chunk_size-1, len(xy)-1, chunk_size)
+        expect(np.all(np.isin(bounds, kept)), 'chunk boundary dropped with chunks of %d', chunk_size)
+        expect(len(simplified)<=len(whole)+len(bounds), '%d vertices with chunks of %d, %d unchunked',
+               len(simplified), chunk_size, len(whole))
+    expect(len(load_contour(xy, None, chunk_size=777))==len(xy), 'points lost without tol')
+
+@check('fitting/arc on rounded points')
+def check_fit_arc():
+    for start, stop, ccw in ((0, 150, True), (150, 0, False), (-80, 60, True)):
+        #points as they come back from a text file with 5 digits
+        xy=np.array(round_pts(arc_xy(start, stop, 2.5, (1, -1), 200)))
+        runs=fit_runs(xy, tol=2e-5)
+        expect(len(runs)==1, '%d runs for the arc %s to %s', len(runs), start, stop)
+        kind, i, j, center, run_ccw=runs[0]
+        expect((kind, i, j, run_ccw)==('arc', 0, 199, ccw), 'run %s for the arc %s to %s', runs[0][:3], start, stop)
+        expect(np.hypot(center[0]-1, center[1]+1)<1e-4, 'arc center %s', center)
+
+@check('fitting/line and arc runs')
+def check_fit_runs():
+    line=np.column_stack((np.linspace(0, -4, 50), np.ones(50)))
+    #arcs are fitted up to a half turn
+    arc=arc_xy(90, 240, 1, (-4, 0), 50)
+    xy=np.array(round_pts(np.vstack((line, arc[1:]))))
+    runs=fit_runs(xy, tol=2e-5)
+    expect([run[:3] for run in runs]==[('line', 0, 49), ('arc', 49, 98)], 'runs %s', [run[:3] for run in runs])
+    #too few points for a run, everything is rest
+    runs=fit_runs(xy[:3], tol=2e-5)
+    expect([run[:3] for run in runs]==[('rest', 0, 2)], 'runs %s for 3 points', [run[:3] for run in runs])
+
+@check('validate/closed, open and crossing paths')
+def check_validate():
+    square=[(0, 0), (1, 0), (1, 1), (0, 1), (0, 0)]
+    res=validate_path(square)
+    expect(res['valid'] and res['closed'], 'square rejected: %s', res['errors'])
+    expect(abs(res['area']-1)<1e-12 and res['bbox']==(0.0, 0.0, 1.0, 1.0), 'square area %s, bbox %s', res['area'], res['bbox'])
+    res=validate_path(square[::-1])
+    expect(abs(res['area']+1)<1e-12, 'clockwise square area %s', res['area'])
+    res=validate_path(square[:-1])
+    expect(not res['valid'] and not res['closed'] and abs(res['gap']-1)<1e-12, 'open square accepted')
+    expect(validate_path(square[:-1], closed=False)['valid'], 'open path rejected with closed=False')
+    res=validate_path([(0, 0), (1, 1), (1, 0), (0, 1), (0, 0)])
+    expect(not res['valid'] and res['intersection']==(0, 2), 'bow tie intersection %s', res['intersection'])
+    res=validate_path([(0, 0), (1, 0), (1, 1)])
+    expect(not res['valid'], 'open triangle accepted')
+    res=validate_path([(0, 0), (1, 0), (0, 0)])
+    expect(not res['valid'], 'two point path accepted')
+
+@check('segments/view keys')
+def check_segment_keys():
+    store=segment_store(capacity=2, pt_capacity=2)
+    store.append('origin', [(0, 0)])
+    for ii in range(25):
+        store.append('line', [(ii, 0), (ii+1, 0)])
+    view=segment_view(store)
+    keys=list(view)
+    expect(keys[:3]==['start', 'obj_1', 'obj_2'] and len(keys)==len(view)==26, 'keys %s', keys[:3])
+    for ind, key in enumerate(keys):
+        expect(view.index(key)==ind and view.key(ind)==key and key in view, 'key %s does not round trip', key)
+    for key in ('obj_0', 'obj_01', 'obj_26', 'obj_-1', 'obj_x', 'line_1', 'obj', 1, None):
+        expect(key not in view, 'invalid key %r found', key)
+        try:
+            view[key]
+        except KeyError:
+            continue
+        expect(False, 'invalid key %r read', key)
+
+@check('segments/element round trip')
+def check_segment_elements():
+    elements=[{'type': 'origin', 'pts': [(0.0, 0.0)]},
+              {'type': 'line', 'start_pt': (0.0, 0.0), 'end_pt': (1.0, 0.0)},
+              {'type': 'line_arc', 'center_pt': (1.0, 1.0), 'start_pt': (1.0, 0.0), 'end_pt': (2.0, 1.0), 'flip': True},
+              {'type': 'spline', 'pts': [(2.0, 1.0), (3.0, 2.0), (4.0, 1.0)], 'start_pt': (2.0, 1.0), 'end_pt': (4.0, 1.0)},
+              {'type': 'point_arc', 'pts': [(4.0, 1.0), (5.0, 2.0)]}]
+    store=segment_store(capacity=1, pt_capacity=1)
+    for obj in elements:
+        store.append_element(obj)
+    for ind, obj in enumerate(elements):
+        expect(store.element(ind)==obj, 'element %d read back as %s', ind, store.element(ind))
+    #a pending transform is applied once, on the first read
+    xform=affine().rotate(90)
+    store.append_element({'type': 'line', 'start_pt': (1.0, 0.0), 'end_pt': (2.0, 0.0)}, xform)
+    for _ in range(2):
+        pts=store.points(len(elements))
+        expect(np.allclose(pts, [(0, 1), (0, 2)]), 'transformed line %s', pts.tolist())
+
+@check('geometry/round trips')
+def check_geometry():
+    xy=wavy_contour(100)
+    center=(0.3, -1.2)
+    expect(np.allclose(rotate_xy(rotate_xy(xy, 37, center), -37, center), xy), 'rotate and back moved points')
+    expect(np.allclose(rotate_xy(xy, 360, center), xy), 'full turn moved points')
+    for angle in (0, 30, 90, 135):
+        twice=mirror_xy(mirror_xy(xy, angle, center), angle, center)
+        expect(np.allclose(twice, xy), 'mirror about %d twice moved points', angle)
+        xform=affine().mirror(angle, center)
+        expect(np.allclose(xform.apply(xy), mirror_xy(xy, angle, center)), 'affine mirror about %d differs', angle)
+    chain=affine().rotate(30, center).mirror(0, center).translate((2, 3))
+    steps=translate_xy(mirror_xy(rotate_xy(xy, 30, center), 0, center), (2, 3))
+    expect(np.allclose(chain.apply(xy), steps), 'affine chain differs from the steps')
+    expect(np.allclose(chain.apply_pt(tuple(xy[5])), steps[5]), 'apply_pt differs from apply')
+    pts=rotate_pts([tuple(pt) for pt in xy.tolist()], 45, center)
+    expect(type(pts)==list and type(pts[0])==tuple, 'list input gave %s', type(pts))
+    expect(np.allclose(pts, rotate_xy(xy, 45, center)), 'list and array rotate differ')
+
+@check('geometry/pattern centers')
+def check_pattern_centers():
+    expect(np.allclose(arc_pattern(0, 90, 1, center_pt=[1, 2], segments=3), arc_xy(0, 90, 1, (1, 2), 3)), 'arc_pattern points')
+    for center in ((1, 2, 3), (1,), np.array([1.0, 2.0]), 1.0):
+        for pattern in (lambda: arc_pattern(0, 90, 1, center_pt=center, segments=3),
+                        lambda: circle_pattern(1, center_pt=center, segments=3)):
+            try:
+                pattern()
+            except Exception as e:
+                expect('ERROR' in str(e), 'center %r raised %s', center, e)
+                continue
+            expect(False, 'center %r accepted', center)
+
+def saved_paths(path, runs, overwrite):
+    #saves the same part runs times, a new session each time as a rerun of the script
+    paths=[]
+    for _ in range(runs):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            session=inv_session(backend=sim_backend())
+            part=session.new_part(path, 'cav_2.ipt', overwrite=overwrite)
+        paths.append(part.save())
+    return paths
+
+@check('file_index/rerun names')
+def check_rerun_names():
+    path=tempfile.mkdtemp(prefix='pyinventor_check_')
+    try:
+        target=os.path.join(path, 'cav_2.ipt')
+        paths=saved_paths(path, 3, True)
+        expect(paths==[target]*3, 'overwrite=True reruns saved to %s', [os.path.basename(p) for p in paths])
+        #a part opened from its file with overwrite=False is saved in place
+        paths=saved_paths(path, 2, False)
+        expect(paths==[target]*2, 'overwrite=False reruns saved to %s', [os.path.basename(p) for p in paths])
+        expect(sorted(os.listdir(path))==['.pyinventor_index.json', 'cav_2.ipt'], 'files %s', sorted(os.listdir(path)))
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+def run_checks(only=None):
+    '''
+    Returns [(name, error or None)]
+    '''
+    results=[]
+    for name, fn in CHECKS:
+        if only!=None and not any(key in name for key in only):
+            continue
+        try:
+            fn()
+            results.append((name, None))
+        except Exception as e:
+            results.append((name, '%s\n%s'%(e, traceback.format_exc().strip().splitlines()[-3].strip())))
+    return results
+
+def main(argv=None):
+    parser=argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--only', nargs='+', default=None, help='run the checks whose name contains one of these')
+    args=parser.parse_args(argv)
+
+    results=run_checks(args.only)
+    failed=0
+    for name, error in results:
+        failed+=error!=None
+        print('%-40s %s'%(name, 'ok' if error==None else 'FAILED'))
+        if error!=None:
+            print('    '+error.replace('\n', '\n    '))
+    print('%d of %d checks failed'%(failed, len(results)))
+    return 1 if failed else 0
+
+if __name__=='__main__':
+    sys.exit(main())
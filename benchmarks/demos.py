@@ -0,0 +1,210 @@
+'''
+
+The tutorial notebook demos (_Tutorial_Notebooks/PyInventor Demo.ipynb) as functions of
+an inv_session, so they can be replayed on the simulated Inventor backend by the
+benchmark runner. Each builds, saves and exports the part to path and returns the iPart.
+
+    python benchmarks/demos.py [--path out_dir]     #builds every demo on the simulator
+
+'''
+
+import os
+import sys
+import argparse
+import tempfile
+import warnings
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyInventor import structure, circle_pattern
+from PyInventor.pyinvent import inv_session
+from PyInventor.inv_sim import sim_backend
+
+def coax(session, path, fname='Coax Demo.ipt'):
+    '''
+    Coaxial cavity, a half profile revolved out of a cylinder
+    '''
+    part=session.new_part(path=path, prefix=fname, units='imperial', overwrite=True)
+    part.set_visual_style(shaded=False, edges=True, hidden_edges=True)
+    revolve_wp=part.add_workplane(plane='xy')
+    stock_wp=part.add_workplane(plane='xz', offset=2)
+    stock_sketch=part.new_sketch(stock_wp)
+    revolve_sketch=part.new_sketch(revolve_wp)
+
+    s=structure(part, revolve_sketch, start=(0, 2))
+    s.add_line(.3, 180)
+    s.add_line(1.85, 270)
+    s.add_line_arc(start_angle=180, stop_angle=0, radius=.094, flip_dir=True, rotation=0)
+    s.add_line(.231, 90)
+    s.add_line_arc(start_angle=0, stop_angle=270, radius=.0625, flip_dir=False, rotation=180)
+    s.add_line(.038+.0115, 0)
+    rev_path=s.draw_path(close_path=True)
+
+    stock_top_circle=part.sketch_circle(stock_sketch, center=(0, 0), radius=.5)
+    part.extrude(stock_sketch, thickness=2, obj_collection=stock_top_circle, direction='negative', operation='join')
+    part.revolve_full(revolve_sketch, axis='y', obj_collection=rev_path, operation='cut')
+    part.view.GoHome()
+    part.save()
+    part.save_copy_as(copy_name=fname.replace('.ipt', '.stp'))
+    return part
+
+def donut(session, path, fname='Half Off-Axis Donut Revolve Demo.ipt'):
+    '''
+    Half donut, a circle revolved about an in plane sketch line
+    '''
+    part=session.new_part(path=path, prefix=fname, units='imperial', overwrite=True)
+    sketch_1=part.new_sketch(part.add_workplane(plane='xy'))
+    circle=part.sketch_circle(sketch_1, (0, 1), .2)
+    rot_axis=part.sketch_line(sketch_1, (0, 0), (.25, .5))
+    part.revolve_ang(sketch_1, angle=180, axis=rot_axis, obj_collection=circle, operation='join', direction='positive')
+    part.save()
+    part.save_copy_as(copy_name=fname.replace('.ipt', '.stp'))
+    return part
+
+def flute(session, path, fname='Cylindrical Flute Demo.ipt', num_holes=11):
+    '''
+    Cylindrical flute cavity, two columns of holes patterned around a cylinder
+    '''
+    part=session.new_part(path=path, prefix=fname, units='imperial', overwrite=True)
+    part.set_visual_style(shaded=False, edges=True, hidden_edges=True)
+    part.view.GoHome()
+    radius=1
+    height=2.125
+    lower_wp=part.add_workplane(plane='xy')
+    hole_wp_1=part.add_workplane(plane='yz', offset=radius)
+    hole_wp_2=part.add_workplane(plane='yz', offset=-radius)
+    sketch_1=part.new_sketch(lower_wp)
+    circle=part.sketch_circle(sketch_1, (0, 0), radius)
+    part.extrude(sketch_1, thickness=height, obj_collection=circle, direction='positive', operation='join')
+    part.view.Fit()
+
+    z_spacing=.2375
+    hole_depth=1.25
+    hole_dia=.1875
+    num_rows=7
+    z_start=z_spacing*((height-num_rows*(z_spacing)))+hole_dia/2
+    for hole_wp, rows, start, direction in ((hole_wp_1, num_rows, z_start, 'positive'),
+                                            (hole_wp_2, num_rows-1, z_start+z_spacing/2, 'negative')):
+        hole_sketch=part.new_sketch(hole_wp)
+        hole_locs=structure(part, hole_sketch, start=(0, start))
+        hole_locs.add_point_line(distance=rows*z_spacing, direction=90, num_points=rows)
+        hole_coll=part.new_obj_collection()
+        for pts in hole_locs.get_pts()[0]:
+            hole_coll.Add(part.new_hole(hole_sketch, pts, hole_dia, hole_depth, direction=direction, FlatBottom=False, BottomTipAngle=None))
+        part.circular_feature_pattern(obj_collection=hole_coll, count=num_holes, angle=360, axis='z', axis_dir=True, fit_within_ang=True)
+    part.save()
+    part.save_copy_as(copy_name=fname.replace('.ipt', '.stp'))
+    return part
+
+def cavity_lattice(session, path, fname='Cavity Lattice Demo.ipt', side_cav_num=10):
+    '''
+    Square lattice of coupled cavities with pins, one cell patterned in x and y
+    '''
+    part=session.new_part(path=path, prefix=fname, units='imperial', overwrite=True)
+    part.set_visual_style(shaded=True, edges=True, hidden_edges=False)
+    cav_width=1.0
+    cav_corner_rad=.25
+    pin_dia=.125
+    pin_height=.25
+    pin_spacing=.25
+    cav_depth=1.5
+    cav_edge_len=cav_width-2*cav_corner_rad
+    cav_spacing=.125
+    edge_spacing=.25
+    stock_z_offset=.25
+    coupler_width=.125
+    coupler_len=.375
+    coupler_depth=.125
+    stock_width=cav_width*side_cav_num+cav_spacing*(side_cav_num-1)+2*edge_spacing
+    stock_height=cav_depth+stock_z_offset
+    stock_origin=(0, 0)
+    pitch=cav_spacing+cav_width
+
+    stock_sketch=part.new_sketch(part.add_workplane(plane='xy'))
+    cav_sketch=part.new_sketch(part.add_workplane(plane='xy', offset=stock_z_offset))
+
+    stock_base=structure(part, stock_sketch, start=stock_origin)
+    stock_base.add_line(stock_width, 180)
+    stock_base.add_line(stock_width, 90)
+    stock_base.add_line(stock_width, 0)
+    stock_path=stock_base.draw_path(close_path=True)
+    part.extrude(stock_sketch, thickness=stock_height, obj_collection=stock_path, direction='positive', operation='join')
+    part.view.Fit()
+
+    slot_x_center=(stock_origin[0]-edge_spacing-cav_width-cav_spacing/2, stock_origin[1]+edge_spacing+cav_width/2)
+    slot_x_end=(slot_x_center[0]+coupler_len/2-coupler_width/2, slot_x_center[1])
+    slot_y_center=(stock_origin[0]-edge_spacing-cav_width/2, stock_origin[1]+edge_spacing+cav_width+cav_spacing/2)
+    slot_y_end=(slot_y_center[0], slot_y_center[1]+coupler_len/2-coupler_width/2)
+    x_slot=part.sketch_center_slot(stock_sketch, center=slot_x_center, end=slot_x_end, width=coupler_width)
+    y_slot=part.sketch_center_slot(stock_sketch, center=slot_y_center, end=slot_y_end, width=coupler_width)
+    stock_sketch.sketch_obj.Visible=True
+    x_coupler_obj=[part.extrude(stock_sketch, thickness=stock_z_offset+coupler_depth, obj_collection=x_slot, direction='positive', operation='cut')]
+    y_coupler_obj=[part.extrude(stock_sketch, thickness=stock_z_offset+coupler_depth, obj_collection=y_slot, direction='positive', operation='cut')]
+
+    cav_origin=(stock_origin[0]-edge_spacing, stock_origin[1]+edge_spacing+cav_corner_rad)
+    cavity_base=structure(part, cav_sketch, start=cav_origin)
+    cavity_base.add_line(cav_edge_len, 90)
+    cavity_base.add_line_arc(start_angle=0, stop_angle=90, radius=cav_corner_rad, flip_dir=True, rotation=0)
+    cavity_base.add_line(cav_edge_len, 180)
+    cavity_base.add_line_arc(start_angle=90, stop_angle=180, radius=cav_corner_rad, flip_dir=True, rotation=0)
+    cavity_base.add_line(cav_edge_len, 270)
+    cavity_base.add_line_arc(start_angle=0, stop_angle=270, radius=cav_corner_rad, flip_dir=True, rotation=0)
+    cavity_base.add_line(cav_edge_len, 0)
+    cavity_base.add_line_arc(start_angle=90, stop_angle=0, radius=cav_corner_rad, flip_dir=True, rotation=0)
+    cav_base=cavity_base.draw_path(close_path=True)
+    cav_objects=[part.extrude(cav_sketch, thickness=cav_depth, obj_collection=cav_base, direction='positive', operation='cut')]
+
+    pin_origin=(stock_origin[0]-edge_spacing-cav_width/2, stock_origin[1]+edge_spacing+cav_width/2)
+    pin_pts=circle_pattern(radius=pin_spacing/np.sqrt(3), center_pt=pin_origin, segments=3, offset=90)
+    pin_obj=[part.sketch_circle(cav_sketch, center=pts, radius=pin_dia/2) for pts in pin_pts]
+    cav_sketch.sketch_obj.Visible=True
+    for pins in pin_obj:
+        cav_objects.append(part.extrude(cav_sketch, thickness=pin_height, obj_collection=pins, direction='positive', operation='join'))
+
+    cav_obj_coll=part.create_obj_collection(cav_objects)
+    cav_obj_coll.Add(part.rectangular_feature_pattern(obj_collection=cav_obj_coll, count=side_cav_num, spacing=pitch, axis='x', direction='negative', fit_within_len=False))
+    part.rectangular_feature_pattern(obj_collection=cav_obj_coll, count=side_cav_num, spacing=pitch, axis='y', direction='positive', fit_within_len=False)
+
+    for coupler_obj, x_count, y_count in ((x_coupler_obj, side_cav_num-1, side_cav_num), (y_coupler_obj, side_cav_num, side_cav_num-1)):
+        coupler_coll=part.create_obj_collection(coupler_obj)
+        coupler_coll.Add(part.rectangular_feature_pattern(obj_collection=coupler_coll, count=x_count, spacing=pitch, axis='x', direction='negative', fit_within_len=False))
+        part.rectangular_feature_pattern(obj_collection=coupler_coll, count=y_count, spacing=pitch, axis='y', direction='positive', fit_within_len=False)
+
+    cav_sketch.sketch_obj.Visible=False
+    stock_sketch.sketch_obj.Visible=False
+    part.view.GoHome()
+    part.save()
+    part.save_copy_as(copy_name=fname.replace('.ipt', '.stp'))
+    return part
+
+DEMOS={'cavity_lattice': cavity_lattice,
+       'coax': coax,
+       'flute': flute,
+       'donut': donut}
+
+def run_demo(name, path, backend=None):
+    '''
+    Builds the demo name on backend (default a new sim_backend), returns the backend
+    '''
+    backend=backend if backend!=None else sim_backend()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        DEMOS[name](inv_session(backend), path)
+    return backend
+
+def main(argv=None):
+    parser=argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--path', default=None, help='output directory, default a temporary one')
+    args=parser.parse_args(argv)
+
+    path=args.path if args.path!=None else tempfile.mkdtemp(prefix='pyinventor_demos_')
+    os.makedirs(path, exist_ok=True)
+    for name in DEMOS:
+        backend=run_demo(name, path)
+        print('%-16s %8d round trips  %s'%(name, backend.call_count, dict(backend.app.ActiveDocument.ComponentDefinition.Features._summary())))
+    print('written to %s'%path)
+    return 0
+
+if __name__=='__main__':
+    sys.exit(main())
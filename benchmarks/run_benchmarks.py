@@ -0,0 +1,250 @@
+'''
+
+Benchmark suite runner. Times the geometry helpers at several sizes, structure building
+and get_plt_pts on long paths, and the tutorial demos (benchmarks/demos.py) on the
+simulated Inventor backend, then compares against the stored baseline
+(benchmarks/baseline.json). Times are compared relative to a fixed calibration workload
+timed in the same run, so a busy machine doesn't read as a regression. A case is flagged
+when its best time is more than --tolerance (and --min-delta seconds) slower than the
+baseline, or when a demo makes more simulated COM round trips than it did (round trips
+are exact, so any increase is a regression). Demo times include writing the saved and
+exported files and are allowed twice the tolerance. Each demo is also built through
+build_cache.cached_build, the cache/ cases time the cache hit (also allowed twice the
+tolerance) and fail if a demo can't be keyed or misses the cache. The run fails (exit
+code 1) if a case is flagged.
+
+    python benchmarks/run_benchmarks.py [--repeat 5] [--tolerance 0.5] [--only demo]
+    python benchmarks/run_benchmarks.py --update     #store this machine's results as the baseline
+
+Times depend on the machine, regenerate the baseline with --update where the suite runs.
+
+'''
+
+import gc
+import os
+import sys
+import json
+import time
+import shutil
+import contextlib
+import argparse
+import platform
+import tempfile
+import warnings
+import numpy as np
+
+BENCH_DIR=os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from PyInventor import geometry as geo
+from PyInventor.inv_sim import sim_backend
+from PyInventor.pyinvent import inv_session
+from bench_structure import meander
+from demos import DEMOS, run_demo
+
+BASELINE=os.path.join(BENCH_DIR, 'baseline.json')
+BASELINE_VERSION=1
+
+def geometry_cases(sizes):
+    rng=np.random.RandomState(0)
+    cases=[]
+    for n in sizes:
+        xy=rng.uniform(-10, 10, (n, 2))
+        pts=geo.to_pts(xy)
+        c_xy=np.cumsum(rng.uniform(-1, 1, (max(n//10, 4), 2)), axis=0)
+        cases.extend([('geometry/rotate_pts/%d'%n, lambda pts=pts: geo.rotate_pts(pts, 30, (1, 2))),
+                      ('geometry/rotate_xy/%d'%n, lambda xy=xy: geo.rotate_xy(xy, 30, (1, 2))),
+                      ('geometry/mirror_xy/%d'%n, lambda xy=xy: geo.mirror_xy(xy, 30, (1, 2))),
+                      ('geometry/arc_pattern/%d'%n, lambda n=n: geo.arc_pattern(0, 270, 2, (1, 1), n)),
+                      ('geometry/arc_pts_pattern/%d'%n, lambda n=n: geo.arc_pts_pattern((1, 0), (0, 1), (0, 0), n)),
+                      ('geometry/b_spline/%d'%n, lambda n=n: geo.b_spline([(0, 0), (1, 2), (3, -1), (4, 1)], n, 3)),
+                      ('geometry/bspline_xy/%d'%n, lambda c_xy=c_xy, n=n: geo.bspline_xy(c_xy, n, 3))])
+    return cases
+
+def structure_cases(sizes):
+    import warnings
+    from PyInventor import iPart
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        part=iPart(backend=sim_backend())
+    sketch=part.new_sketch(part.add_workplane('xy'))
+    cases=[]
+    for n_seg in sizes:
+        cases.append(('structure/build/%d'%n_seg, lambda n_seg=n_seg: meander(part, sketch, n_seg)))
+        cases.append(('structure/get_plt_pts/%d'%n_seg, lambda s=meander(part, sketch, n_seg): s.get_plt_pts()))
+    return cases
+
+def demo_cases(path):
+    return [('demo/%s'%name, lambda name=name: run_demo(name, path)) for name in DEMOS]
+
+def cache_cases(path, only=None):
+    #a cached build of each demo, primed once, the timed run must be a cache hit
+    from PyInventor.build_cache import build_cache, cached_build
+    from PyInventor.journal import record_build
+    cache=build_cache(os.path.join(path, 'build_cache'))
+    cases=[]
+    for name in DEMOS:
+        if only!=None and not any(key in 'cache/%s'%name for key in only):
+            continue
+        build=lambda session, params, name=name: DEMOS[name](session, path)
+        with warnings.catch_warnings(), open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            warnings.simplefilter('ignore')
+            journal=record_build(build)
+            if cache.key(journal)==None:
+                raise Exception('ERROR: demo %s cant be cached: %s'%(name, journal.opaque))
+            cached_build(build, None, cache, inv_session(sim_backend()))
+        def hit(build=build, name=name):
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                output, hit=cached_build(build, None, cache, inv_session(sim_backend()))
+            if hit!=True:
+                raise Exception('ERROR: cached build of demo %s missed the cache'%name)
+            return output
+        cases.append(('cache/%s'%name, hit))
+    return cases
+
+def best_of(func, repeat, min_time=0.0, max_runs=200):
+    '''
+    Best time of func over repeat runs, more (up to max_runs) until min_time seconds
+    were spent, as short cases are noisy
+    '''
+    times=[]
+    #the demos print their save messages, gc is off while timing as in timeit
+    gc.collect()
+    gc.disable()
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            while len(times)<repeat or (sum(times)<min_time and len(times)<max_runs):
+                t_0=time.perf_counter()
+                val=func()
+                times.append(time.perf_counter()-t_0)
+    finally:
+        gc.enable()
+    return min(times), val
+
+def calibrate(repeat=20):
+    '''
+    Best time of a fixed Python and numpy workload, results are compared relative to it
+    so a loaded or slower machine doesn't read as a regression
+    '''
+    def work():
+        total=0.0
+        for ii in range(20000):
+            total+=ii*0.5
+        xy=np.arange(20000.0).reshape(-1, 2)
+        return total+float(np.hypot(*xy.T).sum())
+    return best_of(work, repeat)[0]
+
+def run_suite(geo_sizes, struct_sizes, repeat, only=None, min_time=0.0):
+    path=tempfile.mkdtemp(prefix='pyinventor_bench_')
+    results={}
+    try:
+        for name, func in geometry_cases(geo_sizes)+structure_cases(struct_sizes)+demo_cases(path)+cache_cases(path, only):
+            if only!=None and not any(key in name for key in only):
+                continue
+            t_best, val=best_of(func, repeat, min_time)
+            results[name]={'time': t_best}
+            if isinstance(val, sim_backend):
+                results[name]['calls']=val.call_count
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+    return results
+
+def compare(results, baseline, tolerance, min_delta=0.0, scale=1.0):
+    '''
+    Rows of (name, time, baseline time, ratio, calls, baseline calls, status). Baseline
+    times are multiplied by scale (this machine's calibration time over the baseline's),
+    slowdowns under min_delta seconds are timer noise and not flagged.
+    '''
+    rows=[]
+    for name in sorted(results):
+        res=results[name]
+        ref=baseline.get(name)
+        if ref==None:
+            rows.append((name, res['time'], None, None, res.get('calls'), None, 'new'))
+            continue
+        ref_time=ref['time']*scale
+        ratio=res['time']/ref_time if ref_time>0 else 1.0
+        status='ok'
+        #demo and cache times include the file writes of the simulated saves and exports
+        limit=1+(2*tolerance if name.startswith(('demo/', 'cache/')) else tolerance)
+        if ratio>limit and res['time']-ref_time>min_delta:
+            status='SLOWER'
+        if res.get('calls')!=None and ref.get('calls')!=None and res['calls']>ref['calls']:
+            status='MORE CALLS'
+        rows.append((name, res['time'], ref_time, ratio, res.get('calls'), ref.get('calls'), status))
+    return rows
+
+def load_baseline(path):
+    try:
+        with open(path) as f:
+            data=json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get('version')!=BASELINE_VERSION:
+        return None
+    return data
+
+def save_baseline(path, results, calibration, args):
+    data={'version': BASELINE_VERSION,
+          'calibration': calibration,
+          'machine': {'python': platform.python_version(), 'numpy': np.__version__,
+                      'platform': platform.platform(), 'processor': platform.processor() or platform.machine()},
+          'settings': {'geo_sizes': args.geo_sizes, 'struct_sizes': args.struct_sizes, 'repeat': args.repeat, 'min_time': args.min_time},
+          'results': results}
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+
+def main(argv=None):
+    parser=argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--geo-sizes', type=int, nargs='+', default=[1000, 100000])
+    parser.add_argument('--struct-sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repeat', type=int, default=5, help='runs per case, the best time is kept')
+    parser.add_argument('--min-time', type=float, default=0.25, help='keep repeating short cases for this many seconds')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed slowdown vs the baseline (0.5 = 50%%)')
+    parser.add_argument('--min-delta', type=float, default=5e-4, help='slowdowns under this many seconds are not flagged')
+    parser.add_argument('--only', nargs='+', default=None, help='run the cases whose name contains one of these')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--update', action='store_true', help='store the results as the baseline')
+    args=parser.parse_args(argv)
+
+    cal_0=calibrate()
+    results=run_suite(args.geo_sizes, args.struct_sizes, args.repeat, args.only, args.min_time)
+    calibration=min(cal_0, calibrate())
+    stored=load_baseline(args.baseline)
+    if args.update:
+        if stored!=None and args.only!=None:
+            #partial runs only replace the cases they ran, scaled to the stored calibration
+            #so the other cases keep theirs
+            if stored.get('calibration'):
+                scale=stored['calibration']/calibration
+                for res in results.values():
+                    res['time']*=scale
+                calibration=stored['calibration']
+            stored['results'].update(results)
+            results=stored['results']
+        save_baseline(args.baseline, results, calibration, args)
+        print('stored %d cases in %s'%(len(results), args.baseline))
+        return 0
+
+    baseline=stored['results'] if stored!=None else {}
+    scale=1.0
+    if stored==None:
+        print('no baseline at %s, run with --update to store one'%args.baseline)
+    elif stored.get('calibration'):
+        #only ever loosens, the short calibration catches quiet moments the long cases don't
+        scale=max(1.0, calibration/stored['calibration'])
+        print('calibration %.3f ms, baseline %.3f ms, baseline times scaled by %.2f'%(calibration*1e3, stored['calibration']*1e3, scale))
+    print('%-34s %11s %11s %8s %10s %10s  %s'%('case', 'ms', 'base ms', 'ratio', 'calls', 'base', 'status'))
+    flagged=0
+    for name, t_run, t_ref, ratio, calls, ref_calls, status in compare(results, baseline, args.tolerance, args.min_delta, scale):
+        flagged+=status not in ('ok', 'new')
+        print('%-34s %11.3f %11s %8s %10s %10s  %s'%(name, t_run*1e3, '-' if t_ref==None else '%.3f'%(t_ref*1e3),
+                                                     '-' if ratio==None else '%.2f'%ratio, '-' if calls==None else calls,
+                                                     '-' if ref_calls==None else ref_calls, status))
+    print('%d of %d cases flagged'%(flagged, len(results)))
+    return 1 if flagged else 0
+
+if __name__=='__main__':
+    sys.exit(main())